@@ -10,6 +10,11 @@ class MessageType(str, Enum):
     PLAYER_ACTION = "player_action"
     CHAT = "chat"
     ERROR = "error"
+    SESSION = "session"
+    GAME_DELTA = "game_delta"
+    PRESENCE = "presence"
+    PING = "ping"
+    PONG = "pong"
 
 class GameStatus(str, Enum):
     """Current status of the deception game session."""
@@ -21,6 +26,7 @@ class GameStatus(str, Enum):
     INVESTIGATION = "INVESTIGATION"
     WITNESS_IDENTIFICATION = "WITNESS_IDENTIFICATION"
     GAME_OVER = "GAME_OVER"
+    ABANDONED = "ABANDONED"  # Evicted after inactivity; only ever written to Supabase
 
 class Role(str, Enum):
     """Player roles in Deception: Murder in Hong Kong."""
@@ -78,6 +84,7 @@ class LobbyGame(BaseModel):
 class GameListResponse(BaseModel):
     public_games: List[LobbyGame]
     my_games: List[LobbyGame]
+    next_cursor: Optional[str] = Field(None, description="Pass as ?cursor= to fetch the next page of public games")
 
 class BaseMessage(BaseModel):
     type: MessageType
@@ -94,8 +101,24 @@ class PlayerLeftMessage(BaseMessage):
 
 class GameUpdateMessage(BaseMessage):
     type: MessageType = MessageType.GAME_UPDATE
+    seq: int = Field(0, description="Room revision this state was projected from")
     state: GameState = Field(..., description="Full updated game state")
 
+class GameDeltaMessage(BaseMessage):
+    type: MessageType = MessageType.GAME_DELTA
+    seq: int = Field(..., description="Room revision after applying the delta")
+    base_seq: int = Field(..., description="Revision the delta applies to (the client's last acknowledged seq)")
+    changes: Dict[str, Any] = Field({}, description="Changed state fields; players are keyed by id")
+
+class PresenceMessage(BaseMessage):
+    type: MessageType = MessageType.PRESENCE
+    changes: List[Dict[str, Any]] = Field([], description="Batched presence changes", examples=[[{"player_id": "player_123", "is_online": False}]])
+
+class SessionMessage(BaseMessage):
+    type: MessageType = MessageType.SESSION
+    resume_token: str = Field(..., description="Token to pass as ?resume= when reconnecting to this room")
+    seq: int = Field(0, description="Current room revision")
+
 class PlayerActionMessage(BaseMessage):
     type: MessageType = MessageType.PLAYER_ACTION
     player_id: str = Field(..., description="ID of the player performing the action")
@@ -118,6 +141,15 @@ class GameActionRequest(BaseModel):
     playerId: str
     data: Optional[Dict[str, Any]] = None
 
+class SyncOptions(BaseModel):
+    since: Optional[int] = None
+    wait: Optional[float] = Field(None, ge=0, allow_inf_nan=False)
+
+class SyncRequest(BaseModel):
+    gameId: str
+    playerId: str
+    data: Optional[SyncOptions] = None
+
 class ConfirmCrimeRequest(BaseModel):
     gameId: str
     playerId: str
@@ -153,6 +185,16 @@ class ConfirmDraftRequest(BaseModel):
     selectedMeansIds: List[str]
     selectedClueIds: List[str]
 
+# --- Maintenance Schemas ---
+
+class MaintenanceReport(BaseModel):
+    rows_removed: Dict[str, int] = Field({}, description="Rows deleted per table", examples=[{"games": 12, "game_chats": 340}])
+    evicted_rooms: int = Field(0, description="Deleted rooms that were also evicted from memory")
+    batches: int = Field(0, description="Number of RPC calls made")
+    duration_ms: float = Field(0.0, description="Wall-clock time spent")
+    skipped: bool = Field(False, description="True if another maintenance run was already in progress")
+    errors: List[str] = []
+
 # --- Library Management Schemas ---
 
 class LibraryCardResponse(BaseModel):
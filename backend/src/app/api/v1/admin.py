@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
 from src.app.core.auth import admin_only
 from src.app.core.database import get_supabase
 from src.app.core.config import settings
 from src.app.core.i18n import get_translator, Translator
 from src.app.api.schemas import LibraryCardCreateRequest, LibraryCardUpdateRequest, LibraryCardResponse
+from src.app.games.deception.logic import invalidate_catalog
 from typing import Optional
+import time
 
 # Apply admin_only to all routes in this router
 router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(admin_only)])
@@ -38,6 +41,7 @@ async def create_card(req: LibraryCardCreateRequest):
     res = supabase.table("library_cards").insert(req.model_dump()).execute()
     if not res.data:
         raise HTTPException(status_code=500, detail="Failed to create card")
+    invalidate_catalog()
     return res.data[0]
 
 @router.patch("/cards/{card_id}", summary="Update a library card")
@@ -46,12 +50,14 @@ async def update_card(card_id: str, req: LibraryCardUpdateRequest):
     res = supabase.table("library_cards").update(req.model_dump(exclude_unset=True)).eq("id", card_id).execute()
     if not res.data:
         raise HTTPException(status_code=404, detail="Card not found or update failed")
+    invalidate_catalog()
     return res.data[0]
 
 @router.delete("/cards/{card_id}", summary="Delete a library card")
 async def delete_card(card_id: str):
     supabase = get_supabase()
     res = supabase.table("library_cards").delete().eq("id", card_id).execute()
+    invalidate_catalog()
     return {"success": True}
 
 @router.get("/users", summary="List all registered profiles")
@@ -70,3 +76,40 @@ async def list_rooms():
 async def delete_storage():
     # Implementation placeholder
     return {"success": True}
+
+@router.get("/profile", summary="Capture a sampling profile of this worker")
+async def profile(
+    seconds: float = Query(10.0, gt=0),
+    mode: str = Query("wall", pattern="^(wall|cpu)$"),
+    interval_ms: float = Query(5.0, ge=1, le=1000),
+    allocations: bool = Query(False, description="Also diff tracemalloc snapshots over the window (JSON response)"),
+    top: int = Query(50, ge=1, le=1000)
+):
+    """
+    Samples this worker for `seconds` and returns the stacks in collapsed (flamegraph) format.
+    With allocations=true the response is JSON holding the collapsed stacks and the top allocation sites.
+    """
+    from src.app.core.profiler import ProfilerBusy, capture
+
+    if seconds > settings.PROFILE_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be at most {settings.PROFILE_MAX_SECONDS}")
+    try:
+        result = await capture(seconds, mode=mode, interval=interval_ms / 1000, allocations=allocations, top=top)
+    except ProfilerBusy:
+        raise HTTPException(status_code=409, detail="A profile is already being captured")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if allocations:
+        return {
+            "mode": result.mode,
+            "seconds": result.seconds,
+            "samples": result.samples,
+            "collapsed": result.collapsed(),
+            "allocations": result.allocations
+        }
+    filename = f"profile-{mode}-{int(time.time())}.collapsed"
+    return PlainTextResponse(result.collapsed(), headers={
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "X-Profile-Samples": str(result.samples)
+    })
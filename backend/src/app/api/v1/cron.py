@@ -1,15 +1,25 @@
-from fastapi import APIRouter, BackgroundTasks, Depends
-from src.app.core.database import get_supabase
-from src.app.api.schemas import GameStatus
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from src.app.core.config import settings
 from src.app.core.i18n import get_translator, Translator
-import time
+from src.app.core.maintenance import run_maintenance
+from typing import Optional
+import secrets
 
 router = APIRouter(prefix="/cron", tags=["Cron"])
 
-@router.get("/cleanup", summary="Automated maintenance")
-async def cleanup(background_tasks: BackgroundTasks, t: Translator = Depends(get_translator)):
-    """Cleanup stale games and inactive players."""
-    from src.app.core.database import get_supabase
-    supabase = get_supabase()
-    # Placeholder for actual cleanup logic (e.g., delete games > 24h old)
-    return {"status": t.t("cron.cleanup_triggered")}
+def verify_cron_secret(x_cron_secret: Optional[str] = Header(None)):
+    """Require the shared cron secret; without one configured the endpoint is disabled."""
+    if not settings.CRON_SECRET:
+        raise HTTPException(status_code=403, detail="Cron endpoint disabled (CRON_SECRET is not set)")
+    if not secrets.compare_digest(x_cron_secret or "", settings.CRON_SECRET):
+        raise HTTPException(status_code=401, detail="Invalid cron secret")
+
+@router.get("/cleanup", summary="Automated maintenance", dependencies=[Depends(verify_cron_secret)])
+async def cleanup(
+    batch_size: Optional[int] = Query(None, ge=1, le=settings.MAINTENANCE_BATCH_SIZE),
+    max_batches: Optional[int] = Query(None, ge=1, le=settings.MAINTENANCE_MAX_BATCHES),
+    t: Translator = Depends(get_translator)
+):
+    """Cleanup stale games, orphaned rows and old chats in bounded batches (at most the configured sizes)."""
+    report = await run_maintenance(batch_size=batch_size, max_batches=max_batches)
+    return {"status": t.t("cron.cleanup_triggered"), "report": report}
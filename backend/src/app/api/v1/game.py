@@ -1,40 +1,74 @@
-from fastapi import APIRouter, Depends, HTTPException
-import random
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Optional
+import asyncio
 import time
 from src.app.core.auth import get_current_user
 from src.app.core.database import get_supabase
 from src.app.core.config import settings
 from src.app.core.i18n import get_translator, Translator
-from src.app.api.websocket import manager as ws_manager
-from src.app.core.logger import logger
+from src.app.core.logger import logger, limited
+from src.app.core.presence import presence
+from src.app.core.lobby_index import lobby_index
+from src.app.core.room_codes import room_codes
+from src.app.core.projection import feeds
 from src.app.games.deception.manager import game_manager
 from src.app.api.schemas import (
     GameCreateRequest, GameCreateResponse, GameJoinRequest, GameJoinResponse, 
     GameListResponse, LobbyGame, GameStatus, GameActionRequest,    ConfirmCrimeRequest, SolveRequest, DrawTilesRequest, GuessWitnessRequest, 
-    SelectTileOptionRequest, ConfirmDraftRequest, GameUpdateMessage, MessageType
+    SelectTileOptionRequest, ConfirmDraftRequest, SyncRequest
 )
 
 router = APIRouter(prefix="/game", tags=["Game"])
 
-async def broadcast_game_state(game):
-    state = game.to_game_state() if hasattr(game, 'to_game_state') else game
-    
-    await ws_manager.broadcast(
-        GameUpdateMessage(
-            type=MessageType.GAME_UPDATE,
-            timestamp=time.time(),
-            state=state
-        ).model_dump(),
-        game.room_id
-    )
+# join_game RPC error -> HTTP status (the message doubles as the i18n key)
+JOIN_ERRORS = {"room_not_found": 404, "in_progress": 403, "room_full": 403}
 
-def generate_room_code():
-    chars = 'ABCDEFGHJKLMNPQRSTUVWXYZ23456789'
-    return ''.join(random.choice(chars) for _ in range(6))
+def format_lobby_game(g) -> LobbyGame:
+    return LobbyGame(
+        id=g['id'],
+        room_code=g['room_code'],
+        name=g['name'],
+        host_id=g['host_id'],
+        player_count=g.get('player_count', 0),
+        game_type=g.get('game_type') or 'deception'
+    )
 
 @router.get("/list", response_model=GameListResponse, summary="List public and joined game rooms")
-async def list_games(current_user: dict = Depends(get_current_user)):
-    """Fetches public games and games the user has joined."""
+async def list_games(
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.LOBBY_PAGE_SIZE, ge=1, le=100),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Public lobbies (newest first, cursor-paginated) from the Redis lobby index.
+    The user's own rooms are only included on the first page.
+    """
+    if not await lobby_index.ensure_built():
+        return await list_games_from_db(current_user)
+
+    try:
+        rooms, next_cursor = await lobby_index.list_public(cursor, limit)
+        user_rooms = await lobby_index.list_user_rooms(current_user["id"]) if not cursor else []
+    except Exception as e:
+        # Redis went away after the index check
+        limited("lobby_index").error("Lobby index read failed, falling back to Postgres: {}", e)
+        return await list_games_from_db(current_user)
+
+    # Hide lobbies that presence says nobody has been in for a while
+    stale = await presence.stale_rooms([r['id'] for r in rooms], settings.PRESENCE_LOBBY_STALE)
+    public_games = [format_lobby_game(r) for r in rooms if r['id'] not in stale]
+
+    my_games = [format_lobby_game(r) for r in user_rooms]
+
+    return GameListResponse(
+        public_games=public_games,
+        my_games=my_games,
+        next_cursor=next_cursor
+    )
+
+async def list_games_from_db(current_user: dict) -> GameListResponse:
+    """Fallback used when Redis is unavailable: query Supabase directly."""
     supabase = get_supabase()
     
     # 1. Fetch public games in LOBBY status
@@ -62,16 +96,11 @@ async def list_games(current_user: dict = Depends(get_current_user)):
     def format_game(g):
         player_info = g.get('players', [])
         p_count = player_info[0].get('count', 0) if player_info else 0
-        return LobbyGame(
-            id=g['id'],
-            room_code=g['room_code'],
-            name=g['name'],
-            host_id=g['host_id'],
-            player_count=p_count,
-            game_type=g.get('game_type', 'deception')
-        )
+        return format_lobby_game({**g, 'player_count': p_count})
 
-    public_games = [format_game(g) for g in public_res.data]
+    # Hide lobbies that presence says nobody has been in for a while
+    stale = await presence.stale_rooms([g['id'] for g in public_res.data], settings.PRESENCE_LOBBY_STALE)
+    public_games = [format_game(g) for g in public_res.data if g['id'] not in stale]
     
     my_games = []
     # Deduplicate: if a joined game is also in the public list, or if it's in progress
@@ -89,123 +118,93 @@ async def list_games(current_user: dict = Depends(get_current_user)):
 
 @router.post("/create", response_model=GameCreateResponse, summary="Create a new game room")
 async def create_game(req: GameCreateRequest, current_user: dict = Depends(get_current_user), t: Translator = Depends(get_translator)):
-    """Generates a unique room code and creates a new game record."""
+    """Creates the room and its host player through the create_game RPC: one atomic round trip."""
     supabase = get_supabase()
-    
-    room_code = generate_room_code()
-    is_unique = False
-    retries = 0
-    
-    while not is_unique and retries < 5:
-        logger.debug(f"Checking room code uniqueness: {room_code}")
-        existing = supabase.from_("games").select("id").eq("room_code", room_code).execute()
-        if existing is None:
-            logger.error(f"Supabase existing check returned None for code {room_code}")
-            raise HTTPException(status_code=500, detail="Supabase connection failure")
-        
-        if not existing.data:
-            is_unique = True
-        else:
-            room_code = generate_room_code()
-            retries += 1
-            
-    if not is_unique:
-        raise HTTPException(status_code=500, detail=t.t("game.code_gen_failed"))
         
     name = req.name or f"Room of {current_user['email'].split('@')[0] if current_user.get('email') else 'Player'}"
-    
-    logger.debug(f"Inserting new game: {room_code}, name: {name}")
-    new_game = supabase.from_("games").insert({
+    host_name = (current_user.get("email") or "Host").split("@")[0]
+
+    # The RPC draws its own code if the allocated one is taken (only possible when
+    # the allocator had to fall back to a process-local counter).
+    room_code = await room_codes.allocate()
+    try:
+        res = await asyncio.to_thread(
+            lambda: supabase.rpc("create_game", {
+                "p_host_id": current_user["id"],
+                "p_host_name": host_name,
+                "p_name": name,
+                "p_is_public": req.is_public,
+                "p_room_code": room_code
+            }).execute()
+        )
+    except Exception as e:
+        logger.error(f"create_game RPC failed: {e}")
+        raise HTTPException(status_code=500, detail=t.t("game.code_gen_failed"))
+
+    if res is None or not res.data:
+        logger.error("create_game RPC returned no data")
+        raise HTTPException(status_code=500, detail="Supabase insert failed (None response)")
+
+    created = res.data
+    game_id, room_code = created["game_id"], created["room_code"]
+
+    # Pre-warm the resident room so the host's first WebSocket connect is served from memory
+    await game_manager.handle_player_connect(
+        game_id, current_user["id"], host_name, db_id=created["player_id"],
+        room_code=room_code, host_id=current_user["id"]
+    )
+
+    await lobby_index.room_created({
+        "id": game_id,
         "room_code": room_code,
-        "status": GameStatus.LOBBY.value,
-        "host_id": current_user["id"],
         "name": name,
+        "host_id": current_user["id"],
+        "status": GameStatus.LOBBY.value,
         "is_public": req.is_public
-    }).execute()
-    
-    if new_game is None:
-        logger.error("Supabase insert returned None")
-        raise HTTPException(status_code=500, detail="Supabase insert failed (None response)")
-        
-    game_id = new_game.data[0]["id"]
-    
-    # Also add host as a player in the session
-    supabase.table("players").insert({
-        "game_id": game_id,
-        "user_id": current_user["id"],
-        "name": current_user.get("email", "Host").split("@")[0],
-        "is_admin": True,
-        "metadata": {"seat_index": 0}
-    }).execute()
+    }, created_at=time.time())
     
     return GameCreateResponse(game_id=game_id, room_code=room_code)
 
 @router.post("/join", response_model=GameJoinResponse, summary="Join a game room")
 async def join_game(req: GameJoinRequest, current_user: dict = Depends(get_current_user), t: Translator = Depends(get_translator)):
-    """Validates room code and assigns player to the game."""
+    """Joins (or re-joins) a room through the join_game RPC: one atomic round trip."""
     supabase = get_supabase()
-    
-    room_code = req.room_code.upper()
-    game_res = supabase.from_("games").select("id, status, host_id").eq("room_code", room_code).execute()
-    if game_res is None:
-        logger.error("Supabase game fetch returned None in join_game")
-        raise HTTPException(status_code=500, detail="Database connection failure")
-        
-    if not game_res.data:
-        raise HTTPException(status_code=404, detail=t.t("game.room_not_found"))
-    
-    game_data = game_res.data[0]
-    game_id = game_data["id"]
-    
-    existing_player = supabase.from_("players").select("*").eq("game_id", game_id).eq("user_id", current_user["id"]).execute()
-    if existing_player is None:
-        logger.error("Supabase existing player check returned None in join_game")
-        raise HTTPException(status_code=500, detail="Database connection failure")
-    
-    is_host = game_data["host_id"] == current_user["id"]
-    is_admin = is_host or current_user.get("email") == settings.ADMIN_EMAIL
-    
-    update_res = supabase.from_("profiles").update({"display_name": req.name}).eq("id", current_user["id"]).execute()
-    if update_res is None:
-        logger.warning(f"Profile update returned None for user {current_user['id']}")
-    
-    player_id = None
-    if existing_player.data:
-        player = existing_player.data[0]
-        player_id = player["id"]
-        update_p_res = supabase.from_("players").update({
-            "name": req.name,
-            "is_admin": is_admin
-        }).eq("id", player_id).execute()
-        if update_p_res is None:
-            logger.warning(f"Player update returned None for user {current_user['id']}")
-    else:
-        if game_data["status"] != GameStatus.LOBBY.value:
-            raise HTTPException(status_code=403, detail=t.t("game.in_progress"))
-            
-        new_player = supabase.from_("players").insert({
-            "game_id": game_id,
-            "user_id": current_user["id"],
-            "name": req.name,
-            "is_admin": is_admin,
-            "metadata": {"seat_index": random.randint(0, 1000)}
-        }).execute()
-        
-        if new_player is None:
-            logger.error("Supabase new player insert returned None in join_game")
-            raise HTTPException(status_code=500, detail="Database connection failure")
-            
-        if not new_player.data:
-            raise HTTPException(status_code=500, detail=t.t("game.join_failed"))
-        player_id = new_player.data[0]["id"]
-        
-    # Sync with Game Manager
-    await game_manager.handle_player_connect(game_id, current_user["id"], req.name, db_id=player_id)
-    game_obj = await game_manager.get_game(game_id)
-    if game_obj:
-        await broadcast_game_state(game_obj)
-        
-    return GameJoinResponse(player_id=player_id, game_id=game_id, is_admin=is_admin)
+
+    try:
+        res = await asyncio.to_thread(
+            lambda: supabase.rpc("join_game", {
+                "p_room_code": req.room_code.upper(),
+                "p_user_id": current_user["id"],
+                "p_name": req.name,
+                "p_is_site_admin": bool(settings.ADMIN_EMAIL) and current_user.get("email") == settings.ADMIN_EMAIL,
+                "p_max_players": settings.MAX_PLAYERS_PER_ROOM
+            }).execute()
+        )
+    except Exception as e:
+        error_key = getattr(e, "message", None) or str(e)
+        if error_key in JOIN_ERRORS:
+            raise HTTPException(status_code=JOIN_ERRORS[error_key], detail=t.t(f"game.{error_key}"))
+        logger.error(f"join_game RPC failed: {e}")
+        raise HTTPException(status_code=500, detail=t.t("game.join_failed"))
+
+    if res is None or not res.data:
+        logger.error("join_game RPC returned no data")
+        raise HTTPException(status_code=500, detail=t.t("game.join_failed"))
+
+    joined = res.data
+    game_id = joined["game_id"]
+    player_id = joined["player_id"]
+
+    await lobby_index.player_joined(game_id, current_user["id"])
+
+    # Update the resident room from the RPC result; no further reads needed
+    game_obj = await game_manager.handle_player_connect(
+        game_id, current_user["id"], req.name, db_id=player_id,
+        room_code=joined["room_code"], host_id=joined["host_id"]
+    )
+    await game_obj.broadcast_state()
+
+    return GameJoinResponse(player_id=player_id, game_id=game_id, is_admin=joined["is_admin"])
 
 # --- Generic Game Actions (REST Wrappers) ---
 
@@ -333,8 +332,9 @@ async def game_close(req: GameActionRequest, current_user: dict = Depends(get_cu
         # Cleanup
         from src.app.games.deception.logic import state_manager
         await state_manager.delete_state(req.gameId)
-        if req.gameId in game_manager.games:
-            del game_manager.games[req.gameId]
+        await lobby_index.rooms_closed([req.gameId])
+        await room_codes.release(game.room_code)
+        game_manager.remove_game(req.gameId)
         return {"success": True}
     raise HTTPException(status_code=404, detail=t.t("game.not_found"))
 
@@ -346,16 +346,118 @@ async def game_leave(req: GameActionRequest, current_user: dict = Depends(get_cu
         return {"success": True}
     raise HTTPException(status_code=404, detail=t.t("game.not_found"))
 
+@router.get("/catalog", summary="Library card bundle for resolving card ids")
+async def game_catalog(
+    game_type: str = "deception",
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Every library card of `game_type` (id, type, content, image_url) in one document.
+    The ETag is a hash of the content: send it back as If-None-Match to get a 304 while
+    the library is unchanged. Sockets opened with ?cards=ref receive card ids only.
+    """
+    from src.app.games.deception.catalog import catalog_bundles
+    etag, body = catalog_bundles.get(game_type)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match and etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def parse_etag(value: Optional[str]) -> Optional[int]:
+    """Revision carried by an ETag we issued ("<revision>"), if any."""
+    try:
+        return int(value.strip().removeprefix("W/").strip('"')) if value else None
+    except ValueError:
+        return None
+
+async def sync_response(game_id: str, viewer_id: str, if_none_match: Optional[str], since: Optional[int], wait: float, t: Translator):
+    """
+    Serve the caller's projection from the revision-keyed cache.
+    `since` (or the If-None-Match revision) plus `wait` turns the call into a long poll
+    that returns as soon as the room moves past that revision.
+    """
+    game = await game_manager.get_game(game_id)
+    if not game:
+        raise HTTPException(status_code=404, detail=t.t("game.not_found"))
+    if game.spectator_delay > 0 and not game.get_player(viewer_id):
+        # The live public projection would bypass the delay; spectators use the stream
+        raise HTTPException(status_code=403, detail=t.t("game.spectate_delayed"))
+
+    known = since if since is not None else parse_etag(if_none_match)
+    if known is not None and wait > 0:
+        await game.wait_for_revision(known, min(wait, settings.SYNC_LONG_POLL_MAX))
+
+    etag = f'"{game.revision}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+    if if_none_match and parse_etag(if_none_match) == game.revision:
+        return Response(status_code=304, headers=headers)
+
+    body = {"success": True, "seq": game.revision, "game": game.projection_for(viewer_id)}
+    return JSONResponse(body, headers=headers)
+
 @router.post("/sync")
-async def game_sync_post(req: GameActionRequest, current_user: dict = Depends(get_current_user), t: Translator = Depends(get_translator)):
-    game = await game_manager.get_game(req.gameId)
-    if game:
-        return {"success": True, "game": game.to_game_state()}
-    raise HTTPException(status_code=404, detail=t.t("game.not_found"))
+async def game_sync_post(
+    req: SyncRequest,
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user),
+    t: Translator = Depends(get_translator)
+):
+    """Current state for the caller. Optional data: {"since": <seq>, "wait": <seconds>} (wait is capped at SYNC_LONG_POLL_MAX)."""
+    since, wait = (req.data.since, req.data.wait) if req.data else (None, None)
+    return await sync_response(req.gameId, current_user["id"], if_none_match, since=since, wait=wait or 0, t=t)
 
 @router.get("/sync/{game_id}")
-async def game_sync_get(game_id: str, current_user: dict = Depends(get_current_user), t: Translator = Depends(get_translator)):
+async def game_sync_get(
+    game_id: str,
+    since: Optional[int] = None,
+    wait: float = Query(0, ge=0),
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user),
+    t: Translator = Depends(get_translator)
+):
+    """Current state for the caller; supports If-None-Match (304) and long polling via ?since=&wait=."""
+    return await sync_response(game_id, current_user["id"], if_none_match, since=since, wait=wait, t=t)
+
+@router.get("/stream/{game_id}", summary="Read-only state stream (Server-Sent Events)")
+async def game_stream(game_id: str, request: Request, token: str = Query(...), t: Translator = Depends(get_translator)):
+    """
+    Streams the public (spectator) projection of a room as Server-Sent Events:
+    a game_update snapshot first, then game_delta events whose id is the room revision.
+    Viewers are not seated as players and never touch Supabase; the token is a query
+    parameter because EventSource cannot send headers.
+    """
+    from src.app.core.auth import verify_supabase_jwt
+    try:
+        verify_supabase_jwt(token)
+    except Exception:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
     game = await game_manager.get_game(game_id)
-    if game:
-        return {"success": True, "game": game.to_game_state()}
-    raise HTTPException(status_code=404, detail="Game not found")
+    if not game:
+        raise HTTPException(status_code=404, detail=t.t("game.not_found"))
+
+    queue = game.spectator_feed().subscribe()
+
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    frame = await asyncio.wait_for(queue.get(), settings.SSE_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                if frame is None:
+                    yield "event: closed\ndata: {}\n\n"
+                    return
+                yield frame.sse
+        finally:
+            feeds.release(game_id, queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
@@ -1,35 +1,106 @@
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import List, Dict
-import json
+from typing import List, Dict, Set
+from src.app.core.presence import presence
+from src.app.core.metrics import WS_SENT_BYTES
+from src.app.core.projection import encode_message
+from src.app.core.tracing import tracer
 
 class ConnectionManager:
     def __init__(self):
         # room_id -> {user_id: WebSocket}
         self.active_connections: Dict[str, Dict[str, WebSocket]] = {}
+        # room_id -> {WebSocket: user_id}; spectators are never seated and never get per-player state
+        self.spectators: Dict[str, Dict[WebSocket, str]] = {}
+        # room_id -> user_ids whose socket asked for card ids instead of card objects (?cards=ref)
+        self.card_refs: Dict[str, Set[str]] = {}
 
-    async def connect(self, websocket: WebSocket, room_id: str, user_id: str):
+    async def connect(self, websocket: WebSocket, room_id: str, user_id: str, card_refs: bool = False):
         await websocket.accept()
         if room_id not in self.active_connections:
             self.active_connections[room_id] = {}
         self.active_connections[room_id][user_id] = websocket
+        if card_refs:
+            self.card_refs.setdefault(room_id, set()).add(user_id)
+        else:
+            self._forget_card_refs(room_id, user_id)
+        presence.connected(room_id, user_id)
 
-    def disconnect(self, websocket: WebSocket, room_id: str, user_id: str):
+    def wants_card_refs(self, room_id: str, user_id: str) -> bool:
+        refs = self.card_refs.get(room_id)
+        return refs is not None and user_id in refs
+
+    def _forget_card_refs(self, room_id: str, user_id: str):
+        refs = self.card_refs.get(room_id)
+        if refs is not None:
+            refs.discard(user_id)
+            if not refs:
+                del self.card_refs[room_id]
+
+    def disconnect(self, websocket: WebSocket, room_id: str, user_id: str) -> bool:
+        """Drop `websocket`; False when it was already replaced by a newer socket for the user."""
+        removed = False
         if room_id in self.active_connections:
-            if user_id in self.active_connections[room_id]:
+            # Ignore stale sockets: the user may already have reconnected on a new one
+            if self.active_connections[room_id].get(user_id) is websocket:
                 del self.active_connections[room_id][user_id]
+                self._forget_card_refs(room_id, user_id)
+                presence.disconnected(room_id, user_id)
+                removed = True
             if not self.active_connections[room_id]:
                 del self.active_connections[room_id]
+        return removed
+
+    async def connect_spectator(self, websocket: WebSocket, room_id: str, user_id: str):
+        await websocket.accept()
+        self.spectators.setdefault(room_id, {})[websocket] = user_id
+
+    def disconnect_spectator(self, websocket: WebSocket, room_id: str):
+        watchers = self.spectators.get(room_id)
+        if watchers is not None:
+            watchers.pop(websocket, None)
+            if not watchers:
+                del self.spectators[room_id]
+
+    def spectator_count(self, room_id: str) -> int:
+        return len(self.spectators.get(room_id, {}))
+
+    async def close_room(self, room_id: str, code: int = 1000):
+        """Server-side close of every socket in a room (e.g. when the room is evicted)."""
+        for connection in list(self.spectators.get(room_id, {})):
+            self.disconnect_spectator(connection, room_id)
+            try:
+                await connection.close(code=code)
+            except Exception:
+                pass
+        for user_id, connection in list(self.active_connections.get(room_id, {}).items()):
+            presence.mark_reaped(room_id, user_id)
+            self.disconnect(connection, room_id, user_id)
+            try:
+                await connection.close(code=code)
+            except Exception:
+                pass
 
     async def send_personal_message(self, message: dict, websocket: WebSocket):
         await websocket.send_json(message)
 
-    async def send_to_user(self, message: dict, room_id: str, user_id: str):
+    async def send_to_user(self, message: dict, room_id: str, user_id: str) -> int:
+        """Returns the number of bytes sent (0 when the user isn't connected)."""
         if room_id in self.active_connections and user_id in self.active_connections[room_id]:
-            await self.active_connections[room_id][user_id].send_json(message)
+            text = encode_message(message)
+            with tracer.span("ws.send", user_id=user_id, bytes=len(text)):
+                await self.active_connections[room_id][user_id].send_text(text)
+            WS_SENT_BYTES.labels("player").inc(len(text))
+            return len(text)
+        return 0
 
     async def broadcast(self, message: dict, room_id: str):
         if room_id in self.active_connections:
-            for user_id, connection in self.active_connections[room_id].items():
-                await connection.send_json(message)
+            # Encode once for the whole room
+            text = encode_message(message)
+            sent = WS_SENT_BYTES.labels("player")
+            for user_id, connection in list(self.active_connections[room_id].items()):
+                with tracer.span("ws.send", user_id=user_id, bytes=len(text)):
+                    await connection.send_text(text)
+                sent.inc(len(text))
 
 manager = ConnectionManager()
@@ -3,8 +3,9 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
 from typing import List
 from .config import settings
-from .logger import logger
+from .logger import logger, limited
 from .i18n import get_translator, Translator
+from .tracing import traced
 
 import httpx
 import time
@@ -54,6 +55,7 @@ if settings.SUPABASE_URL and settings.SUPABASE_KEY:
     jwks_url = f"{settings.SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json"
     jwks_client = JWKSClient(jwks_url, apikey=settings.SUPABASE_KEY)
 
+@traced("auth.verify_jwt")
 def verify_supabase_jwt(token: str) -> dict:
     """
     Core logic to verify a Supabase JWT.
@@ -73,9 +75,9 @@ def verify_supabase_jwt(token: str) -> dict:
         header = jwt.get_unverified_header(token)
         alg = header.get("alg")
         kid = header.get("kid")
-        logger.debug(f"JWT Header: {header}")
+        logger.debug("JWT Header: {}", header)
     except Exception as e:
-        logger.error(f"Could not parse JWT Header: {e}. Token start: {token[:10]}...")
+        limited("auth.header").error("Could not parse JWT Header: {}. Token start: {}...", e, token[:10])
         raise ValueError("Invalid token format (header parse failed).")
 
     # 2. Determine verification key based on algorithm
@@ -85,7 +87,7 @@ def verify_supabase_jwt(token: str) -> dict:
         
         jwk = jwks_client.get_key(kid)
         if not jwk:
-            logger.error(f"Key ID {kid} not found in JWKS.")
+            limited("auth.jwks").error("Key ID {} not found in JWKS.", kid)
             raise ValueError(f"Key ID {kid} not found. Algorithm mismatch or rotated keys.")
         verification_key = jwk
         algorithms = ["ES256"]
@@ -137,7 +139,7 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
             headers={"WWW-Authenticate": "Bearer"} if status_code == 401 else None,
         )
     except JWTError as e:
-        logger.error(f"JWT Decode error: {e}")
+        limited("auth.decode").error("JWT Decode error: {}", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Could not validate credentials: {str(e)}",
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from typing import List, Optional, Dict, Any
 from abc import ABC, abstractmethod
+import asyncio
 import time
 
 class BasePlayer(BaseModel):
@@ -20,13 +21,50 @@ class BaseRoom(BaseModel, ABC):
     players: List[BasePlayer] = []
     status: str = "LOBBY"
     created_at: float = Field(default_factory=time.time)
+    revision: int = 0
     metadata: Dict[str, Any] = {}
+
+    # Set (and dropped) on the next mark_dirty(); long-polling clients wait on it
+    _revision_event: Optional[asyncio.Event] = PrivateAttr(default=None)
+    # Long polls currently parked in wait_for_revision()
+    _waiters: int = PrivateAttr(default=0)
     
     @abstractmethod
     async def handle_event(self, player_id: str, event_type: str, data: Dict[str, Any]):
         """Handle incoming WebSocket events specific to the game."""
         pass
 
+    def mark_dirty(self):
+        """Bump the room revision. Clients use it as a sequence number for resumes and deltas."""
+        self.revision += 1
+        event, self._revision_event = self._revision_event, None
+        if event:
+            event.set()
+
+    async def wait_for_revision(self, after: int, timeout: float) -> bool:
+        """Wait until the revision exceeds `after`. Returns False on timeout."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        self._waiters += 1
+        try:
+            while self.revision <= after:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return False
+                if self._revision_event is None:
+                    self._revision_event = asyncio.Event()
+                try:
+                    await asyncio.wait_for(self._revision_event.wait(), remaining)
+                except asyncio.TimeoutError:
+                    return False
+            return True
+        finally:
+            self._waiters -= 1
+
+    @property
+    def waiters(self) -> int:
+        return self._waiters
+
     def add_player(self, player: BasePlayer):
         existing = self.get_player(player.id)
         if existing:
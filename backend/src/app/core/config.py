@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import Dict, Optional
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Manager Game"
@@ -12,11 +12,77 @@ class Settings(BaseSettings):
     
     # Supabase
     SUPABASE_URL: Optional[str] = None
-    SUPABASE_KEY: Optional[str] = None
-    SUPABASE_SERVICE_ROLE_KEY: Optional[str] = None
+    SUPABASE_KEY: Optional[str] = None  # apikey for JWKS; backend client key when SUPABASE_SERVICE_ROLE_KEY is unset
+    SUPABASE_SERVICE_ROLE_KEY: Optional[str] = None  # backend client key; startup fails if the client would run as anon/authenticated
     SUPABASE_JWT_SECRET: Optional[str] = None
+    SUPABASE_BACKEND: str = "supabase"  # "supabase" or "memory" (in-process stand-in for tests and benchmarks)
+    SUPABASE_LATENCY_MS: float = 0.0  # injected per-call latency for the memory backend
     ADMIN_EMAIL: Optional[str] = None
-    
+
+    # Session resume (WebSocket reconnects)
+    # Must be shared by all workers; a random per-process secret is used when unset.
+    SESSION_TOKEN_SECRET: Optional[str] = None
+    SESSION_TOKEN_TTL: int = 86400  # 24 hours
+
+    # Rooms
+    MAX_PLAYERS_PER_ROOM: int = 12  # enforced by the join_game RPC
+    ROOM_CODE_MODE: str = "feistel"  # "feistel" (permuted shared counter) or "redis" (SET NX reservations)
+    ROOM_CODE_KEY: Optional[str] = None  # Feistel key; generated once and stored in Redis when unset
+    ROOM_CODE_TTL: int = 86400  # reservation lifetime in "redis" mode
+
+    # Presence / heartbeats
+    HEARTBEAT_INTERVAL: float = 15.0  # seconds between server pings
+    IDLE_TIMEOUT: float = 45.0  # sockets silent for this long are reaped
+    PRESENCE_FLUSH_INTERVAL: float = 1.0  # batching window for Redis writes and presence broadcasts
+    PRESENCE_LOBBY_STALE: int = 300  # hide public lobbies nobody has been seen in for this long
+    LOBBY_PAGE_SIZE: int = 50  # public lobbies per /game/list page
+    SYNC_LONG_POLL_MAX: float = 30.0  # upper bound for /game/sync?wait=
+    VIEWER_QUEUE_SIZE: int = 16  # frames buffered per read-only viewer before it is resynced
+    SSE_KEEPALIVE: float = 15.0  # seconds between SSE keepalive comments
+    SPECTATOR_MAX_DELAY: float = 300.0  # upper bound for the host's spectator delay
+
+    # HTTP
+    RATE_LIMIT_PER_MINUTE: int = 100  # /api requests per client IP; 0 disables (load tests)
+    METRICS_TOKEN: Optional[str] = None  # GET /metrics requires it as a bearer token; unset disables the endpoint
+
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: Dict[str, str] = {}  # per-module overrides, e.g. {"src.app.core.auth": "DEBUG"} (JSON in the env)
+    LOG_FORMAT: str = "text"  # "text" or "json" (one object per line)
+    LOG_FILE: Optional[str] = "logs/app.log"  # empty disables the file output
+    LOG_FILE_MAX_MB: int = 500  # rolled over to .1 .. .3 past this size
+    LOG_QUEUE_SIZE: int = 10000  # records buffered for the writer thread; overflow is dropped and counted
+    LOG_LIMIT_INTERVAL: float = 10.0  # limited(key): window length in seconds
+    LOG_LIMIT_BURST: int = 5  # limited(key): records let through per window
+
+    # Event loop monitor
+    LOOP_MONITOR_INTERVAL: float = 0.1  # seconds between lag samples; 0 disables the monitor
+    LOOP_STALL_THRESHOLD: float = 0.25  # lag that counts as a stall (logged with the blocking stack)
+
+    # Profiling (GET /api/v1/admin/profile)
+    PROFILE_MAX_SECONDS: float = 60.0
+
+    # Tracing
+    TRACE_EXPORTER: str = "none"  # "none", "memory" or "file" (JSON lines at TRACE_FILE)
+    TRACE_FILE: str = "logs/traces.jsonl"
+    TRACE_SAMPLE_RATE: float = 0.01  # head sampling, also applied to incoming sampled traceparents
+    TRACE_TRUST_PARENT: bool = False  # follow incoming sampled flags as-is (only behind a trusted upstream)
+
+    # Room scavenger
+    ROOM_IDLE_TTL: int = 3600  # evict resident rooms with no activity for this long
+    ROOM_COMPACT_AFTER: int = 300  # hold rooms idle for this long in compact form; 0 disables
+    SCAVENGER_BATCH_SIZE: int = 100  # rooms expired per batch
+
+    # Database maintenance (/api/v1/cron/cleanup and scheduler)
+    CRON_SECRET: Optional[str] = None  # cron calls must send it in X-Cron-Secret; unset disables the endpoint
+    MAINTENANCE_INTERVAL_MINUTES: int = 15
+    MAINTENANCE_BATCH_SIZE: int = 500  # rows per RPC call
+    MAINTENANCE_MAX_BATCHES: int = 20  # per table per run
+    MAINTENANCE_LOBBY_MAX_AGE_MINUTES: int = 60
+    MAINTENANCE_GAME_MAX_AGE_HOURS: int = 24
+    MAINTENANCE_ACTIVE_GRACE_MINUTES: int = 30  # rooms any worker saw a player in this recently are never swept
+    MAINTENANCE_CHAT_MAX_AGE_HOURS: int = 24
+
     model_config = SettingsConfigDict(
         env_file=[".env", "../.env"], 
         case_sensitive=True,
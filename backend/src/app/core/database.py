@@ -1,14 +1,54 @@
+import base64
+import json
+from typing import Optional
 from supabase import create_client, Client
 from .config import settings
 from .logger import logger
 
 supabase: Client = None
 
+# Roles the room and maintenance RPCs are revoked from (see migrations 025, 027, 028)
+_CLIENT_ROLES = ("anon", "authenticated")
+
+def key_role(key: str) -> Optional[str]:
+    """The Postgres role an API key acts as: the `role` claim of a JWT key, or the prefix of an sb_ key."""
+    if key.startswith("sb_publishable_"):
+        return "anon"
+    if key.startswith("sb_secret_"):
+        return "service_role"
+    try:
+        payload = key.split(".")[1]
+        return json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))).get("role")
+    except (IndexError, ValueError, AttributeError):
+        return None
+
+def server_key() -> Optional[str]:
+    """
+    The key the backend client uses: SUPABASE_SERVICE_ROLE_KEY, else SUPABASE_KEY.
+    Raises RuntimeError for a client (anon/authenticated) key, since every room RPC would fail.
+    """
+    key = settings.SUPABASE_SERVICE_ROLE_KEY or settings.SUPABASE_KEY
+    if key and key_role(key) in _CLIENT_ROLES:
+        source = "SUPABASE_SERVICE_ROLE_KEY" if settings.SUPABASE_SERVICE_ROLE_KEY else "SUPABASE_KEY"
+        raise RuntimeError(f"{source} is a {key_role(key)} key; the backend needs the service_role key")
+    return key
+
 def init_supabase():
     global supabase
-    if settings.SUPABASE_URL and settings.SUPABASE_KEY:
+    from .metrics import InstrumentedSupabase
+    if settings.SUPABASE_BACKEND == "memory":
+        from .memory_supabase import MemorySupabase
+        # Keep a client that was installed (and seeded) before startup
+        client = supabase.client if isinstance(supabase, InstrumentedSupabase) else supabase
+        if not isinstance(client, MemorySupabase):
+            client = MemorySupabase(latency=settings.SUPABASE_LATENCY_MS / 1000)
+        supabase = InstrumentedSupabase(client)
+        logger.info(f"Using the in-memory Supabase backend (latency {settings.SUPABASE_LATENCY_MS}ms).")
+        return
+    key = server_key()
+    if settings.SUPABASE_URL and key:
         try:
-            supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+            supabase = InstrumentedSupabase(create_client(settings.SUPABASE_URL, key))
             logger.info("Supabase client initialized successfully.")
         except Exception as e:
             logger.error(f"Failed to initialize Supabase client: {e}")
@@ -21,3 +61,7 @@ def get_supabase() -> Client:
         logger.error("get_supabase called before initialization or initialization failed")
         raise HTTPException(status_code=500, detail="Supabase client not initialized")
     return supabase
+
+def supabase_client() -> Optional[Client]:
+    """The client, or None when none is configured; for work that can go without the database."""
+    return supabase
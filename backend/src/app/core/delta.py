@@ -0,0 +1,41 @@
+from typing import Dict, Any, List
+
+def diff_state(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Shallow diff between two projected game states.
+    Top-level fields are replaced wholesale when they differ; players are
+    diffed by id so unchanged players are not resent.
+    """
+    changes: Dict[str, Any] = {}
+    for key, value in new.items():
+        if key == "players":
+            continue
+        if key not in old or old[key] != value:
+            changes[key] = value
+
+    old_players = {p["id"]: p for p in old.get("players", [])}
+    new_players: List[Dict[str, Any]] = new.get("players", [])
+    new_ids = [p["id"] for p in new_players]
+
+    upsert = [p for p in new_players if old_players.get(p["id"]) != p]
+    remove = [pid for pid in old_players if pid not in set(new_ids)]
+    if upsert or remove or new_ids != list(old_players):
+        changes["players"] = {
+            "upsert": upsert,
+            "remove": remove,
+            "order": new_ids
+        }
+    return changes
+
+def apply_delta(state: Dict[str, Any], changes: Dict[str, Any]) -> Dict[str, Any]:
+    """Inverse of diff_state: rebuilds the newer state from an older one and a delta."""
+    result = {**state, **{k: v for k, v in changes.items() if k != "players"}}
+    if "players" in changes:
+        patch = changes["players"]
+        by_id = {p["id"]: p for p in state.get("players", [])}
+        for pid in patch["remove"]:
+            by_id.pop(pid, None)
+        for p in patch["upsert"]:
+            by_id[p["id"]] = p
+        result["players"] = [by_id[pid] for pid in patch["order"]]
+    return result
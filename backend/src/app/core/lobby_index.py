@@ -0,0 +1,247 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from .logger import logger, limited
+from .redis import get_redis
+
+PUBLIC_KEY = "lobby:public"   # ZSET room_id -> created_at, public rooms still in LOBBY
+READY_KEY = "lobby:ready"     # Set once the index has been built from Postgres
+
+# Extra entries fetched per page so rooms sharing the cursor's timestamp can be skipped
+_TIE_SLACK = 16
+# Rows per Postgres page during a rebuild (PostgREST caps responses at 1000 rows by default)
+_REBUILD_PAGE = 1000
+
+def _room_key(room_id: str) -> str:
+    return f"lobby:room:{room_id}"
+
+def _members_key(room_id: str) -> str:
+    return f"lobby:members:{room_id}"
+
+def _user_key(user_id: str) -> str:
+    return f"lobby:user:{user_id}"
+
+def _encode_cursor(score: float, room_id: str) -> str:
+    return f"{score!r}:{room_id}"
+
+def _decode_cursor(cursor: str) -> Tuple[float, str]:
+    score, _, room_id = cursor.partition(":")
+    return float(score), room_id
+
+def _timestamp(value: Any) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+class LobbyIndex:
+    """
+    Redis-maintained index behind /game/list, so lobby polling never touches Postgres.
+
+    - lobby:public          ZSET of public LOBBY rooms scored by created_at
+    - lobby:room:{id}       HASH with the LobbyGame fields plus status / is_public
+    - lobby:members:{id}    SET of user ids (player count is SCARD)
+    - lobby:user:{uid}      SET of room ids the user has joined
+
+    The routes update it on create, join, leave, start and close. Postgres is only read
+    when the index has never been built (fresh or flushed Redis).
+    """
+
+    async def room_created(self, room: Dict[str, Any], created_at: float):
+        client = get_redis()
+        if not client:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            self._write_room(pipe, room, created_at, [room["host_id"]])
+            await pipe.execute()
+        except Exception as e:
+            limited("lobby_index").error("Lobby index room_created error: {}", e)
+
+    async def player_joined(self, room_id: str, user_id: str):
+        client = get_redis()
+        if not client:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.sadd(_members_key(room_id), user_id)
+            pipe.sadd(_user_key(user_id), room_id)
+            await pipe.execute()
+        except Exception as e:
+            limited("lobby_index").error("Lobby index player_joined error: {}", e)
+
+    async def player_left(self, room_id: str, user_id: str):
+        client = get_redis()
+        if not client:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.srem(_members_key(room_id), user_id)
+            pipe.srem(_user_key(user_id), room_id)
+            await pipe.execute()
+        except Exception as e:
+            limited("lobby_index").error("Lobby index player_left error: {}", e)
+
+    async def set_status(self, room_ids: Iterable[str], status: str):
+        """Record a status change; rooms leave the public listing once they are out of LOBBY."""
+        client = get_redis()
+        room_ids = list(room_ids)
+        if not client or not room_ids:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            for room_id in room_ids:
+                pipe.hmget(_room_key(room_id), "is_public", "created_at")
+            rows = await pipe.execute()
+
+            pipe = client.pipeline(transaction=False)
+            for room_id, (is_public, created_at) in zip(room_ids, rows):
+                if created_at is None:
+                    continue  # Not indexed
+                pipe.hset(_room_key(room_id), "status", status)
+                if status == "LOBBY" and is_public == "1":
+                    pipe.zadd(PUBLIC_KEY, {room_id: float(created_at)})
+                else:
+                    pipe.zrem(PUBLIC_KEY, room_id)
+            await pipe.execute()
+        except Exception as e:
+            limited("lobby_index").error("Lobby index set_status error: {}", e)
+
+    async def rooms_closed(self, room_ids: Iterable[str]):
+        client = get_redis()
+        room_ids = list(room_ids)
+        if not client or not room_ids:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            for room_id in room_ids:
+                pipe.smembers(_members_key(room_id))
+            members = await pipe.execute()
+
+            pipe = client.pipeline(transaction=False)
+            pipe.zrem(PUBLIC_KEY, *room_ids)
+            for room_id, user_ids in zip(room_ids, members):
+                for user_id in user_ids:
+                    pipe.srem(_user_key(user_id), room_id)
+                pipe.delete(_room_key(room_id), _members_key(room_id))
+            await pipe.execute()
+        except Exception as e:
+            limited("lobby_index").error("Lobby index rooms_closed error: {}", e)
+
+    async def list_public(self, cursor: Optional[str] = None, limit: int = 50) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One page of public lobbies, newest first, plus the cursor for the next page."""
+        client = get_redis()
+        if cursor:
+            max_score, after_id = _decode_cursor(cursor)
+            entries = await client.zrevrangebyscore(PUBLIC_KEY, max_score, "-inf", start=0, num=limit + 1 + _TIE_SLACK, withscores=True)
+            # Same-score members come back in reverse lexicographic order
+            entries = [(rid, s) for rid, s in entries if s < max_score or rid < after_id]
+        else:
+            entries = await client.zrevrange(PUBLIC_KEY, 0, limit, withscores=True)
+
+        page, more = entries[:limit], len(entries) > limit
+        rooms = await self._load([rid for rid, _ in page])
+        next_cursor = _encode_cursor(page[-1][1], page[-1][0]) if more and page else None
+        return rooms, next_cursor
+
+    async def list_user_rooms(self, user_id: str) -> List[Dict[str, Any]]:
+        client = get_redis()
+        room_ids = sorted(await client.smembers(_user_key(user_id)))
+        rooms = await self._load(room_ids)
+
+        # Drop rooms whose entry vanished (closed while the user was away)
+        gone = set(room_ids) - {r["id"] for r in rooms}
+        if gone:
+            await client.srem(_user_key(user_id), *gone)
+        return sorted(rooms, key=lambda r: r["created_at"], reverse=True)
+
+    async def ensure_built(self) -> bool:
+        """
+        Make sure the index exists, rebuilding it from Postgres on a cold start.
+        Returns False when Redis is unavailable so callers can fall back.
+        """
+        client = get_redis()
+        if not client:
+            return False
+        try:
+            if await client.exists(READY_KEY):
+                return True
+            await self.rebuild()
+            return True
+        except Exception as e:
+            logger.error(f"Lobby index unavailable: {e}")
+            return False
+
+    async def rebuild(self):
+        """Load every room and its players from Postgres, a page at a time until a short page comes back."""
+        import asyncio
+        from .database import get_supabase
+
+        def fetch():
+            supabase = get_supabase()
+            rows: List[Dict[str, Any]] = []
+            while True:
+                res = supabase.from_("games") \
+                    .select("id, room_code, name, host_id, status, game_type, is_public, created_at, players(user_id)") \
+                    .order("id") \
+                    .range(len(rows), len(rows) + _REBUILD_PAGE - 1) \
+                    .execute()
+                page = res.data if res and res.data else []
+                rows.extend(page)
+                if len(page) < _REBUILD_PAGE:
+                    return rows
+
+        rows = await asyncio.to_thread(fetch)
+        client = get_redis()
+        pipe = client.pipeline(transaction=False)
+        pipe.delete(PUBLIC_KEY)
+        for row in rows:
+            user_ids = [p["user_id"] for p in row.get("players") or [] if p.get("user_id")]
+            self._write_room(pipe, row, _timestamp(row.get("created_at")), user_ids)
+        pipe.set(READY_KEY, "1")
+        await pipe.execute()
+        logger.info(f"Lobby index rebuilt from Postgres: {len(rows)} rooms")
+
+    # --- Helpers ---
+
+    def _write_room(self, pipe, room: Dict[str, Any], created_at: float, user_ids: List[str]):
+        room_id = str(room["id"])
+        status = room.get("status") or "LOBBY"
+        is_public = bool(room.get("is_public"))
+        pipe.hset(_room_key(room_id), mapping={
+            "id": room_id,
+            "room_code": room["room_code"],
+            "name": room.get("name") or "",
+            "host_id": room.get("host_id") or "",
+            "game_type": room.get("game_type") or "deception",
+            "status": status,
+            "is_public": "1" if is_public else "0",
+            "created_at": repr(created_at),
+        })
+        if user_ids:
+            pipe.sadd(_members_key(room_id), *user_ids)
+            for user_id in user_ids:
+                pipe.sadd(_user_key(user_id), room_id)
+        if is_public and status == "LOBBY":
+            pipe.zadd(PUBLIC_KEY, {room_id: created_at})
+
+    async def _load(self, room_ids: List[str]) -> List[Dict[str, Any]]:
+        if not room_ids:
+            return []
+        client = get_redis()
+        pipe = client.pipeline(transaction=False)
+        for room_id in room_ids:
+            pipe.hgetall(_room_key(room_id))
+            pipe.scard(_members_key(room_id))
+        results = await pipe.execute()
+
+        rooms = []
+        for room, count in zip(results[0::2], results[1::2]):
+            if room:
+                room["player_count"] = count
+                room["created_at"] = float(room.get("created_at", 0))
+                rooms.append(room)
+        return rooms
+
+lobby_index = LobbyIndex()
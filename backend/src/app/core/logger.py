@@ -1,20 +1,211 @@
+"""
+Logging setup (loguru).
+
+Levels are set per module (LOG_LEVEL / LOG_LEVELS). Calls below the lowest configured
+level return before the message is formatted, so use loguru's lazy style on hot paths:
+logger.debug("x {}", value), not f-strings. Accepted records go to a bounded in-process queue; a writer thread renders
+them (text or JSON) and does the I/O. When the queue is full, records are dropped and
+counted instead of blocking the event loop.
+
+For messages that can repeat per request or per frame, use limited(key) to cap how
+often they reach the sink; the suppressed count is reported with the next one.
+"""
+import atexit
+import json
+import os
 import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import timezone
+from typing import Any, Deque, Dict, List, Optional, TextIO
 from loguru import logger
+from .config import settings
+
+class RotatingFile:
+    """Appends to `path`, rolling it over to path.1 .. path.N when it grows past max_bytes."""
+    def __init__(self, path: str, max_bytes: int, backups: int = 3):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, text: str):
+        self._file.write(text)
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def flush(self):
+        self._file.flush()
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        self._file = open(self.path, "w", encoding="utf-8")
+
+def render_text(record: Dict[str, Any]) -> str:
+    line = (
+        f"{record['time']:%Y-%m-%d %H:%M:%S} | {record['level'].name: <8} | "
+        f"{record['name']}:{record['function']}:{record['line']} - {record['message']}"
+    )
+    suppressed = record["extra"].get("suppressed")
+    if suppressed:
+        line += f" (+{suppressed} suppressed)"
+    if record["exception"]:
+        exc = record["exception"]
+        line += "\n" + "".join(traceback.format_exception(exc.type, exc.value, exc.traceback)).rstrip()
+    return line + "\n"
+
+def render_json(record: Dict[str, Any]) -> str:
+    entry = {
+        "ts": record["time"].astimezone(timezone.utc).isoformat(timespec="milliseconds"),
+        "level": record["level"].name,
+        "logger": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "message": record["message"],
+    }
+    entry.update(record["extra"])
+    if record["exception"]:
+        exc = record["exception"]
+        entry["exception"] = "".join(traceback.format_exception(exc.type, exc.value, exc.traceback))
+    return json.dumps(entry, default=str) + "\n"
+
+class BoundedAsyncSink:
+    """
+    loguru sink that only enqueues the record; rendering and writes happen on a writer
+    thread. The queue is bounded: on overflow the record is dropped and counted.
+    """
+    def __init__(self, outputs: List[TextIO], render=render_text, max_size: int = 10000):
+        self.outputs = outputs
+        self.render = render
+        self.max_size = max_size
+        self.dropped = 0
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def __call__(self, message):
+        if len(self._queue) >= self.max_size:
+            self.dropped += 1
+            from .metrics import LOG_RECORDS_DROPPED
+            LOG_RECORDS_DROPPED.inc()
+            return
+        self._queue.append(message.record)
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            self._drain()
+
+    def _drain(self):
+        queue = self._queue
+        if not queue:
+            return
+        chunks = []
+        while queue:
+            record = queue.popleft()
+            try:
+                chunks.append(self.render(record))
+            except Exception as e:
+                chunks.append(f"Log record could not be rendered: {e}\n")
+        text = "".join(chunks)
+        for output in self.outputs:
+            try:
+                output.write(text)
+                output.flush()
+            except Exception:
+                pass
+
+    def stop(self):
+        self._stopped = True
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        self._drain()
+
+class _Muted:
+    """Stand-in for a rate-limited logger call that is dropped (chaining, e.g. .bind(), stays muted)."""
+    def __getattr__(self, _name):
+        return self._noop
+
+    def _noop(self, *_args, **_kwargs):
+        return self
+
+_MUTED = _Muted()
+
+class LogLimiter:
+    """At most `burst` records per key per `interval` seconds; the rest are counted and reported with the next window."""
+    def __init__(self, interval: float = 10.0, burst: int = 5):
+        self.interval = interval
+        self.burst = burst
+        self._windows: Dict[str, List[float]] = {}  # key -> [window start, emitted, suppressed]
+
+    def __call__(self, key: str):
+        now = time.monotonic()
+        window = self._windows.get(key)
+        if window is None or now - window[0] >= self.interval:
+            suppressed = int(window[2]) if window else 0
+            self._windows[key] = [now, 1, 0]
+            return logger.bind(suppressed=suppressed) if suppressed else logger
+        if window[1] < self.burst:
+            window[1] += 1
+            return logger
+        window[2] += 1
+        return _MUTED
+
+limited = LogLimiter(interval=settings.LOG_LIMIT_INTERVAL, burst=settings.LOG_LIMIT_BURST)
+
+_current_span = None
+
+def _add_trace_id(record):
+    global _current_span
+    if _current_span is None:
+        from .tracing import current_span as _current_span
+    span = _current_span()
+    if span is not None:
+        record["extra"]["trace_id"] = span.trace_id
+
+sink: Optional[BoundedAsyncSink] = None
 
 def setup_logging():
+    global sink
     # Remove default handler
     logger.remove()
-    
-    # Add custom handler with formatting
+    if sink:
+        sink.stop()
+
+    outputs: List[TextIO] = [sys.stdout]
+    if settings.LOG_FILE:
+        outputs.append(RotatingFile(settings.LOG_FILE, max_bytes=settings.LOG_FILE_MAX_MB * 1024 * 1024))
+    sink = BoundedAsyncSink(
+        outputs,
+        render=render_json if settings.LOG_FORMAT == "json" else render_text,
+        max_size=settings.LOG_QUEUE_SIZE
+    )
+
+    # Module prefix -> minimum level; the handler level is the lowest of them so loguru's
+    # global check still short-circuits calls below every configured level.
+    levels = {"": settings.LOG_LEVEL, **settings.LOG_LEVELS}
+    logger.configure(patcher=_add_trace_id)
     logger.add(
-        sys.stdout,
-        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-        level="DEBUG",
-        enqueue=True
+        sink,
+        format="{message}",
+        level=min(logger.level(level).no for level in levels.values()),
+        filter=levels,
+        catch=True
     )
-    
-    # Optional: Log to file with rotation for production debugging
-    # Log to file for debugging
-    logger.add("logs/app.log", rotation="500 MB", retention="10 days", compression="zip", level="DEBUG")
 
 setup_logging()
+atexit.register(lambda: sink and sink.stop())
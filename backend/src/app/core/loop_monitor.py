@@ -0,0 +1,98 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+from .config import settings
+from .logger import logger, limited
+from .metrics import LOOP_LAG, LOOP_STALLS, LOOP_STALL_SECONDS
+
+class LoopMonitor:
+    """
+    Measures event-loop lag and reports stalls.
+
+    A task on the loop sleeps `interval` and records how late it woke up (LOOP_LAG).
+    It also stamps a heartbeat that a watchdog thread checks: when the heartbeat is older
+    than `threshold`, the loop is stuck in synchronous code (a blocking Supabase call,
+    a long CPU burst) and the watchdog logs the loop thread's stack
+    while the stall is still in progress. One report per stall.
+    """
+    def __init__(self, interval: float = 0.1, threshold: float = 0.25):
+        self.interval = interval
+        self.threshold = threshold
+        self.stalls = 0
+        self.last_stall: Optional[dict] = None
+        self._beat = time.monotonic()
+        self._reported_beat: Optional[float] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._loop = asyncio.get_running_loop()
+            self._loop_thread = threading.get_ident()
+            self._beat = time.monotonic()
+            self._stopped.clear()
+            self._task = asyncio.create_task(self._run())
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+            logger.info(f"Loop monitor started (interval {self.interval}s, stall threshold {self.threshold}s).")
+
+    async def stop(self):
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    async def _run(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            LOOP_LAG.observe(lag)
+            if lag >= self.threshold:
+                LOOP_STALLS.inc()
+                LOOP_STALL_SECONDS.observe(lag)
+            self._beat = now
+
+    def _watch(self):
+        while not self._stopped.wait(min(self.interval, self.threshold) / 2):
+            beat = self._beat
+            blocked = time.monotonic() - beat - self.interval
+            if blocked >= self.threshold and self._reported_beat != beat:
+                self._reported_beat = beat
+                self._report(blocked)
+
+    def _report(self, blocked: float):
+        # Only the loop thread's stack is read; the running task isn't reachable from here without private asyncio state
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is not None:
+            stack = "".join(traceback.format_stack(frame))
+            where = f"{frame.f_code.co_name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno})"
+        else:
+            stack, where = "<unavailable>", "<unknown>"
+        self.stalls += 1
+        self.last_stall = {"blocked_ms": round(blocked * 1000, 1), "where": where, "stack": stack}
+        limited("loop.stall").warning("Event loop blocked for {}ms+ in {}\n{}", round(blocked * 1000), where, stack.rstrip())
+
+loop_monitor = LoopMonitor(interval=settings.LOOP_MONITOR_INTERVAL, threshold=settings.LOOP_STALL_THRESHOLD)
+
+def start_loop_monitor():
+    if settings.LOOP_MONITOR_INTERVAL > 0:
+        loop_monitor.start()
+
+async def stop_loop_monitor():
+    await loop_monitor.stop()
@@ -0,0 +1,104 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, List
+from .config import settings
+from .logger import logger
+from .metrics import SCHEDULER_LATENCY, timed
+
+_maintenance_lock = asyncio.Lock()
+
+def _rpc(name: str, params: Dict[str, Any]) -> Any:
+    from .database import get_supabase
+    res = get_supabase().rpc(name, params).execute()
+    return res.data if res else None
+
+async def _call(name: str, params: Dict[str, Any]) -> Any:
+    # supabase-py is synchronous; keep the event loop free while Postgres works
+    return await asyncio.to_thread(_rpc, name, params)
+
+async def _drain(step: Callable, max_batches: int, report) -> None:
+    """Call step() until it reports a short batch or the batch budget is spent."""
+    for _ in range(max_batches):
+        report.batches += 1
+        if not await step():
+            break
+
+async def run_maintenance(
+    batch_size: int = None,
+    max_batches: int = None
+):
+    """
+    Bounded bulk cleanup of stale games, orphaned rows and old chats via server-side RPCs.
+    Deleted rooms are evicted from Redis and memory in the same pass; rooms any worker has
+    seen a player in within MAINTENANCE_ACTIVE_GRACE_MINUTES are excluded, however old they are.
+    Returns a MaintenanceReport; concurrent runs are skipped rather than queued.
+    """
+    from src.app.api.schemas import MaintenanceReport
+    from src.app.games.deception.manager import game_manager
+    from .presence import presence
+
+    batch_size = batch_size or settings.MAINTENANCE_BATCH_SIZE
+    max_batches = max_batches or settings.MAINTENANCE_MAX_BATCHES
+    report = MaintenanceReport()
+
+    if _maintenance_lock.locked():
+        report.skipped = True
+        return report
+
+    started = time.perf_counter()
+    removed: Dict[str, int] = {"games": 0, "players": 0, "game_cards": 0, "game_tiles": 0, "game_chats": 0}
+
+    async with _maintenance_lock:
+        # 1. Stale lobbies, abandoned rooms and expired games
+        live_rooms = await presence.active_rooms(settings.MAINTENANCE_ACTIVE_GRACE_MINUTES * 60)
+
+        async def stale_games() -> bool:
+            if live_rooms is None:
+                raise RuntimeError("shared presence unavailable, cannot tell which rooms are in use")
+            rows = await _call("cleanup_stale_lobbies", {
+                "p_batch_size": batch_size,
+                "p_lobby_max_age": f"{settings.MAINTENANCE_LOBBY_MAX_AGE_MINUTES} minutes",
+                "p_game_max_age": f"{settings.MAINTENANCE_GAME_MAX_AGE_HOURS} hours",
+                "p_exclude": live_rooms
+            }) or []
+            room_ids: List[str] = [str(r["game_id"]) for r in rows]
+            removed["games"] += len(room_ids)
+            if room_ids:
+                report.evicted_rooms += sum(1 for room_id in room_ids if game_manager.resident(room_id))
+                await game_manager.purge_rooms(room_ids)
+            return len(room_ids) >= batch_size
+
+        # 2. Orphaned players / game_cards / game_tiles
+        async def orphans() -> bool:
+            rows = await _call("cleanup_orphaned_rows", {"p_batch_size": batch_size}) or []
+            counts = rows[0] if rows else {}
+            removed["players"] += counts.get("players_removed", 0)
+            removed["game_cards"] += counts.get("game_cards_removed", 0)
+            removed["game_tiles"] += counts.get("game_tiles_removed", 0)
+            return max(counts.values(), default=0) >= batch_size
+
+        # 3. Old chats
+        async def chats() -> bool:
+            count = await _call("cleanup_old_chats", {
+                "p_batch_size": batch_size,
+                "p_max_age": f"{settings.MAINTENANCE_CHAT_MAX_AGE_HOURS} hours"
+            }) or 0
+            removed["game_chats"] += count
+            return count >= batch_size
+
+        for name, step in (("stale_games", stale_games), ("orphans", orphans), ("chats", chats)):
+            try:
+                await _drain(step, max_batches, report)
+            except Exception as e:
+                logger.error(f"Maintenance step {name} failed: {e}")
+                report.errors.append(f"{name}: {e}")
+
+    report.rows_removed = removed
+    report.duration_ms = round((time.perf_counter() - started) * 1000, 2)
+    logger.info(f"Maintenance: removed {removed}, evicted {report.evicted_rooms} rooms in {report.duration_ms}ms ({report.batches} batches)")
+    return report
+
+@timed(SCHEDULER_LATENCY, ("maintenance",))
+async def scheduled_maintenance():
+    """Scheduler entry point."""
+    await run_maintenance()
@@ -0,0 +1,476 @@
+import copy
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .room_codes import ROOM_CODE_ALPHABET, ROOM_CODE_LENGTH
+
+# Foreign keys used for embedded selects and cascades: (child table, column) -> parent table
+FOREIGN_KEYS: Dict[Tuple[str, str], str] = {
+    ("players", "game_id"): "games",
+    ("game_cards", "game_id"): "games",
+    ("game_cards", "player_id"): "players",
+    ("game_cards", "card_id"): "library_cards",
+    ("game_tiles", "game_id"): "games",
+    ("game_tiles", "tile_id"): "library_tiles",
+    ("game_chats", "game_id"): "games",
+    ("game_chats", "player_id"): "players",
+}
+# Mirrors the ON DELETE CASCADE constraints in the migrations
+CASCADES = {("players", "game_id"), ("game_cards", "game_id"), ("game_cards", "player_id"),
+            ("game_tiles", "game_id"), ("game_chats", "game_id"), ("game_chats", "player_id")}
+# Unique constraints besides the primary key: table -> {constraint name: columns}
+UNIQUE_KEYS: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    "games": {"games_room_code_key": ("room_code",)},
+    "players": {"unique_player_in_game": ("game_id", "user_id")},
+}
+
+class APIError(Exception):
+    """Same shape as postgrest.exceptions.APIError: callers read .message (and .code)."""
+    def __init__(self, message: str, code: Optional[str] = None):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+
+class MemoryResponse:
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def _timestamp(value: Any) -> datetime:
+    """A timestamptz column value as an aware datetime (naive values are taken as UTC)."""
+    stamp = value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+    return stamp if stamp.tzinfo else stamp.replace(tzinfo=timezone.utc)
+
+def _interval(value: Any) -> timedelta:
+    """An INTERVAL parameter: a timedelta or the "<n> <unit>" strings the backend sends."""
+    if isinstance(value, timedelta):
+        return value
+    amount, unit = str(value).split()
+    unit = unit.lower().rstrip("s")
+    return timedelta(**{f"{unit}s": float(amount)})
+
+def _matches(value: Any, expected: Any) -> bool:
+    # PostgREST filters arrive as strings; compare loosely so UUIDs and ints match either way
+    return value == expected or (value is not None and expected is not None and str(value) == str(expected))
+
+def _split_columns(columns: str) -> List[str]:
+    """Split a select list on top-level commas: "id, games(id, players(count))" -> ["id", "games(...)"]."""
+    parts, depth, current = [], 0, ""
+    for ch in columns:
+        if ch == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+            continue
+        depth += ch == "("
+        depth -= ch == ")"
+        current += ch
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+class MemoryQuery:
+    """
+    The subset of the postgrest-py request builder this project uses: select (with
+    column lists and embedded resources/counts), insert, upsert, update, delete,
+    eq/neq/in_/gt/gte/lt/lte filters, order, limit and range.
+    """
+    def __init__(self, db: "MemorySupabase", table: str):
+        self.db = db
+        self.table = table
+        self.verb = "select"
+        self.columns = "*"
+        self.count: Optional[str] = None
+        self.payload: Any = None
+        self.on_conflict = "id"
+        self.filters: List[Callable[[Dict[str, Any]], bool]] = []
+        self.orders: List[Tuple[str, bool]] = []
+        self.window: Optional[Tuple[int, int]] = None
+
+    # --- Verbs ---
+
+    def select(self, *columns: str, count: Optional[str] = None):
+        self.verb = "select"
+        self.columns = ",".join(columns) or "*"
+        self.count = count
+        return self
+
+    def insert(self, json: Any, **_kwargs):
+        self.verb, self.payload = "insert", json
+        return self
+
+    def upsert(self, json: Any, on_conflict: str = "id", **_kwargs):
+        self.verb, self.payload, self.on_conflict = "upsert", json, on_conflict
+        return self
+
+    def update(self, json: Dict[str, Any], **_kwargs):
+        self.verb, self.payload = "update", json
+        return self
+
+    def delete(self, **_kwargs):
+        self.verb = "delete"
+        return self
+
+    # --- Filters and modifiers ---
+
+    def eq(self, column: str, value: Any):
+        self.filters.append(lambda row: _matches(row.get(column), value))
+        return self
+
+    def neq(self, column: str, value: Any):
+        self.filters.append(lambda row: not _matches(row.get(column), value))
+        return self
+
+    def in_(self, column: str, values: List[Any]):
+        wanted = {str(v) for v in values}
+        self.filters.append(lambda row: str(row.get(column)) in wanted)
+        return self
+
+    def gt(self, column: str, value: Any):
+        self.filters.append(lambda row: row.get(column) is not None and row[column] > value)
+        return self
+
+    def gte(self, column: str, value: Any):
+        self.filters.append(lambda row: row.get(column) is not None and row[column] >= value)
+        return self
+
+    def lt(self, column: str, value: Any):
+        self.filters.append(lambda row: row.get(column) is not None and row[column] < value)
+        return self
+
+    def lte(self, column: str, value: Any):
+        self.filters.append(lambda row: row.get(column) is not None and row[column] <= value)
+        return self
+
+    def order(self, column: str, desc: bool = False, **_kwargs):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, size: int, **_kwargs):
+        start = self.window[0] if self.window else 0
+        self.window = (start, start + size)
+        return self
+
+    def range(self, start: int, end: int, **_kwargs):
+        self.window = (start, end + 1)
+        return self
+
+    # --- Execution ---
+
+    def execute(self) -> MemoryResponse:
+        self.db.simulate_latency()
+        with self.db.lock:
+            rows = self.db.tables.setdefault(self.table, [])
+            match = [row for row in rows if all(f(row) for f in self.filters)]
+            handler = getattr(self, f"_{self.verb}")
+            return handler(rows, match)
+
+    def _select(self, rows, match):
+        for column, desc in reversed(self.orders):
+            match.sort(key=lambda r: (r.get(column) is None, r.get(column)), reverse=desc)
+        total = len(match)
+        if self.window:
+            match = match[self.window[0]:self.window[1]]
+        data = [self.db.project(self.table, row, self.columns) for row in match]
+        return MemoryResponse(data, count=total if self.count else None)
+
+    def _insert(self, rows, match):
+        new = [self.db.with_defaults(self.table, row) for row in self._payload_rows()]
+        for row in new:
+            self.db.check_unique(self.table, row)
+        rows.extend(new)
+        return MemoryResponse(copy.deepcopy(new))
+
+    def _upsert(self, rows, match):
+        keys = [k.strip() for k in self.on_conflict.split(",")]
+        result = []
+        for row in self._payload_rows():
+            existing = next((r for r in rows if all(_matches(r.get(k), row.get(k)) for k in keys)), None)
+            if existing is not None:
+                existing.update(copy.deepcopy(row))
+                result.append(existing)
+            else:
+                row = self.db.with_defaults(self.table, row)
+                self.db.check_unique(self.table, row)
+                rows.append(row)
+                result.append(row)
+        return MemoryResponse(copy.deepcopy(result))
+
+    def _update(self, rows, match):
+        for row in match:
+            row.update(copy.deepcopy(self.payload))
+        return MemoryResponse(copy.deepcopy(match))
+
+    def _delete(self, rows, match):
+        self.db.delete_rows(self.table, match)
+        return MemoryResponse(copy.deepcopy(match))
+
+    def _payload_rows(self) -> List[Dict[str, Any]]:
+        return self.payload if isinstance(self.payload, list) else [self.payload]
+
+class MemoryRpc:
+    def __init__(self, db: "MemorySupabase", fn: Callable, params: Dict[str, Any]):
+        self.db, self.fn, self.params = db, fn, params
+
+    def execute(self) -> MemoryResponse:
+        self.db.simulate_latency()
+        # RPCs run atomically, like a Postgres function call
+        with self.db.lock:
+            return MemoryResponse(self.fn(self.db, **self.params))
+
+class MemoryBucket:
+    def __init__(self, storage: "MemoryStorage", bucket: str):
+        self.storage, self.bucket = storage, bucket
+
+    def upload(self, path: str, file: Any, file_options: Optional[Dict[str, Any]] = None):
+        if not isinstance(file, (bytes, bytearray)):
+            with open(file, "rb") as f:
+                file = f.read()
+        objects = self.storage.objects.setdefault(self.bucket, {})
+        if path in objects and str((file_options or {}).get("upsert", "false")).lower() != "true":
+            raise APIError("The resource already exists", code="409")
+        objects[path] = bytes(file)
+        return MemoryResponse({"Key": f"{self.bucket}/{path}"})
+
+    def download(self, path: str) -> bytes:
+        try:
+            return self.storage.objects.get(self.bucket, {})[path]
+        except KeyError:
+            raise APIError("Object not found", code="404")
+
+    def remove(self, paths: List[str]):
+        objects = self.storage.objects.get(self.bucket, {})
+        return [{"name": p} for p in paths if objects.pop(p, None) is not None]
+
+    def list(self, path: str = "", *_args, **_kwargs):
+        prefix = f"{path.rstrip('/')}/" if path else ""
+        return [{"name": p[len(prefix):]} for p in sorted(self.storage.objects.get(self.bucket, {})) if p.startswith(prefix)]
+
+    def get_public_url(self, path: str, *_args, **_kwargs) -> str:
+        return f"memory://storage/v1/object/public/{self.bucket}/{path}"
+
+class MemoryStorage:
+    def __init__(self):
+        self.objects: Dict[str, Dict[str, bytes]] = {}
+
+    def from_(self, bucket: str) -> MemoryBucket:
+        return MemoryBucket(self, bucket)
+
+    def create_bucket(self, id: str, *_args, **_kwargs):
+        self.objects.setdefault(id, {})
+        return {"name": id}
+
+    def get_bucket(self, id: str):
+        if id not in self.objects:
+            raise APIError("Bucket not found", code="404")
+        return {"name": id}
+
+class MemorySupabase:
+    """
+    In-process, PostgREST-compatible stand-in for the Supabase client, selected with
+    SUPABASE_BACKEND=memory. Tables are lists of dicts behind one lock (calls arrive
+    from worker threads via asyncio.to_thread), RPCs are Python functions registered
+    by name, and every call can sleep for an injected latency to mimic the network.
+    """
+    def __init__(self, latency: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.lock = threading.RLock()
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.storage = MemoryStorage()
+        self.rpcs: Dict[str, Callable] = dict(BUILTIN_RPCS)
+        self.random = random.Random(seed)
+
+    def table(self, name: str) -> MemoryQuery:
+        return MemoryQuery(self, name)
+
+    def from_(self, name: str) -> MemoryQuery:
+        return MemoryQuery(self, name)
+
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None) -> MemoryRpc:
+        fn = self.rpcs.get(name)
+        if fn is None:
+            raise APIError(f"Could not find the function public.{name} in the schema cache", code="PGRST202")
+        return MemoryRpc(self, fn, params or {})
+
+    def register_rpc(self, name: str, fn: Callable):
+        """fn(db, **params) runs under the table lock and returns the RPC's data."""
+        self.rpcs[name] = fn
+
+    def seed(self, table: str, rows: List[Dict[str, Any]]):
+        with self.lock:
+            self.tables.setdefault(table, []).extend(self.with_defaults(table, row) for row in rows)
+
+    def simulate_latency(self):
+        # supabase-py is synchronous, so a blocking sleep is the faithful model of a round trip
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    # --- Row helpers (called with the lock held) ---
+
+    def with_defaults(self, table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        return {"id": str(uuid.uuid4()), "created_at": _now(), **copy.deepcopy(row)}
+
+    def check_unique(self, table: str, row: Dict[str, Any]):
+        existing = self.tables.get(table, [])
+        constraints = {f"{table}_pkey": ("id",), **UNIQUE_KEYS.get(table, {})}
+        for name, columns in constraints.items():
+            # Like Postgres, rows with a NULL in the key never conflict
+            if any(row.get(c) is None for c in columns):
+                continue
+            if any(all(_matches(r.get(c), row[c]) for c in columns) for r in existing):
+                raise APIError(f'duplicate key value violates unique constraint "{name}"', code="23505")
+
+    def delete_rows(self, table: str, doomed: List[Dict[str, Any]]):
+        if not doomed:
+            return
+        ids = {str(r.get("id")) for r in doomed}
+        self.tables[table] = [r for r in self.tables.get(table, []) if str(r.get("id")) not in ids]
+        for (child, column), parent in FOREIGN_KEYS.items():
+            if parent == table and (child, column) in CASCADES:
+                self.delete_rows(child, [r for r in self.tables.get(child, []) if str(r.get(column)) in ids])
+
+    def project(self, table: str, row: Dict[str, Any], columns: str) -> Dict[str, Any]:
+        """Apply a select list, resolving embedded resources like players(count) or games(id, name)."""
+        result: Dict[str, Any] = {}
+        for column in _split_columns(columns):
+            if "(" not in column:
+                if column == "*":
+                    result.update(copy.deepcopy(row))
+                else:
+                    result[column] = copy.deepcopy(row.get(column))
+                continue
+
+            relation, inner = column[:-1].split("(", 1)
+            relation = relation.strip()
+            parent_fk = next((col for (child, col), parent in FOREIGN_KEYS.items() if child == table and parent == relation), None)
+            if parent_fk:
+                # Many-to-one: embed the parent row as an object
+                parent = next((r for r in self.tables.get(relation, []) if _matches(r.get("id"), row.get(parent_fk))), None)
+                result[relation] = self.project(relation, parent, inner) if parent else None
+                continue
+
+            child_fk = next((col for (child, col), parent in FOREIGN_KEYS.items() if child == relation and parent == table), None)
+            if child_fk is None:
+                raise APIError(f"Could not find a relationship between '{table}' and '{relation}'", code="PGRST200")
+            children = [r for r in self.tables.get(relation, []) if _matches(r.get(child_fk), row.get("id"))]
+            if inner.strip() == "count":
+                result[relation] = [{"count": len(children)}]
+            else:
+                result[relation] = [self.project(relation, child, inner) for child in children]
+        return result
+
+# --- Built-in RPCs (Python ports of the SQL functions in supabase/migrations) ---
+
+def _rpc_create_game(db: MemorySupabase, p_host_id, p_host_name, p_name, p_is_public=True, p_room_code=None, p_game_type="deception"):
+    games = db.tables.setdefault("games", [])
+    code = p_room_code
+    for _ in range(10):
+        if code and not any(g["room_code"] == code for g in games):
+            break
+        code = "".join(db.random.choice(ROOM_CODE_ALPHABET) for _ in range(ROOM_CODE_LENGTH))
+    else:
+        raise APIError("code_gen_failed", code="P0001")
+
+    game = db.with_defaults("games", {
+        "room_code": code, "name": p_name, "host_id": p_host_id, "status": "LOBBY",
+        "is_public": p_is_public, "game_type": p_game_type, "metadata": {}
+    })
+    player = db.with_defaults("players", {
+        "game_id": game["id"], "user_id": p_host_id, "name": p_host_name, "is_admin": True, "metadata": {"seat_index": 0}
+    })
+    games.append(game)
+    db.tables.setdefault("players", []).append(player)
+    return {"game_id": game["id"], "room_code": code, "player_id": player["id"]}
+
+def _rpc_join_game(db: MemorySupabase, p_room_code, p_user_id, p_name, p_is_site_admin=False, p_max_players=12):
+    game = next((g for g in db.tables.get("games", []) if g["room_code"] == p_room_code.upper()), None)
+    if game is None:
+        raise APIError("room_not_found", code="P0002")
+
+    is_admin = game["host_id"] == p_user_id or p_is_site_admin
+    for profile in db.tables.get("profiles", []):
+        if profile.get("id") == p_user_id:
+            profile["display_name"] = p_name
+
+    players = [p for p in db.tables.setdefault("players", []) if p["game_id"] == game["id"]]
+    player = next((p for p in players if p.get("user_id") == p_user_id), None)
+    is_new = player is None
+    if is_new:
+        if game["status"] != "LOBBY":
+            raise APIError("in_progress", code="P0001")
+        if len(players) >= p_max_players:
+            raise APIError("room_full", code="P0001")
+        player = db.with_defaults("players", {
+            "game_id": game["id"], "user_id": p_user_id, "metadata": {"seat_index": db.random.randint(0, 1000)}
+        })
+        db.check_unique("players", player)
+        db.tables["players"].append(player)
+    player.update(name=p_name, is_admin=is_admin)
+
+    return {
+        "game_id": game["id"], "room_code": game["room_code"], "host_id": game["host_id"], "status": game["status"],
+        "player_id": player["id"], "is_admin": is_admin, "is_new": is_new
+    }
+
+def _rpc_cleanup_stale_lobbies(db: MemorySupabase, p_batch_size=500, p_lobby_max_age="60 minutes",
+                               p_game_max_age="24 hours", p_exclude=()):
+    now = datetime.now(timezone.utc)
+    lobby_cutoff, game_cutoff = now - _interval(p_lobby_max_age), now - _interval(p_game_max_age)
+    excluded = {str(room_id) for room_id in p_exclude or ()}
+
+    def stale(game):
+        created = _timestamp(game["created_at"])
+        return ((game.get("status") == "LOBBY" and created < lobby_cutoff)
+                or game.get("status") == "ABANDONED"
+                or created < game_cutoff)
+
+    doomed = [g for g in db.tables.get("games", []) if stale(g) and str(g["id"]) not in excluded]
+    doomed = sorted(doomed, key=lambda g: _timestamp(g["created_at"]))[:p_batch_size]
+    db.delete_rows("games", doomed)
+    return [{"game_id": g["id"]} for g in doomed]
+
+def _rpc_cleanup_orphaned_rows(db: MemorySupabase, p_batch_size=5000):
+    counts = {}
+    for table, label, orphaned in (
+        ("players", "players_removed", lambda r: r.get("game_id") is None),
+        ("game_cards", "game_cards_removed", lambda r: r.get("game_id") is None or r.get("player_id") is None),
+        ("game_tiles", "game_tiles_removed", lambda r: r.get("game_id") is None),
+    ):
+        doomed = [r for r in db.tables.get(table, []) if orphaned(r)][:p_batch_size]
+        db.delete_rows(table, doomed)
+        counts[label] = len(doomed)
+    return [counts]
+
+def _rpc_cleanup_old_chats(db: MemorySupabase, p_batch_size=5000, p_max_age="1 day"):
+    cutoff = datetime.now(timezone.utc) - _interval(p_max_age)
+    doomed = [c for c in db.tables.get("game_chats", []) if _timestamp(c["created_at"]) < cutoff]
+    doomed = sorted(doomed, key=lambda c: _timestamp(c["created_at"]))[:p_batch_size]
+    db.delete_rows("game_chats", doomed)
+    return len(doomed)
+
+BUILTIN_RPCS: Dict[str, Callable] = {
+    "create_game": _rpc_create_game,
+    "join_game": _rpc_join_game,
+    "cleanup_stale_lobbies": _rpc_cleanup_stale_lobbies,
+    "cleanup_orphaned_rows": _rpc_cleanup_orphaned_rows,
+    "cleanup_old_chats": _rpc_cleanup_old_chats,
+}
+
+def seed_library(db: MemorySupabase, means: int = 60, clues: int = 60, scenes: int = 20):
+    """A synthetic card/tile library big enough for 16-player games (load tests, benchmarks)."""
+    db.seed("library_cards", [
+        {"id": f"means-{i}", "type": "MEANS", "game_type": "deception", "content": f"Means {i}", "image_url": None} for i in range(means)
+    ] + [
+        {"id": f"clue-{i}", "type": "CLUE", "game_type": "deception", "content": f"Clue {i}", "image_url": None} for i in range(clues)
+    ])
+    options = [f"Option {i}" for i in range(6)]
+    db.seed("library_tiles", [
+        {"id": f"{tile_type.lower()}-{i}", "name": f"{tile_type.title()} {i}", "type": tile_type, "options": options}
+        for tile_type, count in (("CAUSE_OF_DEATH", 4), ("LOCATION", 4), ("SCENE", scenes))
+        for i in range(count)
+    ])
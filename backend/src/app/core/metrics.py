@@ -0,0 +1,357 @@
+"""
+Process metrics in the Prometheus text format (served at GET /metrics).
+
+Kept dependency-free and cheap on the hot path: a metric child is looked up by its
+label tuple with a plain dict get, and recording is a few integer/float additions
+(plus a bisect over fixed buckets for histograms). No locks are taken once a child
+exists; only creating a new label set locks. The event loop is single-threaded, and
+the worker threads that run Supabase calls can at worst lose an increment under a
+GIL switch, which is acceptable for monitoring data.
+"""
+import asyncio
+import functools
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+# Seconds: 100us .. 10s
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Bytes: 256B .. 4MB
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        if not self.label_names:
+            self._default = self._child(())
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            child = self._child(tuple(str(v) for v in values))
+        return child
+
+    def _child(self, values: Tuple[str, ...]):
+        with self._lock:
+            child = self._children.get(values)
+            if child is None:
+                child = self._children[values] = self._new_child()
+            return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in list(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{_format_labels(self.label_names, values)} {_format_value(child.value)}"]
+
+class _CounterChild(_Value):
+    __slots__ = ()
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._default.set(value)
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._default.inc(-amount)
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{_format_labels(self.label_names, values)} {_format_value(child.value)}"]
+
+class _GaugeChild(_Value):
+    __slots__ = ()
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labels)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def _render_child(self, values, child):
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (math.inf,), child.counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_names, values, le)} {cumulative}")
+        labels = _format_labels(self.label_names, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def time(self):
+        return _Timer(self)
+
+class _Timer:
+    __slots__ = ("child", "start")
+
+    def __init__(self, child: _HistogramChild):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_exc):
+        self.child.observe(time.perf_counter() - self.start)
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+        self.collectors: List[Callable[[], Iterable[_Metric]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[_Metric]]):
+        """collector() is called at scrape time and returns freshly built metrics (for state owned elsewhere)."""
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            try:
+                for metric in collector():
+                    lines.extend(metric.render())
+            except Exception as e:
+                from .logger import logger
+                logger.error(f"Metrics collector failed: {e}")
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+def timed(histogram: Histogram, labels: Union[Tuple[str, ...], Callable[..., Tuple[str, ...]], None] = None):
+    """
+    Decorator recording the call duration into `histogram`.
+    `labels` is either fixed label values, or a callable picking them from the call's arguments.
+    """
+    fixed = histogram._default if labels is None else histogram.labels(*labels) if isinstance(labels, tuple) else None
+
+    def decorate(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                child = fixed or histogram.labels(*labels(*args, **kwargs))
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    child.observe(time.perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            child = fixed or histogram.labels(*labels(*args, **kwargs))
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+# --- Application metrics ---
+
+EVENT_LATENCY = registry.histogram("deception_event_seconds", "handle_event duration by event type", ["event"])
+STATE_BUILD_LATENCY = registry.histogram("deception_state_build_seconds", "to_game_state duration (one viewer projection)")
+BROADCAST_LATENCY = registry.histogram("deception_broadcast_seconds", "broadcast_state duration (all players of a room)")
+BROADCAST_BYTES = registry.histogram("deception_broadcast_bytes", "Encoded bytes sent per broadcast_state", buckets=SIZE_BUCKETS)
+WS_SENT_BYTES = registry.counter("ws_sent_bytes_total", "Bytes written to WebSockets", ["kind"])
+
+SUPABASE_LATENCY = registry.histogram("supabase_request_seconds", "Supabase call latency by table (or RPC) and operation", ["table", "op"])
+SUPABASE_ERRORS = registry.counter("supabase_errors_total", "Supabase calls that raised", ["table", "op"])
+
+REDIS_LATENCY = registry.histogram("redis_state_seconds", "RedisStateManager call latency", ["op"])
+REDIS_PAYLOAD_BYTES = registry.histogram("redis_state_bytes", "Room state payload size in Redis", ["op"], buckets=SIZE_BUCKETS)
+
+LOG_RECORDS_DROPPED = registry.counter("log_records_dropped_total", "Log records dropped because the writer queue was full")
+LOOP_LAG = registry.histogram("event_loop_lag_seconds", "How late the loop monitor's timer fired")
+LOOP_STALLS = registry.counter("event_loop_stalls_total", "Loop lag samples above LOOP_STALL_THRESHOLD")
+LOOP_STALL_SECONDS = registry.histogram("event_loop_stall_seconds", "Duration of loop stalls above LOOP_STALL_THRESHOLD")
+RATE_LIMITED = registry.counter("http_rate_limited_total", "Requests rejected by the rate limiter")
+SCHEDULER_LATENCY = registry.histogram("scheduler_job_seconds", "Scheduled job run time", ["job"])
+
+# --- Supabase instrumentation ---
+
+SUPABASE_VERBS = {"select", "insert", "update", "upsert", "delete"}
+
+class InstrumentedQuery:
+    """Proxy over a supabase-py request builder; times (and traces) execute() per table and operation."""
+    __slots__ = ("_builder", "_table", "_op")
+
+    def __init__(self, builder: Any, table: str, op: str):
+        self._builder = builder
+        self._table = table
+        self._op = op
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            # e.g. the `not_` property, which returns the builder itself
+            return InstrumentedQuery(attr, self._table, self._op) if hasattr(attr, "execute") else attr
+        op = name if name in SUPABASE_VERBS else self._op
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            return InstrumentedQuery(result, self._table, op) if hasattr(result, "execute") else result
+        return call
+
+    def execute(self, *args, **kwargs):
+        from .tracing import tracer
+
+        start = time.perf_counter()
+        try:
+            with tracer.span("supabase", table=self._table, op=self._op):
+                return self._builder.execute(*args, **kwargs)
+        except Exception:
+            SUPABASE_ERRORS.labels(self._table, self._op).inc()
+            raise
+        finally:
+            SUPABASE_LATENCY.labels(self._table, self._op).observe(time.perf_counter() - start)
+
+class InstrumentedSupabase:
+    """Wraps a Supabase client (remote or in-memory); everything but table/from_/rpc passes through."""
+    def __init__(self, client: Any):
+        self.client = client
+
+    def table(self, name: str) -> InstrumentedQuery:
+        return InstrumentedQuery(self.client.table(name), name, "select")
+
+    def from_(self, name: str) -> InstrumentedQuery:
+        return InstrumentedQuery(self.client.from_(name), name, "select")
+
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None, *args, **kwargs) -> InstrumentedQuery:
+        return InstrumentedQuery(self.client.rpc(name, params or {}, *args, **kwargs), name, "rpc")
+
+    def __getattr__(self, name: str):
+        return getattr(self.client, name)
+
+# --- Collectors for state owned by other modules ---
+
+ROOM_SIZE_BUCKETS = (1, 2, 4, 8, 12, 16, 32, 64, 128, 256, 512)
+
+def _connection_metrics() -> Iterable[_Metric]:
+    """
+    Open sockets, and their distribution over rooms. Rooms are not a label: with
+    thousands of them the series count would explode, so per-room counts are
+    reported as a histogram (one observation per room) built at scrape time.
+    """
+    from src.app.api.websocket import manager
+
+    connections = Gauge("ws_connections", "Open WebSocket connections", ["kind"])
+    rooms = Gauge("ws_rooms", "Rooms with at least one open WebSocket", ["kind"])
+    per_room = Histogram("ws_room_connections", "Open WebSocket connections per room", ["kind"], buckets=ROOM_SIZE_BUCKETS)
+    for kind, table in (("player", manager.active_connections), ("spectator", manager.spectators)):
+        sizes = [len(sockets) for sockets in list(table.values())]
+        connections.labels(kind).set(sum(sizes))
+        rooms.labels(kind).set(len(sizes))
+        child = per_room.labels(kind)
+        for size in sizes:
+            child.observe(size)
+    return [connections, rooms, per_room]
+
+def _room_metrics() -> Iterable[_Metric]:
+    from src.app.games.deception.manager import game_manager
+
+    resident = Gauge("deception_resident_rooms", "Rooms held in memory, live or compacted", ["form"])
+    resident.labels("live").set(len(game_manager.games))
+    resident.labels("compact").set(len(game_manager.compacted))
+    return [resident]
+
+registry.add_collector(_connection_metrics)
+registry.add_collector(_room_metrics)
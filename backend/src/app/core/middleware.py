@@ -1,6 +1,9 @@
 from fastapi import Request, HTTPException, status
 from fastapi.responses import JSONResponse
+from src.app.core.config import settings
 from src.app.core.logger import logger
+from src.app.core.metrics import RATE_LIMITED
+from src.app.core.tracing import tracer
 import time
 
 async def error_handling_middleware(request: Request, call_next):
@@ -19,11 +22,23 @@ async def error_handling_middleware(request: Request, call_next):
             content={"error": "Internal Server Error", "code": 500}
         )
 
+async def tracing_middleware(request: Request, call_next):
+    """Root span per HTTP request; joins the caller's trace when it sends a traceparent header."""
+    with tracer.start_trace("http", traceparent=request.headers.get("traceparent"), method=request.method, target=request.url.path) as span:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        span.set_attribute("route", getattr(route, "path", None))
+        span.set_attribute("status_code", response.status_code)
+        if span.traceparent:
+            response.headers["traceparent"] = span.traceparent
+        return response
+
 # Simple Rate Limiting (Memory based for now, could use Redis)
 rate_limit_store = {}
 
 async def rate_limit_middleware(request: Request, call_next):
-    if request.url.path.startswith("/api"):
+    limit = settings.RATE_LIMIT_PER_MINUTE
+    if limit and request.url.path.startswith("/api"):
         client_ip = request.client.host
         now = time.time()
         
@@ -33,7 +48,8 @@ async def rate_limit_middleware(request: Request, call_next):
         # Keep only requests from the last minute
         rate_limit_store[client_ip] = [t for t in rate_limit_store[client_ip] if now - t < 60]
         
-        if len(rate_limit_store[client_ip]) > 100: # 100 requests per minute
+        if len(rate_limit_store[client_ip]) > limit:
+            RATE_LIMITED.inc()
             return JSONResponse(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 content={"error": "Rate limit exceeded", "code": 429}
@@ -0,0 +1,314 @@
+import asyncio
+import json
+import time
+from typing import Dict, List, Optional, Set, Tuple
+from .config import settings
+from .logger import logger, limited
+from .redis import get_redis
+from .timers import DeadlineHeap
+
+# Close code sent to sockets that stopped answering heartbeats
+IDLE_CLOSE_CODE = 4008
+
+PresenceKey = Tuple[str, str]  # (room_id, user_id)
+
+class PresenceTracker:
+    """
+    Tracks which players are connected and when they were last heard from.
+
+    - touch() is O(1): it only records a timestamp.
+    - Each connection has a single entry in a deadline heap. When it comes due
+      the tracker either re-arms it (the client was seen recently) or reaps the
+      socket, so idle detection costs O(log n) per connection per timeout period.
+    - Redis writes and presence-change broadcasts are accumulated and flushed
+      once per PRESENCE_FLUSH_INTERVAL.
+    """
+    def __init__(self, heartbeat_interval: float = 15, idle_timeout: float = 45, flush_interval: float = 1.0):
+        self.heartbeat_interval = heartbeat_interval
+        self.idle_timeout = idle_timeout
+        self.flush_interval = flush_interval
+
+        self._last_seen: Dict[PresenceKey, float] = {}
+        self._rooms: Dict[str, Set[str]] = {}
+        self._room_activity: Dict[str, float] = {}
+        self._idle = DeadlineHeap()
+        self._reaped: Set[PresenceKey] = set()
+
+        # Pending batches
+        self._dirty: Dict[PresenceKey, float] = {}
+        self._changes: Dict[str, Dict[str, bool]] = {}
+
+        self._task: Optional[asyncio.Task] = None
+        self._next_heartbeat = 0.0
+
+    # --- Connection lifecycle ---
+
+    def connected(self, room_id: str, user_id: str):
+        now = time.time()
+        key = (room_id, user_id)
+        self._last_seen[key] = now
+        self._rooms.setdefault(room_id, set()).add(user_id)
+        self._room_activity[room_id] = now
+        self._idle.schedule(key, now + self.idle_timeout)
+        self._reaped.discard(key)
+        self._dirty[key] = now
+        self._changes.setdefault(room_id, {})[user_id] = True
+
+    def touch(self, room_id: str, user_id: str):
+        key = (room_id, user_id)
+        if key in self._last_seen:
+            now = time.time()
+            self._last_seen[key] = now
+            self._room_activity[room_id] = now
+            self._dirty[key] = now
+
+    def disconnected(self, room_id: str, user_id: str):
+        key = (room_id, user_id)
+        if self._last_seen.pop(key, None) is None:
+            return
+        self._idle.cancel(key)
+        self._dirty.pop(key, None)
+        members = self._rooms.get(room_id)
+        if members is not None:
+            members.discard(user_id)
+            if not members:
+                del self._rooms[room_id]
+        self._changes.setdefault(room_id, {})[user_id] = False
+
+    def mark_reaped(self, room_id: str, user_id: str):
+        """Flag a server-initiated close so the endpoint keeps the player's seat."""
+        self._reaped.add((room_id, user_id))
+
+    def was_reaped(self, room_id: str, user_id: str) -> bool:
+        """True (once) if the connection was closed by the idle reaper rather than the client."""
+        key = (room_id, user_id)
+        if key in self._reaped:
+            self._reaped.discard(key)
+            return True
+        return False
+
+    # --- Queries ---
+
+    def is_online(self, room_id: str, user_id: str) -> bool:
+        return (room_id, user_id) in self._last_seen
+
+    def online_count(self, room_id: str) -> int:
+        return len(self._rooms.get(room_id, ()))
+
+    def online_rooms(self) -> List[str]:
+        """Rooms with at least one connected player (this process only)."""
+        return list(self._rooms)
+
+    async def active_rooms(self, max_idle: float) -> Optional[List[str]]:
+        """
+        Rooms any worker has heard from within max_idle (the presence:rooms zset), plus the
+        rooms connected here. None when Redis is configured but cannot be read, since the
+        local view alone would miss players on other workers.
+        """
+        rooms = set(self._rooms)
+        client = get_redis()
+        if not client:
+            return list(rooms)
+        try:
+            rooms.update(await client.zrangebyscore("presence:rooms", time.time() - max_idle, "+inf"))
+        except Exception as e:
+            limited("presence.redis").error("Redis presence lookup error: {}", e)
+            return None
+        return list(rooms)
+
+    def last_activity(self, room_id: str) -> Optional[float]:
+        """Last time any client in the room was heard from (this process only)."""
+        return self._room_activity.get(room_id)
+
+    def forget_room(self, room_id: str):
+        self._room_activity.pop(room_id, None)
+
+    async def forget_rooms_in_redis(self, room_ids: List[str]):
+        client = get_redis()
+        if not client or not room_ids:
+            return
+        try:
+            await client.zrem("presence:rooms", *room_ids)
+        except Exception as e:
+            limited("presence.redis").error("Redis presence cleanup error: {}", e)
+
+    async def stale_rooms(self, room_ids: List[str], max_idle: float) -> Set[str]:
+        """
+        Rooms whose last recorded activity (across all workers, via Redis) is older than max_idle.
+        Rooms that were never seen are not considered stale.
+        """
+        client = get_redis()
+        if not client or not room_ids:
+            return set()
+        try:
+            pipe = client.pipeline(transaction=False)
+            for room_id in room_ids:
+                pipe.zscore("presence:rooms", room_id)
+            scores = await pipe.execute()
+        except Exception as e:
+            limited("presence.redis").error("Redis presence lookup error: {}", e)
+            return set()
+
+        cutoff = time.time() - max_idle
+        return {
+            room_id for room_id, score in zip(room_ids, scores)
+            if score is not None and score < cutoff and not self._rooms.get(room_id)
+        }
+
+    # --- Background loop ---
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Presence tracker started (heartbeat {self.heartbeat_interval}s, idle timeout {self.idle_timeout}s).")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            await self.flush()
+            logger.info("Presence tracker stopped.")
+
+    async def _run(self):
+        while True:
+            try:
+                now = time.time()
+                if now >= self._next_heartbeat:
+                    self._next_heartbeat = now + self.heartbeat_interval
+                    await self.send_heartbeats()
+                await self.reap_idle(now)
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Presence loop error: {e}")
+            await asyncio.sleep(self.flush_interval)
+
+    async def send_heartbeats(self):
+        from src.app.api.websocket import manager
+        frame = json.dumps({"type": "ping", "timestamp": time.time()})
+        sockets = [
+            (room_id, user_id, ws)
+            for room_id, conns in manager.active_connections.items()
+            for user_id, ws in list(conns.items())
+        ]
+        # Send in chunks so one slow socket doesn't hold up the others
+        for i in range(0, len(sockets), 500):
+            chunk = sockets[i:i + 500]
+            results = await asyncio.gather(
+                *(ws.send_text(frame) for _, _, ws in chunk),
+                return_exceptions=True
+            )
+            for (room_id, user_id, ws), result in zip(chunk, results):
+                if isinstance(result, Exception):
+                    await self._reap(room_id, user_id, ws)
+
+    async def reap_idle(self, now: float):
+        from src.app.api.websocket import manager
+        for key in self._idle.pop_due(now):
+            last_seen = self._last_seen.get(key)
+            if last_seen is None:
+                continue
+            if last_seen + self.idle_timeout > now:
+                # Heard from it since the entry was armed
+                self._idle.schedule(key, last_seen + self.idle_timeout)
+                continue
+            room_id, user_id = key
+            ws = manager.active_connections.get(room_id, {}).get(user_id)
+            await self._reap(room_id, user_id, ws)
+
+    async def _reap(self, room_id: str, user_id: str, ws):
+        from src.app.api.websocket import manager
+        logger.info("Presence: reaping idle connection {} in room {}", user_id, room_id)
+        self.mark_reaped(room_id, user_id)
+        if ws is not None:
+            manager.disconnect(ws, room_id, user_id)
+            try:
+                await ws.close(code=IDLE_CLOSE_CODE)
+            except Exception:
+                pass
+        else:
+            self.disconnected(room_id, user_id)
+
+    async def flush(self):
+        """Write pending presence to Redis and broadcast batched presence changes."""
+        dirty, self._dirty = self._dirty, {}
+        changes, self._changes = self._changes, {}
+        if not dirty and not changes:
+            return
+
+        self._apply_to_rooms(dirty, changes)
+        await self._flush_redis(dirty, changes)
+        await self._broadcast_changes(changes)
+
+    def _apply_to_rooms(self, dirty: Dict[PresenceKey, float], changes: Dict[str, Dict[str, bool]]):
+        from src.app.games.deception.manager import game_manager
+        for (room_id, user_id), ts in dirty.items():
+            game = game_manager.resident(room_id)
+            player = game.get_player(user_id) if game else None
+            if player:
+                player.last_seen = ts
+        for room_id, updates in changes.items():
+            game = game_manager.resident(room_id)
+            if not game:
+                continue
+            for user_id, online in updates.items():
+                player = game.get_player(user_id)
+                if player:
+                    player.is_online = online
+
+    async def _flush_redis(self, dirty: Dict[PresenceKey, float], changes: Dict[str, Dict[str, bool]]):
+        client = get_redis()
+        if not client:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            room_activity: Dict[str, float] = {}
+            for (room_id, user_id), ts in dirty.items():
+                pipe.hset(f"presence:{room_id}", user_id, ts)
+                room_activity[room_id] = max(ts, room_activity.get(room_id, 0))
+            for room_id, updates in changes.items():
+                offline = [user_id for user_id, online in updates.items() if not online]
+                if offline:
+                    pipe.hdel(f"presence:{room_id}", *offline)
+                room_activity.setdefault(room_id, time.time())
+            for room_id, ts in room_activity.items():
+                pipe.expire(f"presence:{room_id}", int(self.idle_timeout * 2))
+            if room_activity:
+                pipe.zadd("presence:rooms", room_activity)
+            await pipe.execute()
+        except Exception as e:
+            limited("presence.redis").error("Redis presence flush error: {}", e)
+
+    async def _broadcast_changes(self, changes: Dict[str, Dict[str, bool]]):
+        from src.app.api.websocket import manager
+        from src.app.api.schemas import PresenceMessage, MessageType
+        now = time.time()
+        for room_id, updates in changes.items():
+            if room_id not in manager.active_connections:
+                continue
+            msg = PresenceMessage(
+                type=MessageType.PRESENCE,
+                timestamp=now,
+                changes=[{"player_id": user_id, "is_online": online} for user_id, online in updates.items()]
+            )
+            try:
+                await manager.broadcast(msg.model_dump(), room_id)
+            except Exception as e:
+                limited("presence.broadcast").error("Presence broadcast error in room {}: {}", room_id, e)
+
+presence = PresenceTracker(
+    heartbeat_interval=settings.HEARTBEAT_INTERVAL,
+    idle_timeout=settings.IDLE_TIMEOUT,
+    flush_interval=settings.PRESENCE_FLUSH_INTERVAL
+)
+
+def start_presence():
+    presence.start()
+
+async def stop_presence():
+    await presence.stop()
@@ -0,0 +1,149 @@
+"""
+On-demand sampling profiler for the running worker (GET /api/v1/admin/profile).
+
+Nothing is installed until a capture starts, so there is no cost between captures:
+- "wall": a daemon thread snapshots every thread's stack (sys._current_frames) each
+  interval, idle waits included. Good for "where is time going" including I/O.
+- "cpu": SIGPROF on an ITIMER_PROF timer, so samples are taken per interval of process
+  CPU time and attributed to the main thread, which is the one running the event loop.
+Stacks are folded into the collapsed format used by flamegraph.pl / speedscope / inferno.
+Optionally a tracemalloc snapshot diff over the same window is captured.
+"""
+import asyncio
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+_SRC_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+class ProfilerBusy(Exception):
+    """Another capture is running in this process."""
+
+class Profile:
+    def __init__(self, mode: str, seconds: float, interval: float):
+        self.mode = mode
+        self.seconds = seconds
+        self.interval = interval
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self.allocations: Optional[List[Dict[str, Any]]] = None
+        self._labels: Dict[Any, str] = {}
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            path = code.co_filename
+            if path.startswith(_SRC_ROOT):
+                path = os.path.relpath(path, _SRC_ROOT)
+            else:
+                path = os.path.basename(path)
+            name = getattr(code, "co_qualname", code.co_name)
+            # ';' separates frames in the collapsed format
+            label = self._labels[code] = f"{name} ({path}:{code.co_firstlineno})".replace(";", ":")
+        return label
+
+    def add(self, frame, root: Optional[str] = None):
+        labels = []
+        while frame is not None:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        if root:
+            labels.append(root)
+        labels.reverse()
+        self.stacks[";".join(labels)] += 1
+        self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+class _WallSampler:
+    def __init__(self, profile: Profile):
+        self.profile = profile
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.profile.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != me:
+                    self.profile.add(frame, root=names.get(thread_id, f"thread-{thread_id}"))
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+class _CpuSampler:
+    def __init__(self, profile: Profile):
+        self.profile = profile
+        self._previous = None
+
+    def start(self):
+        if threading.current_thread() is not threading.main_thread() or not hasattr(signal, "setitimer"):
+            raise ValueError("CPU profiling needs SIGPROF on the main thread")
+        self._previous = signal.signal(signal.SIGPROF, self._on_sample)
+        signal.setitimer(signal.ITIMER_PROF, self.profile.interval, self.profile.interval)
+
+    def _on_sample(self, _signum, frame):
+        self.profile.add(frame, root="MainThread")
+
+    def stop(self):
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, self._previous or signal.SIG_DFL)
+
+_capture_lock = asyncio.Lock()
+
+def _allocation_diff(before, after, top: int) -> List[Dict[str, Any]]:
+    diff = []
+    for stat in after.compare_to(before, "lineno")[:top]:
+        frame = stat.traceback[0]
+        diff.append({
+            "file": frame.filename,
+            "line": frame.lineno,
+            "size_diff": stat.size_diff,
+            "count_diff": stat.count_diff,
+            "size": stat.size,
+        })
+    return diff
+
+async def capture(seconds: float, mode: str = "wall", interval: float = 0.005, allocations: bool = False, top: int = 50) -> Profile:
+    """
+    Sample this process for `seconds` while the event loop keeps serving traffic.
+    Raises ProfilerBusy if a capture is already running, ValueError for an unusable mode.
+    """
+    if _capture_lock.locked():
+        raise ProfilerBusy()
+    async with _capture_lock:
+        profile = Profile(mode, seconds, interval)
+        sampler = _CpuSampler(profile) if mode == "cpu" else _WallSampler(profile)
+
+        sampler.start()
+        started_tracing = False
+        before = None
+        if allocations:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(1)
+                started_tracing = True
+            before = tracemalloc.take_snapshot()
+
+        started = time.perf_counter()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            sampler.stop()
+            profile.seconds = round(time.perf_counter() - started, 3)
+            if allocations:
+                after = tracemalloc.take_snapshot()
+                if started_tracing:
+                    tracemalloc.stop()
+                profile.allocations = _allocation_diff(before, after, top)
+        return profile
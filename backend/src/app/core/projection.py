@@ -0,0 +1,168 @@
+import asyncio
+import json
+from collections import deque
+from typing import Any, Dict, Optional, Set
+from .delta import diff_state
+from .logger import logger
+
+def encode_message(message: Dict[str, Any]) -> str:
+    """Serialize an outbound message once; every WebSocket and SSE client gets the same text."""
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+class Frame:
+    """One encoded message, plus its Server-Sent Events form (built on first use)."""
+    __slots__ = ("seq", "event", "data", "_sse")
+
+    def __init__(self, seq: int, event: str, data: str):
+        self.seq = seq
+        self.event = event
+        self.data = data
+        self._sse: Optional[str] = None
+
+    @property
+    def sse(self) -> str:
+        if self._sse is None:
+            self._sse = f"id: {self.seq}\nevent: {self.event}\ndata: {self.data}\n\n"
+        return self._sse
+
+class ProjectionFeed:
+    """
+    Public projection of one room for read-only viewers.
+
+    publish() runs once per revision: it diffs against the previous projection and
+    encodes the full snapshot and the delta once. Subscribers are bounded queues that
+    receive the shared Frame objects, so each viewer costs one put_nowait per revision.
+    A viewer whose queue is full is resynced with the next full snapshot instead.
+
+    With a delay set, frames are held back for `delay` seconds before delivery, so
+    viewers (who could be talking to players) always see the room as it was.
+    """
+    def __init__(self, room_id: str, queue_size: int = 16, delay: float = 0.0):
+        self.room_id = room_id
+        self.queue_size = queue_size
+        self.delay = delay
+        self.subscribers: Set[asyncio.Queue] = set()
+
+        # Latest published revision/state; _full is the latest *delivered* snapshot
+        self.revision: Optional[int] = None
+        self._state: Optional[Dict[str, Any]] = None
+        self._full: Optional[Frame] = None
+
+        # (due, full, delta) waiting out the delay, oldest first
+        self._pending: deque = deque()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        if self._full:
+            queue.put_nowait(self._full)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+
+    def snapshot(self) -> Optional[Frame]:
+        return self._full
+
+    def publish(self, revision: int, state: Dict[str, Any], timestamp: float):
+        if revision == self.revision:
+            return
+        from src.app.api.schemas import MessageType
+
+        full = Frame(revision, "game_update", encode_message({
+            "type": MessageType.GAME_UPDATE.value,
+            "timestamp": timestamp,
+            "seq": revision,
+            "state": state
+        }))
+        delta = None
+        if self._state is not None:
+            delta = Frame(revision, "game_delta", encode_message({
+                "type": MessageType.GAME_DELTA.value,
+                "timestamp": timestamp,
+                "seq": revision,
+                "base_seq": self.revision,
+                "changes": diff_state(self._state, state)
+            }))
+
+        self.revision, self._state = revision, state
+        if self.delay <= 0 and not self._pending:
+            self._deliver(full, delta)
+            return
+
+        loop = asyncio.get_running_loop()
+        self._pending.append((loop.time() + max(self.delay, 0), full, delta))
+        self._schedule(loop)
+
+    def set_delay(self, delay: float):
+        """Change the delay; frames already held back keep their original due time unless it is lifted."""
+        self.delay = delay
+        if delay <= 0 and self._pending:
+            self._flush(force=True)
+
+    def close(self):
+        """End every subscription (room closed or evicted)."""
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        self._pending.clear()
+        for queue in list(self.subscribers):
+            self._offer(queue, None)
+        self.subscribers.clear()
+
+    def _schedule(self, loop: asyncio.AbstractEventLoop):
+        if self._timer is None and self._pending:
+            self._timer = loop.call_at(self._pending[0][0], self._flush)
+
+    def _flush(self, force: bool = False):
+        self._timer = None
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        while self._pending and (force or self._pending[0][0] <= now):
+            _, full, delta = self._pending.popleft()
+            self._deliver(full, delta)
+        self._schedule(loop)
+
+    def _deliver(self, full: Frame, delta: Optional[Frame]):
+        self._full = full
+        for queue in list(self.subscribers):
+            self._offer(queue, delta or full)
+
+    def _offer(self, queue: asyncio.Queue, frame: Optional[Frame]):
+        try:
+            queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            # Slow viewer: drop its backlog, the latest full snapshot supersedes it
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(self._full if frame is not None else None)
+
+class FeedRegistry:
+    def __init__(self):
+        self.feeds: Dict[str, ProjectionFeed] = {}
+
+    def get(self, room_id: str) -> Optional[ProjectionFeed]:
+        return self.feeds.get(room_id)
+
+    def get_or_create(self, room_id: str, queue_size: int = 16, delay: float = 0.0) -> ProjectionFeed:
+        feed = self.feeds.get(room_id)
+        if feed is None:
+            feed = self.feeds[room_id] = ProjectionFeed(room_id, queue_size=queue_size, delay=delay)
+        return feed
+
+    def release(self, room_id: str, queue: asyncio.Queue):
+        feed = self.feeds.get(room_id)
+        if feed:
+            feed.unsubscribe(queue)
+            if not feed.subscribers:
+                del self.feeds[room_id]
+                feed.close()
+
+    def close(self, room_id: str):
+        feed = self.feeds.pop(room_id, None)
+        if feed:
+            logger.debug("Closing projection feed for room {} ({} viewers)", room_id, len(feed.subscribers))
+            feed.close()
+
+feeds = FeedRegistry()
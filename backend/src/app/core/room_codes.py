@@ -0,0 +1,141 @@
+import asyncio
+import hashlib
+import secrets
+from collections import deque
+from typing import Deque, List, Optional
+from .config import settings
+from .logger import logger, limited
+from .redis import get_redis
+
+ROOM_CODE_ALPHABET = 'ABCDEFGHJKLMNPQRSTUVWXYZ23456789'
+ROOM_CODE_LENGTH = 6
+CODE_SPACE = len(ROOM_CODE_ALPHABET) ** ROOM_CODE_LENGTH  # 32^6 == 2^30
+
+_HALF_BITS = 15
+_HALF_MASK = (1 << _HALF_BITS) - 1
+_ROUNDS = 4
+
+COUNTER_KEY = "roomcode:counter"
+FREE_KEY = "roomcode:free_set"  # SET, so a code released twice is only handed out once
+KEY_KEY = "roomcode:key"
+
+def _reservation_key(code: str) -> str:
+    return f"roomcode:{code}"
+
+def feistel_permute(n: int, key: bytes) -> int:
+    """Keyed bijection over [0, 2^30): distinct counters always give distinct codes."""
+    left, right = n >> _HALF_BITS, n & _HALF_MASK
+    for r in range(_ROUNDS):
+        digest = hashlib.blake2b(right.to_bytes(2, "big"), key=key, digest_size=2, salt=bytes([r]) * 16).digest()
+        left, right = right, left ^ (int.from_bytes(digest, "big") & _HALF_MASK)
+    return (left << _HALF_BITS) | right
+
+def encode_code(n: int) -> str:
+    chars = []
+    for _ in range(ROOM_CODE_LENGTH):
+        n, digit = divmod(n, len(ROOM_CODE_ALPHABET))
+        chars.append(ROOM_CODE_ALPHABET[digit])
+    return ''.join(reversed(chars))
+
+def is_room_code(code: Optional[str]) -> bool:
+    return bool(code) and len(code) == ROOM_CODE_LENGTH and all(c in ROOM_CODE_ALPHABET for c in code)
+
+class RoomCodeAllocator:
+    """
+    Hands out room codes without probing the games table.
+
+    - "feistel": codes are a keyed Feistel permutation of a shared Redis counter, so they
+      never collide and still look random. Counter values are reserved in blocks and kept
+      in a local pool, and released codes are recycled through a Redis set before the
+      counter advances.
+    - "redis": random codes reserved with SET NX EX; a taken code just means another draw.
+
+    Without Redis the feistel mode runs on a process-local counter from a random offset;
+    the UNIQUE constraint on games.room_code stays the last line of defence.
+    """
+    def __init__(self, mode: str = "feistel", block_size: int = 32, reservation_ttl: int = 86400):
+        self.mode = mode
+        self.block_size = block_size
+        self.reservation_ttl = reservation_ttl
+
+        self._pool: Deque[str] = deque()
+        self._key: Optional[bytes] = None
+        self._local_key = secrets.token_bytes(16)
+        self._local_counter: Optional[int] = None
+        self._lock = asyncio.Lock()
+
+    async def allocate(self) -> str:
+        if self.mode == "redis" and get_redis():
+            return await self._reserve_random()
+        if not self._pool:
+            async with self._lock:
+                if not self._pool:
+                    await self._refill()
+        return self._pool.popleft()
+
+    async def release(self, code: Optional[str]):
+        """Return a code once its room is gone."""
+        client = get_redis()
+        if not client or not is_room_code(code):
+            return
+        try:
+            if self.mode == "redis":
+                await client.delete(_reservation_key(code))
+            else:
+                await client.sadd(FREE_KEY, code)
+        except Exception as e:
+            limited("room_codes.redis").error("Room code release error: {}", e)
+
+    async def release_many(self, codes: List[str]):
+        for code in codes:
+            await self.release(code)
+
+    # --- Modes ---
+
+    async def _reserve_random(self) -> str:
+        client = get_redis()
+        while True:
+            code = encode_code(secrets.randbelow(CODE_SPACE))
+            if await client.set(_reservation_key(code), "1", nx=True, ex=self.reservation_ttl):
+                return code
+
+    async def _refill(self):
+        client = get_redis()
+        if not client:
+            self._refill_local()
+            return
+
+        try:
+            key = await self._shared_key(client)
+            recycled = await client.spop(FREE_KEY, self.block_size) or []
+            self._pool.extend(recycled)
+
+            needed = self.block_size - len(recycled)
+            if needed:
+                end = await client.incrby(COUNTER_KEY, needed)
+                self._pool.extend(encode_code(feistel_permute(n % CODE_SPACE, key)) for n in range(end - needed, end))
+        except Exception as e:
+            limited("room_codes.redis").error("Room code refill from Redis failed, using local counter: {}", e)
+            self._refill_local()
+
+    def _refill_local(self):
+        if self._local_counter is None:
+            self._local_counter = secrets.randbelow(CODE_SPACE)
+        start = self._local_counter
+        self._local_counter += self.block_size
+        self._pool.extend(encode_code(feistel_permute(n % CODE_SPACE, self._local_key)) for n in range(start, start + self.block_size))
+
+    async def _shared_key(self, client) -> bytes:
+        # Every worker must permute with the same key or their codes could collide
+        if self._key is None:
+            if settings.ROOM_CODE_KEY:
+                self._key = hashlib.blake2b(settings.ROOM_CODE_KEY.encode(), digest_size=16).digest()
+            else:
+                await client.set(KEY_KEY, secrets.token_hex(16), nx=True)
+                self._key = bytes.fromhex(await client.get(KEY_KEY))
+        return self._key
+
+room_codes = RoomCodeAllocator(
+    mode=settings.ROOM_CODE_MODE,
+    reservation_ttl=settings.ROOM_CODE_TTL
+)
@@ -1,32 +1,112 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from typing import Dict, List, Optional
+from .config import settings
 from .logger import logger
+from .metrics import SCHEDULER_LATENCY, timed
+from .timers import DeadlineHeap
 import time
 
 scheduler = AsyncIOScheduler()
 
+def _attended(room_id: str) -> bool:
+    """Someone is using the room: players online, feed viewers (SSE, spectator sockets) or parked long polls."""
+    from .presence import presence
+    from .projection import feeds
+    from src.app.games.deception.manager import game_manager
+
+    if presence.online_count(room_id):
+        return True
+    feed = feeds.get(room_id)
+    if feed is not None and feed.subscribers:
+        return True
+    game = game_manager.games.get(room_id)
+    return game is not None and game.waiters > 0
+
+class RoomExpiryIndex:
+    """
+    Expiry index over resident rooms, keyed by last-activity timestamp.
+    touch() is O(1) for rooms that are already armed; the deadline is only
+    re-checked when it comes due, so a sweep only visits expired rooms.
+    """
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._heap = DeadlineHeap()
+        self._activity: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def touch(self, room_id: str, ts: Optional[float] = None):
+        ts = time.time() if ts is None else ts
+        self._activity[room_id] = ts
+        if room_id not in self._heap:
+            self._heap.schedule(room_id, ts + self.ttl)
+
+    def remove(self, room_id: str):
+        self._activity.pop(room_id, None)
+        self._heap.cancel(room_id)
+
+    def pop_expired(self, now: float, limit: int) -> List[str]:
+        """Remove and return up to `limit` rooms idle for longer than ttl with nobody attached (see _attended)."""
+        from .presence import presence
+
+        expired = []
+        while len(expired) < limit:
+            due = self._heap.pop_due(now, limit - len(expired))
+            if not due:
+                break
+            for room_id in due:
+                last = max(self._activity.get(room_id, 0), presence.last_activity(room_id) or 0)
+                if _attended(room_id):
+                    self._heap.schedule(room_id, now + self.ttl)
+                elif last + self.ttl > now:
+                    self._heap.schedule(room_id, last + self.ttl)
+                else:
+                    self._activity.pop(room_id, None)
+                    expired.append(room_id)
+        return expired
+
+room_expiry = RoomExpiryIndex(ttl=settings.ROOM_IDLE_TTL)
+# Same bookkeeping on a shorter ttl: idle rooms are compacted in memory before they are evicted
+room_compaction = RoomExpiryIndex(ttl=settings.ROOM_COMPACT_AFTER)
+
+@timed(SCHEDULER_LATENCY, ("room_scavenger",))
 async def cleanup_inactive_rooms():
     """
     Task to clean up inactive/abandoned game rooms.
+    Only rooms popped from the expiry index are inspected, so a sweep costs
+    O(expired * log n) instead of scanning every room and player.
     """
     from src.app.games.deception.manager import game_manager
-    
+
     now = time.time()
-    stale_threshold = 3600  # 1 hour
-    
-    rooms_to_remove = []
-    for room_id, game in game_manager.games.items():
-        # If no players are online and the room has been inactive for a while
-        online_players = [p for p in game.players if p.is_online]
-        if not online_players and (now - game.created_at) > stale_threshold:
-            rooms_to_remove.append(room_id)
-            
-    for room_id in rooms_to_remove:
-        logger.info(f"Scavenger: Removing stale room {room_id}")
-        del game_manager.games[room_id]
+    batch_size = settings.SCAVENGER_BATCH_SIZE
+    total = 0
+    while True:
+        expired = room_expiry.pop_expired(now, limit=batch_size)
+        if not expired:
+            break
+        await game_manager.expire_rooms(expired)
+        total += len(expired)
+        if len(expired) < batch_size:
+            break
+
+    if total:
+        logger.info(f"Scavenger: expired {total} idle rooms in {time.time() - now:.3f}s ({len(room_expiry)} still resident)")
+
+    if settings.ROOM_COMPACT_AFTER > 0:
+        while True:
+            idle = room_compaction.pop_expired(now, limit=batch_size)
+            game_manager.compact_rooms(idle)
+            if len(idle) < batch_size:
+                break
 
 def start_scheduler():
+    from .maintenance import scheduled_maintenance
+
     if not scheduler.running:
         scheduler.add_job(cleanup_inactive_rooms, "interval", minutes=1)
+        scheduler.add_job(scheduled_maintenance, "interval", minutes=settings.MAINTENANCE_INTERVAL_MINUTES)
         scheduler.start()
         logger.info("Scheduler started: Running periodic cleanup tasks.")
 
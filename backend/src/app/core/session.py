@@ -0,0 +1,51 @@
+from jose import jwt, JWTError
+from typing import Optional, Dict, Any
+from .config import settings
+from .logger import logger, limited
+import secrets
+import time
+
+RESUME_TOKEN_ALGORITHM = "HS256"
+RESUME_TOKEN_AUDIENCE = "room-resume"
+
+class SessionTokenManager:
+    """
+    Issues and verifies resume tokens for WebSocket reconnects.
+    A token binds a user to a room and carries the player's database id,
+    so a reconnect can be served from the resident room without Supabase.
+    """
+    def __init__(self, secret: Optional[str] = None, ttl: int = 86400):
+        self.secret = secret or secrets.token_urlsafe(32)
+        self.ttl = ttl
+
+    def issue(self, room_id: str, user_id: str, db_id: Optional[str] = None) -> str:
+        now = int(time.time())
+        payload = {
+            "sub": user_id,
+            "room": room_id,
+            "db_id": db_id,
+            "aud": RESUME_TOKEN_AUDIENCE,
+            "iat": now,
+            "exp": now + self.ttl
+        }
+        return jwt.encode(payload, self.secret, algorithm=RESUME_TOKEN_ALGORITHM)
+
+    def verify(self, token: str, room_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """Returns the token claims if it is valid for this room and user, otherwise None."""
+        try:
+            claims = jwt.decode(
+                token,
+                self.secret,
+                algorithms=[RESUME_TOKEN_ALGORITHM],
+                audience=RESUME_TOKEN_AUDIENCE
+            )
+        except JWTError as e:
+            logger.debug("Rejected resume token for {}: {}", user_id, e)
+            return None
+
+        if claims.get("room") != room_id or claims.get("sub") != user_id:
+            limited("session.binding").warning("Resume token binding mismatch for {} in room {}", user_id, room_id)
+            return None
+        return claims
+
+session_tokens = SessionTokenManager(settings.SESSION_TOKEN_SECRET, ttl=settings.SESSION_TOKEN_TTL)
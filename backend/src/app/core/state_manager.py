@@ -1,8 +1,11 @@
 import json
-from typing import Optional, Type, TypeVar
+import time
+from typing import Dict, List, Optional, Type, TypeVar
 from pydantic import BaseModel
 from .redis import get_redis
-from .logger import logger
+from .logger import logger, limited
+from .metrics import REDIS_LATENCY, REDIS_PAYLOAD_BYTES
+from .tracing import tracer
 
 T = TypeVar("T", bound=BaseModel)
 
@@ -18,9 +21,34 @@ class RedisStateManager:
         try:
             full_key = f"{self.prefix}:{key}"
             # Use model_dump_json for Pydantic v2
-            await client.set(full_key, state.model_dump_json(), ex=ttl)
+            payload = state.model_dump_json()
+            REDIS_PAYLOAD_BYTES.labels("set").observe(len(payload))
+            start = time.perf_counter()
+            with tracer.span("redis.set", key=full_key, bytes=len(payload)):
+                await client.set(full_key, payload, ex=ttl)
+            REDIS_LATENCY.labels("set").observe(time.perf_counter() - start)
         except Exception as e:
-            logger.error(f"Redis set_state error: {e}")
+            limited("redis.state").error("Redis set_state error: {}", e)
+
+    async def set_many(self, states: Dict[str, BaseModel], ttl: int = 3600):
+        """Persist several states in a single pipelined round trip."""
+        client = get_redis()
+        if not client or not states:
+            return
+
+        try:
+            pipe = client.pipeline(transaction=False)
+            sizes = REDIS_PAYLOAD_BYTES.labels("set")
+            for key, state in states.items():
+                payload = state.model_dump_json()
+                sizes.observe(len(payload))
+                pipe.set(f"{self.prefix}:{key}", payload, ex=ttl)
+            start = time.perf_counter()
+            with tracer.span("redis.set_many", keys=len(states)):
+                await pipe.execute()
+            REDIS_LATENCY.labels("set_many").observe(time.perf_counter() - start)
+        except Exception as e:
+            limited("redis.state").error("Redis set_many error: {}", e)
 
     async def get_state(self, key: str, model: Type[T]) -> Optional[T]:
         client = get_redis()
@@ -29,13 +57,29 @@ class RedisStateManager:
         
         try:
             full_key = f"{self.prefix}:{key}"
-            data = await client.get(full_key)
+            start = time.perf_counter()
+            with tracer.span("redis.get", key=full_key):
+                data = await client.get(full_key)
+            REDIS_LATENCY.labels("get").observe(time.perf_counter() - start)
             if data:
+                REDIS_PAYLOAD_BYTES.labels("get").observe(len(data))
                 return model.model_validate_json(data)
         except Exception as e:
-            logger.error(f"Redis get_state error: {e}")
+            limited("redis.state").error("Redis get_state error: {}", e)
         return None
 
+    async def delete_many(self, keys: List[str], extra_keys: Optional[List[str]] = None):
+        """Delete several states (plus any related raw keys) with a single DEL."""
+        client = get_redis()
+        full_keys = [f"{self.prefix}:{key}" for key in keys] + (extra_keys or [])
+        if not client or not full_keys:
+            return
+
+        try:
+            await client.delete(*full_keys)
+        except Exception as e:
+            limited("redis.state").error("Redis delete_many error: {}", e)
+
     async def delete_state(self, key: str):
         client = get_redis()
         if not client:
@@ -45,4 +89,4 @@ class RedisStateManager:
             full_key = f"{self.prefix}:{key}"
             await client.delete(full_key)
         except Exception as e:
-            logger.error(f"Redis delete_state error: {e}")
+            limited("redis.state").error("Redis delete_state error: {}", e)
@@ -0,0 +1,58 @@
+import heapq
+import itertools
+from typing import Dict, Hashable, List, Optional, Tuple
+
+class DeadlineHeap:
+    """
+    Min-heap of keyed deadlines with lazy invalidation.
+    schedule() and cancel() never search the heap; superseded entries are
+    skipped when they surface in pop_due(), so each operation is O(log n).
+    """
+    def __init__(self):
+        self._heap: List[Tuple[float, int, Hashable]] = []
+        self._deadlines: Dict[Hashable, float] = {}
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._deadlines
+
+    def deadline(self, key: Hashable) -> Optional[float]:
+        return self._deadlines.get(key)
+
+    def schedule(self, key: Hashable, deadline: float):
+        """Set (or replace) the deadline for a key."""
+        self._deadlines[key] = deadline
+        heapq.heappush(self._heap, (deadline, next(self._counter), key))
+        # Keep stale entries from piling up when keys are rescheduled often
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._compact()
+
+    def cancel(self, key: Hashable):
+        self._deadlines.pop(key, None)
+
+    def next_deadline(self) -> Optional[float]:
+        while self._heap:
+            deadline, _, key = self._heap[0]
+            if self._deadlines.get(key) == deadline:
+                return deadline
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self, now: float, limit: Optional[int] = None) -> List[Hashable]:
+        """Remove and return keys whose deadline is <= now, earliest first."""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            if limit is not None and len(due) >= limit:
+                break
+            deadline, _, key = heapq.heappop(self._heap)
+            if self._deadlines.get(key) == deadline:
+                del self._deadlines[key]
+                due.append(key)
+        return due
+
+    def _compact(self):
+        self._heap = [(d, next(self._counter), k) for k, d in self._deadlines.items()]
+        heapq.heapify(self._heap)
@@ -0,0 +1,270 @@
+"""
+Lightweight tracing with W3C trace context (OpenTelemetry-compatible ids and export shape).
+
+A trace starts at an entry point (HTTP request, WebSocket frame, scheduled job) with
+start_trace(), which makes the head sampling decision once, or inherits it from an
+incoming `traceparent`. Everything below uses span(), which is a no-op outside a
+sampled trace, so unsampled requests pay one ContextVar lookup per instrumented call.
+
+The current span lives in a ContextVar, so it follows awaits within a task and is
+copied into tasks and asyncio.to_thread workers (where the Supabase calls run).
+"""
+import functools
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from .config import settings
+from .logger import logger
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """(trace_id, parent_span_id, sampled) from a W3C traceparent header, or None if malformed."""
+    if not header:
+        return None
+    match = _TRACEPARENT.match(header.strip().lower())
+    if not match or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+class Span:
+    __slots__ = ("tracer", "trace_id", "span_id", "parent_id", "name", "attributes", "start_ns", "end_ns", "error", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.span_id = "%016x" % random.getrandbits(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error: Optional[str] = None
+        self._token = None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self._token = _current.set(self)
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, _tb):
+        self.end_ns = time.time_ns()
+        if exc_type is not None and not issubclass(exc_type, (asyncio.CancelledError, GeneratorExit)):
+            self.error = f"{exc_type.__name__}: {exc}"
+        _current.reset(self._token)
+        self.tracer.exporter.export(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """OTLP/JSON-style record."""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "durationMs": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "status": {"code": "ERROR", "message": self.error} if self.error else {"code": "OK"},
+        }
+
+class _NoopSpan:
+    """Stands in for unsampled and untraced work; also marks an unsampled trace so its children stay no-ops."""
+    __slots__ = ("_token",)
+    traceparent = None
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def __enter__(self):
+        self._token = _current.set(_UNSAMPLED)
+        return self
+
+    def __exit__(self, *_exc):
+        _current.reset(self._token)
+
+class _Passthrough:
+    """Returned by span() when there is nothing to record: doesn't touch the context at all."""
+    __slots__ = ()
+    traceparent = None
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        pass
+
+_UNSAMPLED = object()
+_PASSTHROUGH = _Passthrough()
+_current: ContextVar[Any] = ContextVar("current_span", default=None)
+
+class InMemoryExporter:
+    """Keeps the most recent finished spans (tests, the admin API, ad-hoc debugging)."""
+    def __init__(self, max_spans: int = 10000):
+        self.spans: Deque[Span] = deque(maxlen=max_spans)
+
+    def export(self, span: Span):
+        self.spans.append(span)
+
+    def traces(self) -> Dict[str, List[Span]]:
+        grouped: Dict[str, List[Span]] = {}
+        for span in list(self.spans):
+            grouped.setdefault(span.trace_id, []).append(span)
+        return grouped
+
+    def flush(self):
+        pass
+
+    def clear(self):
+        self.spans.clear()
+
+class JsonlExporter:
+    """
+    Appends one JSON span per line. export() only buffers (spans end on the event loop and
+    in to_thread workers); full batches are written by a writer thread, so the event loop
+    never touches the disk. flush() writes whatever is buffered on the calling thread.
+    """
+    def __init__(self, path: str, batch_size: int = 256):
+        self.path = path
+        self.batch_size = batch_size
+        self._buffer: List[Span] = []
+        self._lock = threading.Lock()        # Guards _buffer
+        self._write_lock = threading.Lock()  # Keeps batches in order in the file
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, span: Span):
+        with self._lock:
+            self._buffer.append(span)
+            full = len(self._buffer) >= self.batch_size
+            # Started lazily (under the lock: spans end on the loop and in to_thread workers)
+            if full and self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+                self._thread.start()
+        if full:
+            self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        with self._write_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+            if not batch:
+                return
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(span.to_dict(), default=str) + "\n" for span in batch))
+            except OSError as e:
+                logger.error(f"Trace export to {self.path} failed: {e}")
+
+class _NullExporter:
+    def export(self, span: Span):
+        pass
+
+    def flush(self):
+        pass
+
+class Tracer:
+    def __init__(self, exporter: Any = None, sample_rate: float = 0.0, trust_parent: bool = False):
+        self.exporter = exporter or _NullExporter()
+        self.sample_rate = sample_rate if exporter else 0.0
+        self.trust_parent = trust_parent
+
+    def configure(self, exporter: Any, sample_rate: float, trust_parent: bool = False):
+        self.exporter.flush()
+        self.exporter = exporter or _NullExporter()
+        self.sample_rate = sample_rate if exporter else 0.0
+        self.trust_parent = trust_parent
+
+    def start_trace(self, name: str, traceparent: Optional[str] = None, **attributes):
+        """
+        Root span for an entry point. A sampled incoming traceparent is joined when the
+        local sample_rate also picks it, or always with trust_parent (callers are trusted
+        upstreams); clients can't force tracing. An unsampled traceparent is never traced.
+        Nested calls (e.g. an event handled inside an HTTP request) become child spans.
+        """
+        current = _current.get()
+        if current is _UNSAMPLED or not self.sample_rate:
+            return _PASSTHROUGH
+        if current is not None:
+            return Span(self, name, current.trace_id, current.span_id, attributes)
+
+        parent = parse_traceparent(traceparent)
+        if parent:
+            trace_id, parent_id, sampled = parent
+            if sampled and (self.trust_parent or random.random() < self.sample_rate):
+                return Span(self, name, trace_id, parent_id, attributes)
+            return _NoopSpan()
+        if random.random() >= self.sample_rate:
+            return _NoopSpan()
+        return Span(self, name, "%032x" % random.getrandbits(128), None, attributes)
+
+    def span(self, name: str, **attributes):
+        """Child span of the current trace; a shared no-op when there is no sampled trace."""
+        current = _current.get()
+        if current is None or current is _UNSAMPLED:
+            return _PASSTHROUGH
+        return Span(self, name, current.trace_id, current.span_id, attributes)
+
+tracer = Tracer()
+
+def current_span() -> Optional[Span]:
+    current = _current.get()
+    return current if isinstance(current, Span) else None
+
+def traced(name: str):
+    """Decorator opening a child span around a sync or async function."""
+    def decorate(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with tracer.span(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def init_tracing():
+    kind = settings.TRACE_EXPORTER
+    if kind == "memory":
+        exporter = InMemoryExporter()
+    elif kind == "file":
+        exporter = JsonlExporter(settings.TRACE_FILE)
+    else:
+        exporter = None
+    tracer.configure(exporter, settings.TRACE_SAMPLE_RATE, trust_parent=settings.TRACE_TRUST_PARENT)
+    if exporter:
+        logger.info(f"Tracing enabled: {kind} exporter, sample rate {settings.TRACE_SAMPLE_RATE}")
+
+def shutdown_tracing():
+    tracer.exporter.flush()
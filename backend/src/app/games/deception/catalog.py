@@ -0,0 +1,139 @@
+"""
+Process-wide id tables for the library catalog.
+
+Card ids, tile ids and tile faces are mapped to small integers the first time they are
+seen, so the compact room form (compact.py) can hold hands, draft pools and tile
+selections in fixed arrays instead of lists of UUID strings. Indices only grow and are
+local to this process: they are never persisted or sent to clients.
+
+The tables double as the intern table for id strings: the catalog load, the deck and
+rooms rehydrated from Redis all map ids through intern(), so every room shares one
+string object per card instead of carrying its own copies, and card lookups keyed by
+those ids hit the dict's identity fast path.
+"""
+import hashlib
+import json
+from array import array
+from typing import Any, Dict, Generic, Hashable, List, Optional, Sequence, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+class IdTable(Generic[K]):
+    """Bidirectional key <-> index table; index() assigns the next index to unseen keys."""
+    __slots__ = ("keys", "_index")
+
+    def __init__(self):
+        self.keys: List[K] = []
+        self._index: Dict[K, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def index(self, key: K) -> int:
+        i = self._index.get(key)
+        if i is None:
+            i = self._index[key] = len(self.keys)
+            self.keys.append(key)
+        return i
+
+    def intern(self, key: K) -> K:
+        """The table's own copy of `key`, added if unseen. Only for ids that come from the catalog or the deck."""
+        return self.keys[self.index(key)]
+
+    def intern_list(self, keys: List[K]) -> List[K]:
+        """intern() every item of `keys`, in place (no new list to allocate)."""
+        index, table = self._index, self.keys
+        for i, key in enumerate(keys):
+            j = index.get(key)
+            keys[i] = table[self.index(key) if j is None else j]
+        return keys
+
+    def canonical(self, key: K) -> K:
+        """The table's copy of `key` if it has one, else `key` itself; nothing is added (safe for client input)."""
+        try:
+            i = self._index.get(key)
+        except TypeError:  # Unhashable
+            return key
+        return key if i is None else self.keys[i]
+
+    def pack(self, keys: Sequence[K]) -> Optional[array]:
+        """Indices of `keys` as an unsigned int array; None for an empty sequence."""
+        return array("I", [self.index(key) for key in keys]) if keys else None
+
+    def unpack(self, packed: Optional[array]) -> List[K]:
+        if packed is None:
+            return []
+        keys = self.keys
+        return [keys[i] for i in packed]
+
+class CardViews:
+    """
+    Client-facing card views ({id, name, content, image_url}), built once per card and
+    shared by every projection, so treat them as frozen. They belong to the card table
+    they were built from; invalidate() drops them and bumps `version` when the library
+    is edited.
+    """
+    def __init__(self):
+        self.version = 0
+        self._source: Optional[Dict[str, Any]] = None
+        self._views: Dict[str, Dict[str, Any]] = {}
+
+    def for_table(self, cards: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        if cards is not self._source:
+            self._source = cards
+            self._views = {}
+        return self._views
+
+    def invalidate(self):
+        self.version += 1
+        self._source = None
+        self._views = {}
+
+card_views = CardViews()
+
+class CatalogBundles:
+    """
+    The library cards of one game_type as a single JSON document (GET /api/v1/game/catalog),
+    encoded once and tagged with a hash of its content, so every worker issues the same ETag
+    for the same library. Clients on ?cards=ref sockets cache it and resolve card ids with it.
+    """
+    def __init__(self):
+        self._bundles: Dict[str, Tuple[str, bytes]] = {}
+
+    def get(self, game_type: str) -> Tuple[str, bytes]:
+        """(etag, body) for `game_type`; an unknown game_type yields an empty, uncached bundle."""
+        bundle = self._bundles.get(game_type)
+        if bundle is None:
+            bundle, found = self._build(game_type)
+            if found:
+                self._bundles[game_type] = bundle
+        return bundle
+
+    def clear(self):
+        self._bundles.clear()
+
+    @staticmethod
+    def _build(game_type: str) -> Tuple[Tuple[str, bytes], bool]:
+        from src.app.core.database import supabase_client
+        supabase = supabase_client()
+        rows = []
+        if supabase:
+            res = supabase.table("library_cards").select("id, type, content, image_url").eq("game_type", game_type).order("id").execute()
+            rows = res.data if res and res.data else []
+        cards = [
+            {"id": str(c["id"]), "type": c.get("type"), "content": c.get("content"), "image_url": c.get("image_url")}
+            for c in rows
+        ]
+        encoded = json.dumps(cards, separators=(",", ":"), ensure_ascii=False)
+        version = hashlib.sha256(encoded.encode()).hexdigest()[:16]
+        body = f'{{"game_type":{json.dumps(game_type)},"version":"{version}","cards":{encoded}}}'.encode()
+        return (f'"{version}"', body), bool(cards)
+
+catalog_bundles = CatalogBundles()
+
+# Library card UUIDs (hands, draft pools)
+card_ids: IdTable[str] = IdTable()
+# Library tile UUIDs
+tile_ids: IdTable[str] = IdTable()
+# Tile faces as (id, title, type, options): a room keeps the face it drew even if the library changes later
+tile_faces: IdTable[tuple] = IdTable()
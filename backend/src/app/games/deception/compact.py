@@ -0,0 +1,132 @@
+"""
+Compact in-memory form for resident rooms nobody is using.
+
+A DeceptionGame carries pydantic overhead per room and per player, plus a list of UUID
+strings for every hand and draft pool and a dict per tile. Rooms idle for
+ROOM_COMPACT_AFTER are held by GameManager as a CompactRoom instead: __slots__ objects
+whose card ids and tile faces are catalog indices (catalog.py) in small fixed arrays.
+
+The game logic, projections and persistence keep working on the pydantic models:
+CompactRoom.expand() rebuilds the DeceptionGame when the room is next loaded or flushed
+to Redis, without re-running validation.
+"""
+from array import array
+from typing import Any, Dict, List, Optional
+from .catalog import card_ids, tile_faces
+from .logic import DeceptionGame, DeceptionPlayer
+
+_CARD_FIELDS = frozenset({"means_cards", "clue_cards", "draft_pool_means", "draft_pool_clues"})
+_TILE_KEYS = frozenset({"id", "title", "type", "options", "selected_option"})
+
+class CompactTiles:
+    """A Forensic Scientist's tiles: face indices plus the selected option per tile (-1 = none)."""
+    __slots__ = ("faces", "selected")
+
+    def __init__(self, faces: array, selected: array):
+        self.faces = faces
+        self.selected = selected
+
+    @staticmethod
+    def pack(tiles: List[Dict[str, Any]]):
+        """CompactTiles for the tiles the deck deals, or the list itself when anything doesn't fit."""
+        if not tiles:
+            return None
+        faces = array("I")
+        selected = array("b")
+        try:
+            for tile in tiles:
+                if not isinstance(tile, dict) or tile.keys() != _TILE_KEYS:
+                    return tiles
+                option = tile["selected_option"]
+                if not (option is None or (type(option) is int and 0 <= option < 128)):
+                    return tiles
+                faces.append(tile_faces.index((tile["id"], tile["title"], tile["type"], tuple(tile["options"]))))
+                selected.append(-1 if option is None else option)
+        except TypeError:  # Unhashable or non-iterable options
+            return tiles
+        return CompactTiles(faces, selected)
+
+    def unpack(self) -> List[Dict[str, Any]]:
+        tiles = []
+        for face, option in zip(self.faces, self.selected):
+            tile_id, title, tile_type, options = tile_faces.keys[face]
+            tiles.append({
+                "id": tile_id,
+                "title": title,
+                "type": tile_type,
+                "options": list(options),
+                "selected_option": None if option < 0 else option
+            })
+        return tiles
+
+class CompactPlayer:
+    # One slot per DeceptionPlayer field (checked in tests)
+    __slots__ = (
+        "id", "db_id", "name", "is_host", "is_ready", "is_online", "last_seen", "metadata",
+        "role", "seat_index", "has_badge", "has_drafted", "tiles_replaced",
+        "means_cards", "clue_cards", "draft_pool_means", "draft_pool_clues", "active_tiles",
+    )
+
+    @classmethod
+    def pack(cls, player: DeceptionPlayer) -> "CompactPlayer":
+        compact = cls()
+        for name in cls.__slots__:
+            value = getattr(player, name)
+            if name in _CARD_FIELDS:
+                value = card_ids.pack(value)
+            elif name == "active_tiles":
+                value = CompactTiles.pack(value)
+            elif name == "metadata":
+                value = value or None
+            setattr(compact, name, value)
+        return compact
+
+    def unpack(self) -> DeceptionPlayer:
+        fields = {}
+        for name in self.__slots__:
+            value = getattr(self, name)
+            if name in _CARD_FIELDS:
+                value = card_ids.unpack(value)
+            elif name == "active_tiles":
+                value = value.unpack() if isinstance(value, CompactTiles) else (value or [])
+            elif name == "metadata":
+                value = value or {}
+            fields[name] = value
+        return DeceptionPlayer.model_construct(**fields)
+
+class CompactRoom:
+    # One slot per DeceptionGame field (checked in tests)
+    __slots__ = (
+        "room_id", "room_code", "host_id", "status", "created_at", "revision", "metadata",
+        "round", "murderer_id", "means_id", "clue_id", "spectator_delay", "players",
+    )
+
+    @classmethod
+    def pack(cls, game: DeceptionGame) -> "CompactRoom":
+        compact = cls()
+        for name in cls.__slots__:
+            value = getattr(game, name)
+            if name == "players":
+                value = tuple(CompactPlayer.pack(p) for p in value)
+            elif name == "metadata":
+                value = value or None
+            setattr(compact, name, value)
+        return compact
+
+    def expand(self) -> DeceptionGame:
+        """The pydantic room again (runtime caches start empty)."""
+        fields = {}
+        for name in self.__slots__:
+            value = getattr(self, name)
+            if name == "players":
+                value = [p.unpack() for p in value]
+            elif name == "metadata":
+                value = value or {}
+            fields[name] = value
+        return DeceptionGame.model_construct(**fields)
+
+    def get_player(self, player_id: str) -> Optional[CompactPlayer]:
+        for p in self.players:
+            if p.id == player_id:
+                return p
+        return None
@@ -1,14 +1,26 @@
 from src.app.core.base_game import BaseRoom, BasePlayer
-from src.app.api.schemas import GameStatus, Role, CardType, ChatMessage
-from src.app.core.database import get_supabase
+from src.app.api.schemas import GameStatus, Role, CardType, ChatMessage, MessageType
+from src.app.core.database import get_supabase, supabase_client
 from src.app.core.state_manager import RedisStateManager
-from typing import Dict, Any, List, Optional
+from src.app.core.delta import diff_state
+from src.app.core.metrics import BROADCAST_BYTES, BROADCAST_LATENCY, EVENT_LATENCY, STATE_BUILD_LATENCY, timed
+from src.app.core.tracing import traced
+from .catalog import card_ids, card_views, catalog_bundles, tile_ids
+from pydantic import PrivateAttr, field_validator
+from typing import Dict, Any, List, Optional, Tuple
+import copy
 import random
 import time
 import asyncio
 
 state_manager = RedisStateManager(prefix="deception")
 
+# Event types handled below; anything else is reported under "other" so clients can't mint metric labels
+EVENT_TYPES = frozenset({
+    "start_game", "reset_game", "ready", "chat", "reset", "leave", "set_spectator_delay", "join_seat",
+    "confirm_draft", "confirm_crime", "confirm_tiles", "solve", "select_tile_option", "replace_tile", "identify_witness",
+})
+
 class DeceptionPlayer(BasePlayer):
     role: Optional[Role] = None
     seat_index: Optional[int] = None
@@ -21,6 +33,60 @@ class DeceptionPlayer(BasePlayer):
     has_drafted: bool = False
     tiles_replaced: int = 0
 
+    # Rooms rehydrated from Redis share the catalog's id strings instead of allocating their own
+    @field_validator("means_cards", "clue_cards", "draft_pool_means", "draft_pool_clues")
+    @classmethod
+    def _intern_card_ids(cls, ids: List[str]) -> List[str]:
+        return card_ids.intern_list(ids)
+
+    @field_validator("active_tiles")
+    @classmethod
+    def _intern_tile_ids(cls, tiles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        for tile in tiles:
+            if isinstance(tile.get("id"), str):
+                tile["id"] = tile_ids.intern(tile["id"])
+        return tiles
+
+def card_view(card_id: str, unknown_name: str = "Unknown") -> Dict[str, Any]:
+    """
+    Client-facing view of a library card, shared across rooms and viewers (read-only).
+    Ids missing from the catalog get a fresh placeholder.
+    """
+    cards = DeceptionGame._card_cache
+    views = card_views.for_table(cards)
+    view = views.get(card_id)
+    if view is not None:
+        return view
+    card = cards.get(card_id)
+    if card is None:
+        return {"id": card_id, "name": unknown_name, "content": "Unknown", "image_url": None}
+    view = views[card_id] = {
+        "id": card_id,
+        "name": card.get("name") or card.get("content") or card_id,
+        "content": card.get("content"),
+        "image_url": card.get("image_url")
+    }
+    return view
+
+def enrich_cards(card_ids: List[str]) -> List[Dict[str, Any]]:
+    views = card_views.for_table(DeceptionGame._card_cache)
+    return [views.get(cid) or card_view(cid) for cid in card_ids]
+
+def invalidate_catalog():
+    """
+    Forget the loaded library (after an admin edit): it is reloaded on next use, every
+    room's card views are rebuilt and the catalog bundles get a new ETag.
+    """
+    for name in ("_card_cache", "_tile_cache"):
+        if name in DeceptionGame.__dict__:
+            delattr(DeceptionGame, name)
+    card_views.invalidate()
+    catalog_bundles.clear()
+
+def update_message(seq: int, state: Dict[str, Any]) -> Dict[str, Any]:
+    """Same shape as GameUpdateMessage.model_dump(), without re-validating the state."""
+    return {"type": MessageType.GAME_UPDATE, "timestamp": time.time(), "seq": seq, "state": state}
+
 class DeceptionGame(BaseRoom):
     status: GameStatus = GameStatus.LOBBY
     round: int = 0
@@ -28,14 +94,23 @@ class DeceptionGame(BaseRoom):
     means_id: Optional[str] = None
     clue_id: Optional[str] = None
     players: List[DeceptionPlayer] = []
+    spectator_delay: float = 0.0  # seconds spectators lag behind the table (host setting)
 
-    def to_game_state(self, viewer_id: str = None):
-        """Convert DeceptionGame to the API GameState schema with role filtering."""
-        from src.app.api.schemas import GameState, Player as PlayerSchema
-        
-        viewer = self.get_player(viewer_id) if viewer_id else None
-        viewer_role = viewer.role if viewer else None
+    # Runtime-only caches (not persisted to Redis)
+    _avatar_cache: Dict[str, Optional[str]] = PrivateAttr(default_factory=dict)
+    _viewer_snapshots: Dict[str, Tuple[int, Dict[str, Any]]] = PrivateAttr(default_factory=dict)
+    _ref_snapshots: Dict[str, Tuple[int, Dict[str, Any]]] = PrivateAttr(default_factory=dict)  # Same, for card_refs sockets
+    _public_snapshot: Optional[Tuple[int, Dict[str, Any]]] = PrivateAttr(default=None)
+    _fragments: Optional[Tuple[Tuple[int, int], Dict[str, Dict[str, Any]]]] = PrivateAttr(default=None)
 
+    @field_validator("means_id", "clue_id")
+    @classmethod
+    def _canonical_card_id(cls, card_id: Optional[str]) -> Optional[str]:
+        # Chosen by the client, so only reuse strings the catalog already has
+        return card_ids.canonical(card_id) if card_id else card_id
+
+    def _load_catalog(self):
+        """Card and tile metadata shared by every room, fetched once per process."""
         if not hasattr(DeceptionGame, "_card_cache"):
             DeceptionGame._card_cache = {}
             DeceptionGame._tile_cache = {}
@@ -44,79 +119,108 @@ class DeceptionGame(BaseRoom):
                 # Cache cards
                 res_cards = supabase.table('library_cards').select('id, content, image_url').execute()
                 if res_cards and res_cards.data:
-                    DeceptionGame._card_cache = {str(c['id']): c for c in res_cards.data}
+                    DeceptionGame._card_cache = {card_ids.intern(str(c['id'])): c for c in res_cards.data}
                 
                 # Cache tiles
                 res_tiles = supabase.table('library_tiles').select('id, name').execute()
                 if res_tiles and res_tiles.data:
-                    DeceptionGame._tile_cache = {str(t['id']): t for t in res_tiles.data}
+                    DeceptionGame._tile_cache = {tile_ids.intern(str(t['id'])): t for t in res_tiles.data}
 
-        # Fetch avatars from profiles table
-        profile_map = {}
-        supabase = get_supabase()
-        if supabase:
-            player_ids = [p.id for p in self.players]
-            res_profiles = supabase.table('profiles').select('id, avatar_url').in_('id', player_ids).execute()
-            if res_profiles and res_profiles.data:
-                profile_map = {p['id']: p.get('avatar_url') for p in res_profiles.data}
+    def _player_fragments(self) -> Dict[str, Dict[str, Any]]:
+        """
+        The viewer-independent part of every player's projection, built once per revision
+        (and catalog version) and shared by all viewers (treat it as read-only).
+        """
+        key = (self.revision, card_views.version)
+        if self._fragments and self._fragments[0] == key:
+            return self._fragments[1]
+
+        # Fetch avatars from profiles table (only for players we haven't seen yet)
+        missing_ids = [p.id for p in self.players if p.id not in self._avatar_cache]
+        if missing_ids:
+            supabase = supabase_client()
+            self._avatar_cache.update({pid: None for pid in missing_ids})
+            if supabase:
+                res_profiles = supabase.table('profiles').select('id, avatar_url').in_('id', missing_ids).execute()
+                if res_profiles and res_profiles.data:
+                    self._avatar_cache.update({p['id']: p.get('avatar_url') for p in res_profiles.data})
+
+        tiles = DeceptionGame._tile_cache
+        fragments = {}
+        for p in self.players:
+            fragments[p.id] = {
+                "avatar_url": self._avatar_cache.get(str(p.id)),
+                "means_cards": enrich_cards(p.means_cards),
+                "clue_cards": enrich_cards(p.clue_cards),
+                "draft_means": enrich_cards(p.draft_pool_means),
+                "draft_clues": enrich_cards(p.draft_pool_clues),
+                # card_refs projections: bare ids (copied, so older snapshots keep their hands)
+                "means_ids": list(p.means_cards),
+                "clue_ids": list(p.clue_cards),
+                "draft_means_ids": list(p.draft_pool_means),
+                "draft_clues_ids": list(p.draft_pool_clues),
+                "active_tiles": [{**t, "image_url": tiles.get(str(t['id']), {}).get('image_url')} for t in p.active_tiles]
+            }
+        self._fragments = (key, fragments)
+        return fragments
+
+    @timed(STATE_BUILD_LATENCY)
+    @traced("deception.to_game_state")
+    def to_game_state(self, viewer_id: str = None, card_refs: bool = False) -> Dict[str, Any]:
+        """
+        Viewer-filtered state, as the plain dict GameState.model_dump() would produce.
+        Built directly from the per-revision player fragments: the data is server-generated,
+        so there is nothing for pydantic to validate on this path.
+        With card_refs, cards are sent as library ids only; clients resolve them against
+        the catalog bundle (GET /api/v1/game/catalog).
+        """
+        self._load_catalog()
+        fragments = self._player_fragments()
+
+        viewer = self.get_player(viewer_id) if viewer_id else None
+        viewer_role = viewer.role if viewer else None
+        sees_all = viewer_role == Role.FORENSIC_SCIENTIST
+        evil = viewer_role in (Role.MURDERER, Role.ACCOMPLICE)
 
-        # Convert DeceptionPlayers to API PlayerSchema with role filtering
-        api_players = []
+        players = []
         for p in self.players:
             # Determine if the viewer can see this player's role
-            should_see_role = False
-            
-            if viewer_id == p.id:
-                should_see_role = True # Player sees their own role
-            elif viewer_role == Role.FORENSIC_SCIENTIST:
-                should_see_role = True # FS sees everyone
-            elif viewer_role in [Role.MURDERER, Role.ACCOMPLICE] and p.role in [Role.MURDERER, Role.ACCOMPLICE, Role.FORENSIC_SCIENTIST]:
-                should_see_role = True # EVIL sees each other and FS
+            if viewer_id == p.id or sees_all:
+                should_see_role = True # Own role; the FS sees everyone
+            elif evil:
+                should_see_role = p.role in (Role.MURDERER, Role.ACCOMPLICE, Role.FORENSIC_SCIENTIST) # EVIL sees each other and FS
             elif viewer_role == Role.WITNESS and p.role == Role.MURDERER:
-                # Witness only sees the Murderer
-                should_see_role = True
-            elif p.role == Role.FORENSIC_SCIENTIST:
-                should_see_role = True # Everyone knows who the FS is
-
-            # Enrich cards with metadata
-            def enrich_cards(card_ids):
-                enriched = []
-                for cid in card_ids:
-                    card_data = DeceptionGame._card_cache.get(cid, {"id": cid, "content": "Unknown", "image_url": None})
-                    enriched.append({
-                        "id": cid,
-                        "name": card_data.get("name") or card_data.get("content") or cid,
-                        "content": card_data.get("content"),
-                        "image_url": card_data.get("image_url")
-                    })
-                return enriched
-
-            api_players.append(
-                PlayerSchema(
-                    id=p.id,
-                    name=p.name,
-                    is_host=p.is_host,
-                    is_ready=p.is_ready,
-                    metadata={
-                        "role": (p.role.value if p.role else None) if should_see_role else "UNKNOWN",
-                        "avatar_url": profile_map.get(str(p.id)),
-                        "seat_index": p.seat_index,
-                        "has_badge": p.has_badge,
-                        "means_cards": enrich_cards(p.means_cards),
-                        "clue_cards": enrich_cards(p.clue_cards),
-                        "draft_means": enrich_cards(p.draft_pool_means) if viewer_id == p.id else [],
-                        "draft_clues": enrich_cards(p.draft_pool_clues) if viewer_id == p.id else [],
-                        "has_drafted": p.has_drafted,
-                        "tiles_replaced": p.tiles_replaced,
-                        "active_tiles": [
-                            {
-                                **t,
-                                "image_url": DeceptionGame._tile_cache.get(str(t['id']), {}).get('image_url')
-                            } for t in p.active_tiles
-                        ]
-                    }
-                )
-            )
+                should_see_role = True # Witness only sees the Murderer
+            else:
+                should_see_role = p.role == Role.FORENSIC_SCIENTIST # Everyone knows who the FS is
+
+            fragment = fragments[p.id]
+            own = viewer_id == p.id
+            if card_refs:
+                means, clues = fragment["means_ids"], fragment["clue_ids"]
+                draft_means, draft_clues = (fragment["draft_means_ids"], fragment["draft_clues_ids"]) if own else ([], [])
+            else:
+                means, clues = fragment["means_cards"], fragment["clue_cards"]
+                draft_means, draft_clues = (fragment["draft_means"], fragment["draft_clues"]) if own else ([], [])
+            players.append({
+                "id": p.id,
+                "name": p.name,
+                "is_host": p.is_host,
+                "is_ready": p.is_ready,
+                "metadata": {
+                    "role": (p.role.value if p.role else None) if should_see_role else "UNKNOWN",
+                    "avatar_url": fragment["avatar_url"],
+                    "seat_index": p.seat_index,
+                    "has_badge": p.has_badge,
+                    "means_cards": means,
+                    "clue_cards": clues,
+                    "draft_means": draft_means,
+                    "draft_clues": draft_clues,
+                    "has_drafted": p.has_drafted,
+                    "tiles_replaced": p.tiles_replaced,
+                    "active_tiles": fragment["active_tiles"]
+                }
+            })
         
         # Determine visibility of crime info
         show_crime = False
@@ -127,58 +231,122 @@ class DeceptionGame(BaseRoom):
         elif self.status == GameStatus.GAME_OVER:
             show_crime = True # Everyone sees it at the end
 
-        # Prepare game-specific data for the 'data' field
-        def get_card_obj(cid):
-            if not cid: return None
-            card_data = DeceptionGame._card_cache.get(cid, {"id": cid, "name": cid, "content": "Unknown", "image_url": None})
-            return {
-                "id": cid,
-                "name": card_data.get("name") or card_data.get("content") or cid,
-                "content": card_data.get("content"),
-                "image_url": card_data.get("image_url")
-            }
+        if not show_crime:
+            means_card = clue_card = None
+        elif card_refs:
+            means_card, clue_card = self.means_id, self.clue_id
+        else:
+            means_card = card_view(self.means_id, unknown_name=self.means_id) if self.means_id else None
+            clue_card = card_view(self.clue_id, unknown_name=self.clue_id) if self.clue_id else None
 
-        game_data = {
-            "round": self.round,
-            "murderer_id": self.murderer_id if viewer_role in [Role.FORENSIC_SCIENTIST, Role.MURDERER, Role.ACCOMPLICE] else None,
-            "means_id": self.means_id if show_crime else None,
-            "clue_id": self.clue_id if show_crime else None,
-            "means_card": get_card_obj(self.means_id) if show_crime else None,
-            "clue_card": get_card_obj(self.clue_id) if show_crime else None,
-            "metadata": self.metadata
+        return {
+            "room_id": self.room_id,
+            "status": self.status,
+            "players": players,
+            "current_turn_owner": None,
+            "data": {
+                "round": self.round,
+                "murderer_id": self.murderer_id if viewer_role in [Role.FORENSIC_SCIENTIST, Role.MURDERER, Role.ACCOMPLICE] else None,
+                "means_id": self.means_id if show_crime else None,
+                "clue_id": self.clue_id if show_crime else None,
+                "means_card": means_card,
+                "clue_card": clue_card,
+                "spectator_delay": self.spectator_delay,
+                # A copy: snapshots must not alias the live dict or diff_state misses changes
+                "metadata": copy.deepcopy(self.metadata)
+            }
         }
-        
-        return GameState(
-            room_id=self.room_id,
-            status=self.status,
-            players=api_players,
-            current_turn_owner=None,
-            data=game_data
-        )
 
+    def projection_for(self, viewer_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Viewer-filtered state as a plain dict, cached per revision.
+        Seated players each have their own visibility class (own role, own draft pool)
+        and share the snapshots broadcast_state records; everyone else gets the public
+        projection, built once per revision.
+        """
+        if viewer_id and self.get_player(viewer_id):
+            cached = self._viewer_snapshots.get(viewer_id)
+            if cached and cached[0] == self.revision:
+                return cached[1]
+            state = self.to_game_state(viewer_id=viewer_id)
+            self._viewer_snapshots[viewer_id] = (self.revision, state)
+            return state
+
+        if self._public_snapshot and self._public_snapshot[0] == self.revision:
+            return self._public_snapshot[1]
+        state = self.to_game_state()
+        self._public_snapshot = (self.revision, state)
+        return state
+
+    def spectator_feed(self):
+        """The room's shared spectator feed, primed with the current public projection."""
+        from src.app.core.config import settings
+        from src.app.core.projection import feeds
+
+        feed = feeds.get_or_create(self.room_id, queue_size=settings.VIEWER_QUEUE_SIZE, delay=self.spectator_delay)
+        if feed.revision != self.revision:
+            feed.publish(self.revision, self.projection_for(None), time.time())
+        return feed
+
+    @traced("deception.broadcast_state")
     async def broadcast_state(self):
         """Broadcast individualized game states to each connected client."""
         from src.app.api.websocket import manager
-        from src.app.api.schemas import GameUpdateMessage, MessageType
         
+        started = time.perf_counter()
+        sent = 0
         try:
             # We must iterate over all known players in the game who might be connected
             for player in self.players:
-                state = self.to_game_state(viewer_id=player.id)
-                msg = GameUpdateMessage(
-                    type=MessageType.GAME_UPDATE,
-                    timestamp=time.time(),
-                    state=state
-                )
-                await manager.send_to_user(msg.model_dump(), self.room_id, player.id)
+                card_refs = manager.wants_card_refs(self.room_id, player.id)
+                state = self.to_game_state(viewer_id=player.id, card_refs=card_refs)
+                (self._ref_snapshots if card_refs else self._viewer_snapshots)[player.id] = (self.revision, state)
+                sent += await manager.send_to_user(update_message(self.revision, state), self.room_id, player.id) or 0
+
+            # Read-only viewers share one public projection per revision
+            from src.app.core.projection import feeds
+            feed = feeds.get(self.room_id)
+            if feed and feed.subscribers:
+                feed.set_delay(self.spectator_delay)
+                feed.publish(self.revision, self.projection_for(None), time.time())
         except Exception as e:
-            from src.app.core.logger import logger
-            logger.error(f"Error broadcasting state for room {self.room_id}: {e}")
+            from src.app.core.logger import limited
+            limited("deception.broadcast").error("Error broadcasting state for room {}: {}", self.room_id, e)
+        BROADCAST_LATENCY.observe(time.perf_counter() - started)
+        BROADCAST_BYTES.observe(sent)
+
+    async def send_state_to(self, player_id: str, last_seq: Optional[int] = None):
+        """
+        Send the current state to a single (reconnecting) client.
+        If the client's last acknowledged seq matches the snapshot we last sent it,
+        only the delta is sent; otherwise it gets a full snapshot.
+        """
+        from src.app.api.websocket import manager
+
+        card_refs = manager.wants_card_refs(self.room_id, player_id)
+        snapshots = self._ref_snapshots if card_refs else self._viewer_snapshots
+        state = self.to_game_state(viewer_id=player_id, card_refs=card_refs)
+        cached = snapshots.get(player_id)
+        snapshots[player_id] = (self.revision, state)
+
+        if last_seq is not None and cached and cached[0] == last_seq:
+            # Same shape as GameDeltaMessage.model_dump()
+            msg = {
+                "type": MessageType.GAME_DELTA,
+                "timestamp": time.time(),
+                "seq": self.revision,
+                "base_seq": last_seq,
+                "changes": diff_state(cached[1], state)
+            }
+        else:
+            msg = update_message(self.revision, state)
+        await manager.send_to_user(msg, self.room_id, player_id)
     
     async def save(self):
         """Save the current game state to Redis."""
         await state_manager.set_state(self.room_id, self)
 
+    @traced("deception.sync_to_supabase")
     def sync_to_supabase(self):
         """Sync critical game state to Supabase."""
         supabase = get_supabase()
@@ -216,8 +384,8 @@ class DeceptionGame(BaseRoom):
                 }).eq('id', player.db_id).execute()
                 
         except Exception as e:
-            from src.app.core.logger import logger
-            logger.error(f"Supabase sync error: {e}")
+            from src.app.core.logger import limited
+            limited("deception.sync").error("Supabase sync error: {}", e)
 
     async def start_game(self):
         if len(self.players) < 4:
@@ -259,8 +427,8 @@ class DeceptionGame(BaseRoom):
                 return
             all_cards = res.data
             
-            means_pool = [c['id'] for c in all_cards if str(c['type']).upper() == CardType.MEANS.value]
-            clue_pool = [c['id'] for c in all_cards if str(c['type']).upper() == CardType.CLUE.value]
+            means_pool = [card_ids.intern(str(c['id'])) for c in all_cards if str(c['type']).upper() == CardType.MEANS.value]
+            clue_pool = [card_ids.intern(str(c['id'])) for c in all_cards if str(c['type']).upper() == CardType.CLUE.value]
             
             random.shuffle(means_pool)
             random.shuffle(clue_pool)
@@ -285,18 +453,23 @@ class DeceptionGame(BaseRoom):
                 
         self.status = GameStatus.CARD_DRAFTING
         self.round = 1
-        await self.save()
-        self.sync_to_supabase()
+        # handle_event marks the room dirty, saves and broadcasts
         
+    @timed(EVENT_LATENCY, lambda self, player_id, event_type, *_args, **_kwargs: (event_type if event_type in EVENT_TYPES else "other",))
+    @traced("deception.handle_event")
     async def handle_event(self, player_id: str, event_type: str, data: Dict[str, Any]):
         player = self.get_player(player_id)
         if not player:
             return
+        previous_status = self.status
+        # Branches that await after changing state call mark_dirty() first, so long polls and
+        # delta sends never pair the new state with the old revision
+        previous_revision = self.revision
 
         if event_type == "start_game":
             if not player.is_host:
-                from src.app.core.logger import logger
-                logger.warning(f"Unauthorized start_game attempt by {player_id}")
+                from src.app.core.logger import limited
+                limited("deception.unauthorized").warning("Unauthorized start_game attempt by {}", player_id)
                 return # Forbidden
             await self.start_game()
         
@@ -342,6 +515,9 @@ class DeceptionGame(BaseRoom):
             is_host = player.is_host
             # Logic for removing player from state
             self.players = [p for p in self.players if p.id != player_id]
+            self.mark_dirty()
+            from src.app.core.lobby_index import lobby_index
+            await lobby_index.player_left(self.room_id, player_id)
             
             if is_host:
                 from src.app.core.logger import logger
@@ -353,6 +529,16 @@ class DeceptionGame(BaseRoom):
                 await self.close_game()
                 return
         
+        elif event_type == "set_spectator_delay":
+            if not player.is_host:
+                return
+            from src.app.core.config import settings
+            try:
+                delay = float(data.get("seconds") or 0)
+            except (TypeError, ValueError):
+                return
+            self.spectator_delay = min(max(delay, 0.0), settings.SPECTATOR_MAX_DELAY)
+
         elif event_type == "join_seat":
             seat = data.get("seat_index")
             if seat is not None:
@@ -367,9 +553,14 @@ class DeceptionGame(BaseRoom):
                 if all(mid in player.draft_pool_means for mid in selected_means) and \
                    all(cid in player.draft_pool_clues for cid in selected_clues):
                     
-                    player.means_cards = selected_means
-                    player.clue_cards = selected_clues
+                    player.means_cards = [card_ids.intern(mid) for mid in selected_means]
+                    player.clue_cards = [card_ids.intern(cid) for cid in selected_clues]
                     player.has_drafted = True
+                    suspects = [p for p in self.players if p.role != Role.FORENSIC_SCIENTIST]
+                    all_drafted = all(p.has_drafted for p in suspects)
+                    if all_drafted:
+                        self.status = GameStatus.CRIME_SELECTION
+                    self.mark_dirty()
                     
                     # Sync this player's cards to Supabase
                     supabase = get_supabase()
@@ -386,11 +577,7 @@ class DeceptionGame(BaseRoom):
                         supabase.table('game_cards').delete().eq('game_id', self.room_id).eq('player_id', target_player_id).execute()
                         supabase.table('game_cards').insert(game_cards).execute()
 
-                    # Check if all suspects are done drafting
-                    suspects = [p for p in self.players if p.role != Role.FORENSIC_SCIENTIST]
-                    if all(p.has_drafted for p in suspects):
-                        self.status = GameStatus.CRIME_SELECTION
-                        await self.save()
+                    if all_drafted:
                         # Notify murder committing
                         from src.app.api.websocket import manager
                         await manager.broadcast({
@@ -399,16 +586,13 @@ class DeceptionGame(BaseRoom):
                             "is_system": True,
                             "timestamp": time.time()
                         }, self.room_id)
-
-                    await self.save()
-                    self.sync_to_supabase()
                 
         elif event_type == "confirm_crime":
             if player.role != Role.MURDERER:
                 return # Only murderer can confirm crime
             
-            self.means_id = data.get("means_id")
-            self.clue_id = data.get("clue_id")
+            self.means_id = card_ids.canonical(data.get("means_id"))
+            self.clue_id = card_ids.canonical(data.get("clue_id"))
             if self.means_id and self.clue_id:
                 self.status = GameStatus.FORENSIC_SETUP
                 self.round = 1
@@ -483,7 +667,7 @@ class DeceptionGame(BaseRoom):
                         for i, tile in enumerate(player.active_tiles):
                             if str(tile['id']) == str(tile_id):
                                 player.active_tiles[i] = {
-                                    "id": str(new_tile["id"]),
+                                    "id": tile_ids.intern(str(new_tile["id"])),
                                     "title": new_tile["name"],
                                     "type": new_tile["type"],
                                     "options": new_tile["options"],
@@ -507,7 +691,13 @@ class DeceptionGame(BaseRoom):
                 # Murderer failed to find witness
                 self.status = GameStatus.GAME_OVER
                 self.metadata["winner"] = "GOOD"
-            
+
+        if self.revision == previous_revision:
+            self.mark_dirty()
+        if self.status != previous_status:
+            from src.app.core.lobby_index import lobby_index
+            await lobby_index.set_status([self.room_id], self.status.value)
+
         await self.save()
         self.sync_to_supabase()
         await self.broadcast_state()
@@ -535,7 +725,7 @@ class DeceptionGame(BaseRoom):
         
         fs_player.active_tiles = [
             {
-                "id": str(t["id"]),
+                "id": tile_ids.intern(str(t["id"])),
                 "title": t["name"],
                 "type": t["type"],
                 "options": t["options"],
@@ -554,6 +744,12 @@ class DeceptionGame(BaseRoom):
             supabase.table('games').delete().eq('id', self.room_id).execute()
         
         await state_manager.delete_state(self.room_id)
+        from src.app.core.lobby_index import lobby_index
+        await lobby_index.rooms_closed([self.room_id])
+        from src.app.core.room_codes import room_codes
+        await room_codes.release(self.room_code)
+        from src.app.games.deception.manager import game_manager
+        game_manager.remove_game(self.room_id)
         from src.app.core.logger import logger
         logger.info(f"Game room {self.room_id} has been fully closed and purged.")
 
@@ -587,7 +783,4 @@ class DeceptionGame(BaseRoom):
             p.has_badge = True
             p.means_cards = []
             p.clue_cards = []
-            
-        await self.save()
-        self.sync_to_supabase()
-        await self.broadcast_state()
+        # handle_event marks the room dirty, saves and broadcasts
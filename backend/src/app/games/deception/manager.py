@@ -1,30 +1,161 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
+import asyncio
+import time
+from src.app.core.config import settings
+from src.app.core.scheduler import room_compaction, room_expiry
+from src.app.core.lobby_index import lobby_index
+from src.app.core.logger import logger
+from .compact import CompactRoom
 from .logic import DeceptionGame, DeceptionPlayer
 
+# Close code sent to sockets still attached to a room when it is evicted
+ROOM_EXPIRED_CLOSE_CODE = 4009
+
 class GameManager:
     def __init__(self):
         self.games: Dict[str, DeceptionGame] = {}
+        # Resident rooms nobody has used for ROOM_COMPACT_AFTER (see compact.py)
+        self.compacted: Dict[str, CompactRoom] = {}
+
+    def _touch(self, room_id: str):
+        room_expiry.touch(room_id)
+        if settings.ROOM_COMPACT_AFTER > 0:
+            room_compaction.touch(room_id)
 
     def create_game(self, room_id: str, room_code: str, host_id: Optional[str] = None) -> DeceptionGame:
         game = DeceptionGame(room_id=room_id, room_code=room_code, host_id=host_id)
         self.games[room_id] = game
+        self._touch(room_id)
         return game
 
     async def get_game(self, room_id: str) -> Optional[DeceptionGame]:
         # Check memory first
-        if room_id in self.games:
-            return self.games[room_id]
+        game = self.games.get(room_id)
+        if game is None and room_id in self.compacted:
+            game = self.games[room_id] = self.compacted.pop(room_id).expand()
+        if game is not None:
+            self._touch(room_id)
+            return game
         
         # Check Redis
         from .logic import state_manager
         game = await state_manager.get_state(room_id, DeceptionGame)
         if game:
             self.games[room_id] = game
+            self._touch(room_id)
             return game
         return None
 
-    async def handle_player_connect(self, room_id: str, player_id: str, player_name: str, db_id: Optional[str] = None) -> DeceptionGame:
+    def resident(self, room_id: str) -> Optional[Union[DeceptionGame, CompactRoom]]:
+        """The room if it is held in memory, in either form; both have get_player() and players with last_seen/is_online."""
+        return self.games.get(room_id) or self.compacted.get(room_id)
+
+    def compact_rooms(self, room_ids: List[str]):
+        """Swap idle resident rooms to their compact form. Their state is already in Redis."""
+        from src.app.core.projection import feeds
+
+        for room_id in room_ids:
+            game = self.games.pop(room_id, None)
+            if game is not None:
+                self.compacted[room_id] = CompactRoom.pack(game)
+                feeds.close(room_id)
+        if room_ids:
+            logger.debug("Compacted {} idle rooms ({} compact, {} live)", len(room_ids), len(self.compacted), len(self.games))
+
+    def remove_game(self, room_id: str):
+        """Drop a room from memory (e.g. after it was closed)."""
+        from src.app.core.projection import feeds
+        self.games.pop(room_id, None)
+        self.compacted.pop(room_id, None)
+        room_expiry.remove(room_id)
+        room_compaction.remove(room_id)
+        feeds.close(room_id)
+
+    async def purge_rooms(self, room_ids: List[str]):
+        """
+        Drop rooms that no longer exist in Supabase: close their sockets, forget them
+        in memory and delete their Redis state and presence keys in one call.
+        """
+        from .logic import state_manager
+        from src.app.api.websocket import manager
+        from src.app.core.presence import presence
+        from src.app.core.room_codes import room_codes
+
+        # Only resident rooms still know their code; other codes expire or are never reissued
+        await room_codes.release_many([room.room_code for room in map(self.resident, room_ids) if room])
+
+        for room_id in room_ids:
+            if room_id in manager.active_connections:
+                await manager.close_room(room_id, code=ROOM_EXPIRED_CLOSE_CODE)
+            self.remove_game(room_id)
+            presence.forget_room(room_id)
+
+        await state_manager.delete_many(room_ids, extra_keys=[f"presence:{room_id}" for room_id in room_ids])
+        await presence.forget_rooms_in_redis(room_ids)
+        await lobby_index.rooms_closed(room_ids)
+
+    async def expire_rooms(self, room_ids: List[str]):
+        """
+        Evict idle rooms from memory in one batch: flush their state to Redis,
+        close any lingering sockets and mark them abandoned in Supabase.
+        """
+        from .logic import state_manager
+        from src.app.api.websocket import manager
+        from src.app.api.schemas import GameStatus
+        from src.app.core.presence import presence
+        from src.app.core.projection import feeds
+        from src.app.core.database import supabase_client
+
+        games = {room_id: self.games.pop(room_id) for room_id in room_ids if room_id in self.games}
+        for room_id in room_ids:
+            room_compaction.remove(room_id)
+            if room_id in self.compacted:
+                games[room_id] = self.compacted.pop(room_id).expand()
+        if not games:
+            return
+
+        # 1. Persistence (single pipelined round trip)
+        await state_manager.set_many(games)
+
+        # 2. Connection closure
+        for room_id in games:
+            await manager.close_room(room_id, code=ROOM_EXPIRED_CLOSE_CODE)
+            presence.forget_room(room_id)
+            feeds.close(room_id)
+
+        # 3. Supabase status (single UPDATE ... WHERE id IN (...))
+        supabase = supabase_client()
+        if supabase:
+            try:
+                await asyncio.to_thread(
+                    lambda: supabase.table('games')
+                        .update({"status": GameStatus.ABANDONED.value})
+                        .in_('id', list(games))
+                        .execute()
+                )
+            except Exception as e:
+                logger.error(f"Failed to mark {len(games)} expired rooms as abandoned: {e}")
+        await lobby_index.set_status(games, GameStatus.ABANDONED.value)
+
+        logger.info(f"Scavenger: evicted {len(games)} rooms")
+
+    async def handle_player_connect(
+        self,
+        room_id: str,
+        player_id: str,
+        player_name: str,
+        db_id: Optional[str] = None,
+        room_code: Optional[str] = None,
+        host_id: Optional[str] = None
+    ) -> DeceptionGame:
+        """
+        Seat a player in the resident room, loading or creating it as needed.
+        Callers that already know the room (e.g. from the join_game RPC) pass
+        room_code/host_id and db_id so Supabase is not consulted again.
+        """
         game = await self.get_game(room_id)
+        if not game and room_code:
+            game = self.create_game(room_id, room_code, host_id=host_id)
         if not game:
             # Fetch from Supabase to recover room info
             from src.app.core.database import get_supabase
@@ -37,6 +168,9 @@ class GameManager:
             else:
                 game = self.create_game(room_id, room_id)
             
+        if not db_id:
+            seated = game.get_player(player_id)
+            db_id = seated.db_id if seated else None
         if not db_id:
             # Try to fetch from database if missing (recovery scenario)
             from src.app.core.database import get_supabase
@@ -45,19 +179,51 @@ class GameManager:
             if p_res and p_res.data:
                 db_id = p_res.data[0]["id"]
 
+        changed = False
         player = game.get_player(player_id)
         if player:
             player.is_online = True
-            if db_id:
+            if player.name != player_name:
+                player.name = player_name
+                changed = True
+            if db_id and player.db_id != db_id:
                 player.db_id = db_id
+                changed = True
         else:
             player = DeceptionPlayer(id=player_id, name=player_name, db_id=db_id)
             game.add_player(player)
+            changed = True
 
         # Set host status accurately
-        player.is_host = (game.host_id == player_id)
-            
-        await game.save()
+        is_host = (game.host_id == player_id)
+        if player.is_host != is_host:
+            player.is_host = is_host
+            changed = True
+
+        if changed:
+            game.mark_dirty()
+            await game.save()
+        return game
+
+    async def handle_player_resume(self, room_id: str, player_id: str, db_id: Optional[str] = None) -> Optional[DeceptionGame]:
+        """
+        Fast path for reconnects that carry a valid resume token.
+        Only the resident room (memory or Redis) is consulted and nothing is persisted.
+        Returns None when the room or the player's seat is gone, so the caller
+        can fall back to the full handle_player_connect path.
+        """
+        game = await self.get_game(room_id)
+        if not game:
+            return None
+
+        player = game.get_player(player_id)
+        if not player:
+            return None
+
+        player.is_online = True
+        player.last_seen = time.time()
+        if db_id and not player.db_id:
+            player.db_id = db_id
         return game
 
 game_manager = GameManager()
@@ -1,19 +1,28 @@
-from fastapi import FastAPI, Depends, WebSocket, WebSocketDisconnect, Query, HTTPException
+from fastapi import FastAPI, Depends, WebSocket, WebSocketDisconnect, Query, HTTPException, Header
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from typing import Optional
+import asyncio
 import json
+import secrets
 import time
 from jose import jwt
 
 from src.app.core.config import settings
-from src.app.core.logger import logger
+from src.app.core.logger import logger, limited
 from src.app.core.scheduler import start_scheduler, stop_scheduler
+from src.app.core.presence import presence, start_presence, stop_presence
+from src.app.core.loop_monitor import start_loop_monitor, stop_loop_monitor
 from src.app.core.database import init_supabase
 from src.app.core.redis import init_redis, close_redis
 from src.app.core.auth import get_current_user
-from src.app.core.middleware import error_handling_middleware, rate_limit_middleware
+from src.app.core.session import session_tokens
+from src.app.core.middleware import error_handling_middleware, rate_limit_middleware, tracing_middleware
+from src.app.core.metrics import registry, WS_SENT_BYTES
+from src.app.core.tracing import tracer, init_tracing, shutdown_tracing
 from src.app.api.websocket import manager
-from src.app.api.schemas import GameUpdateMessage, MessageType
+from src.app.api.schemas import GameUpdateMessage, MessageType, SessionMessage
 from src.app.games.deception.manager import game_manager
 
 from src.app.api.v1.auth import router as auth_router
@@ -25,14 +34,20 @@ from src.app.api.v1.cron import router as cron_router
 async def lifespan(app: FastAPI):
     # Startup logic
     logger.info("Backend starting up...")
+    init_tracing()
     init_supabase()
     await init_redis()
     start_scheduler()
+    start_presence()
+    start_loop_monitor()
     yield
     # Shutdown logic
     logger.info("Backend shutting down...")
+    await stop_loop_monitor()
+    await stop_presence()
     await close_redis()
     stop_scheduler()
+    shutdown_tracing()
 
 tags_metadata = [
     {"name": "General", "description": "Basic server health and root endpoints."},
@@ -51,6 +66,7 @@ app = FastAPI(
 # Middlewares
 app.middleware("http")(error_handling_middleware)
 app.middleware("http")(rate_limit_middleware)
+app.middleware("http")(tracing_middleware)  # Registered last, so it wraps the whole stack
 
 app.add_middleware(
     CORSMiddleware,
@@ -74,8 +90,26 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", tags=["General"], response_class=PlainTextResponse)
+async def metrics(authorization: Optional[str] = Header(None)):
+    """Prometheus text exposition; requires `Authorization: Bearer <METRICS_TOKEN>`, and is disabled without a token."""
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=403, detail="Metrics endpoint disabled (METRICS_TOKEN is not set)")
+    if not secrets.compare_digest(authorization or "", f"Bearer {settings.METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.websocket("/ws/{room_id}/{client_id}/{player_name}")
-async def websocket_endpoint(websocket: WebSocket, room_id: str, client_id: str, player_name: str, token: str = Query(...)):
+async def websocket_endpoint(
+    websocket: WebSocket,
+    room_id: str,
+    client_id: str,
+    player_name: str,
+    token: str = Query(...),
+    resume: Optional[str] = Query(None, description="Resume token from a previous 'session' message"),
+    last_seq: Optional[int] = Query(None, description="Last room revision the client applied"),
+    cards: str = Query("full", description='"full" embeds card objects in states; "ref" sends library card ids, resolved against GET /api/v1/game/catalog')
+):
     from src.app.core.auth import verify_supabase_jwt
     try:
         # Using shared verification logic that supports HS256 and ES256/JWKS
@@ -83,35 +117,120 @@ async def websocket_endpoint(websocket: WebSocket, room_id: str, client_id: str,
         user_id = user_info.get("id")
         
         if user_id != client_id:
-            logger.warning(f"WebSocket Auth mismatch: token sub {user_id} != client_id {client_id}")
+            limited("ws.auth").warning("WebSocket Auth mismatch: token sub {} != client_id {}", user_id, client_id)
             await websocket.close(code=4003)
             return
     except Exception as e:
-        logger.error(f"WebSocket Auth Error: {e}")
+        limited("ws.auth").error("WebSocket Auth Error: {}", e)
         await websocket.close(code=4001)
         return
 
-    await manager.connect(websocket, room_id, client_id)
-    game = await game_manager.handle_player_connect(room_id, client_id, player_name)
+    await manager.connect(websocket, room_id, client_id, card_refs=(cards == "ref"))
+
+    # Reconnect fast path: a valid resume token lets us skip Supabase and the room-wide broadcast
+    game = None
+    claims = session_tokens.verify(resume, room_id, client_id) if resume else None
+    if claims:
+        game = await game_manager.handle_player_resume(room_id, client_id, db_id=claims.get("db_id"))
+
+    resumed = game is not None
+    if not resumed:
+        game = await game_manager.handle_player_connect(room_id, client_id, player_name)
     
     try:
-        # Initial broadcast on connect
-        await game.broadcast_state()
+        if resumed:
+            await game.send_state_to(client_id, last_seq=last_seq)
+        else:
+            # Initial broadcast on connect
+            await game.broadcast_state()
+
+        player = game.get_player(client_id)
+        await manager.send_to_user(SessionMessage(
+            type=MessageType.SESSION,
+            timestamp=time.time(),
+            resume_token=session_tokens.issue(room_id, client_id, db_id=player.db_id if player else None),
+            seq=game.revision
+        ).model_dump(), room_id, client_id)
 
         while True:
             data = await websocket.receive_text()
+            presence.touch(room_id, client_id)
             message = json.loads(data)
             event_type = message.get("type")
             event_data = message.get("data", {})
+
+            # Heartbeat frames only refresh presence
+            if event_type == MessageType.PONG.value:
+                continue
+            if event_type == MessageType.PING.value:
+                await websocket.send_json({"type": MessageType.PONG.value, "timestamp": time.time()})
+                continue
             
-            # handle_event will process logic and broadcast the new state
-            await game.handle_event(client_id, event_type, event_data)
+            # handle_event will process logic and broadcast the new state.
+            # Clients may send a W3C "traceparent" with the frame to join their own trace.
+            with tracer.start_trace("ws.event", traceparent=message.get("traceparent"), room_id=room_id, user_id=client_id, event=event_type):
+                await game.handle_event(client_id, event_type, event_data)
     except WebSocketDisconnect:
-        manager.disconnect(websocket, room_id, client_id)
+        if not manager.disconnect(websocket, room_id, client_id):
+            # A stale socket closing after the player resumed on a new one: they haven't left
+            return
+        if presence.was_reaped(room_id, client_id):
+            # Idle timeout: keep the seat so the client can resume
+            return
         # Ensure we trigger the leave logic for host exit closure
         await game.handle_event(client_id, "leave", {})
     except Exception as e:
-        logger.error(f"WebSocket Error: {e}")
+        limited("ws.error").error("WebSocket Error: {}", e)
         manager.disconnect(websocket, room_id, client_id)
         # Note: Do NOT call handle_event(leave) here, it purges the room on logic errors.
         # Let the host stay "online" until intentional disconnect or timeout.
+
+@app.websocket("/ws/{room_id}/spectate")
+async def spectator_endpoint(websocket: WebSocket, room_id: str, token: str = Query(...)):
+    """
+    Read-only view of a room. Spectators are not seated: they receive the room's
+    shared public projection frames (encoded once per revision, delayed when the
+    host has set a spectator delay) and everything they send except PING is ignored.
+    """
+    from src.app.core.auth import verify_supabase_jwt
+    from src.app.core.projection import feeds
+    try:
+        user_id = verify_supabase_jwt(token).get("id")
+    except Exception as e:
+        limited("ws.auth").error("Spectator Auth Error: {}", e)
+        await websocket.close(code=4001)
+        return
+
+    game = await game_manager.get_game(room_id)
+    if not game:
+        await websocket.close(code=4004)
+        return
+
+    await manager.connect_spectator(websocket, room_id, user_id)
+    queue = game.spectator_feed().subscribe()
+
+    sent = WS_SENT_BYTES.labels("spectator")
+
+    async def pump():
+        while True:
+            frame = await queue.get()
+            if frame is None:
+                await websocket.close(code=1000)
+                return
+            await websocket.send_text(frame.data)
+            sent.inc(len(frame.data))
+
+    sender = asyncio.create_task(pump())
+    try:
+        while True:
+            message = json.loads(await websocket.receive_text())
+            if message.get("type") == MessageType.PING.value:
+                await websocket.send_json({"type": MessageType.PONG.value, "timestamp": time.time()})
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        limited("ws.error").error("Spectator WebSocket Error: {}", e)
+    finally:
+        sender.cancel()
+        feeds.release(room_id, queue)
+        manager.disconnect_spectator(websocket, room_id)
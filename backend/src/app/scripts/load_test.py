@@ -0,0 +1,412 @@
+"""
+Load-generation harness: plays complete Deception games against the real FastAPI app.
+
+The app runs in a child uvicorn process with the in-memory Supabase backend
+(SUPABASE_BACKEND=memory, seeded with a synthetic library) and an HS256 test
+secret, so nothing but an (optional) local Redis is needed. Scripted bots
+create and join rooms over HTTP, connect over WebSocket and play every phase (ready,
+draft, crime, tiles, solve, witness) with random think times.
+
+Reported: p50/p95/p99 event-to-broadcast latency (an event is timed from send until
+the sender receives a state update with a higher seq), messages per second, and the
+server's CPU time and RSS growth per 100 rooms.
+
+Run from the backend directory:
+    python src/app/scripts/load_test.py --rooms 200 --players 6
+    python src/app/scripts/load_test.py --rooms 1000 --ramp 30 --json load.json
+
+Redis is taken from REDIS_HOST/REDIS_PORT; without it the app runs in its
+Redis-less fallback mode and the report says so.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add backend root to sys.path to allow imports
+sys.path.append(str(Path(__file__).parent.parent.parent.parent))
+
+# ---------------------------------------------------------------------------
+# Server (child process)
+# ---------------------------------------------------------------------------
+
+def serve(port: int):
+    """Child process: the real app, with the stand-in installed before startup."""
+    import uvicorn
+    from src.app.core import database
+    from src.app.core.config import settings
+    from src.app.core.memory_supabase import MemorySupabase, seed_library
+    from src.app.main import app
+
+    # Installed before startup so init_supabase keeps this seeded instance
+    database.supabase = MemorySupabase(latency=settings.SUPABASE_LATENCY_MS / 1000)
+    seed_library(database.supabase)
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", ws_max_queue=1024)
+
+# ---------------------------------------------------------------------------
+# Bots (driver side)
+# ---------------------------------------------------------------------------
+
+@dataclass
+class Stats:
+    latencies: List[float] = field(default_factory=list)
+    messages: int = 0
+    bytes: int = 0
+    events: int = 0
+    rooms_done: int = 0
+    rooms_failed: int = 0
+    errors: Dict[str, int] = field(default_factory=dict)
+
+    def error(self, kind: str):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+@dataclass
+class Table:
+    """What the bots at one table share outside the game: the seat count and the truth (for scripted solves)."""
+    players: int
+    crime: Dict[str, Any] = field(default_factory=dict)
+    over: asyncio.Event = field(default_factory=asyncio.Event)
+
+def make_token(secret: str, user_id: str, name: str) -> str:
+    from jose import jwt
+    # The backend base64-decodes the shared secret before verifying (see verify_supabase_jwt)
+    return jwt.encode({"sub": user_id, "email": f"{name}@load.test", "role": "authenticated"}, base64.b64decode(secret), algorithm="HS256")
+
+class Bot:
+    def __init__(self, name: str, secret: str, table: Table, stats: Stats, args):
+        self.user_id = str(uuid.uuid4())
+        self.name = name
+        self.token = make_token(secret, self.user_id, name)
+        self.table = table
+        self.stats = stats
+        self.args = args
+
+        self.state: Optional[Dict[str, Any]] = None
+        self.seq: Optional[int] = None
+        self.pending: List[tuple] = []  # (seq at send, perf_counter at send)
+        self.acting = False
+        self.ws = None
+
+    @property
+    def me(self) -> Dict[str, Any]:
+        return next((p for p in self.state["players"] if p["id"] == self.user_id), {"metadata": {}})
+
+    async def play(self, http, ws_base: str, game_id: str):
+        import websockets
+        url = f"{ws_base}/ws/{game_id}/{self.user_id}/{self.name}?token={self.token}"
+        async with websockets.connect(url, max_size=None) as ws:
+            self.ws = ws
+            async for raw in ws:
+                self.stats.messages += 1
+                self.stats.bytes += len(raw)
+                msg = json.loads(raw)
+                kind = msg.get("type")
+                if kind == "ping":
+                    await ws.send('{"type":"pong"}')
+                    continue
+                if kind == "game_update":
+                    self.state = msg["state"]
+                elif kind == "game_delta":
+                    from src.app.core.delta import apply_delta
+                    if self.state is None or msg.get("base_seq") != self.seq:
+                        self.stats.error("delta_gap")
+                        continue
+                    self.state = apply_delta(self.state, msg["changes"])
+                else:
+                    continue
+                self._observe(msg.get("seq"))
+                if self.state.get("status") == "GAME_OVER":
+                    self.table.over.set()
+                    return
+                if not self.acting:
+                    self.acting = True
+                    asyncio.create_task(self._act())
+
+    def _observe(self, seq: Optional[int]):
+        if seq is None:
+            return
+        self.seq = seq
+        now = time.perf_counter()
+        while self.pending and self.pending[0][0] < seq:
+            self.stats.latencies.append(now - self.pending.pop(0)[1])
+
+    async def _act(self):
+        try:
+            await asyncio.sleep(random.uniform(*self.args.think))
+            action = self.decide()
+            if action and not self.table.over.is_set():
+                event_type, data = action
+                self.pending.append((self.seq, time.perf_counter()))
+                self.stats.events += 1
+                await self.ws.send(json.dumps({"type": event_type, "data": data}))
+        except Exception as e:
+            self.stats.error(type(e).__name__)
+        finally:
+            self.acting = False
+
+    def decide(self) -> Optional[tuple]:
+        """The next move for the current state, or None. Re-evaluated after every update."""
+        state, me = self.state, self.me
+        meta = me["metadata"]
+        status, role = state["status"], meta.get("role")
+        players = state["players"]
+        others = [p for p in players if p["id"] != self.user_id]
+
+        if status == "LOBBY":
+            if me.get("is_host"):
+                if len(players) == self.table.players and all(p["is_ready"] for p in others):
+                    return "start_game", {}
+            elif not me.get("is_ready"):
+                return "ready", {}
+
+        elif status == "CARD_DRAFTING":
+            if role != "FORENSIC_SCIENTIST" and not meta.get("has_drafted") and len(meta.get("draft_means", [])) >= 5:
+                means = random.sample([c["id"] for c in meta["draft_means"]], 5)
+                clues = random.sample([c["id"] for c in meta["draft_clues"]], 5)
+                return "confirm_draft", {"selected_means": means, "selected_clues": clues}
+
+        elif status == "CRIME_SELECTION":
+            if role == "MURDERER" and meta.get("means_cards"):
+                crime = {
+                    "suspect_id": self.user_id,
+                    "means_id": random.choice(meta["means_cards"])["id"],
+                    "clue_id": random.choice(meta["clue_cards"])["id"]
+                }
+                self.table.crime = crime
+                return "confirm_crime", {"means_id": crime["means_id"], "clue_id": crime["clue_id"]}
+
+        elif status == "FORENSIC_SETUP":
+            if role == "FORENSIC_SCIENTIST":
+                open_tiles = [t for t in meta.get("active_tiles", []) if t.get("selected_option") is None]
+                if open_tiles:
+                    tile = open_tiles[0]
+                    return "select_tile_option", {"tile_id": tile["id"], "option_index": random.randrange(len(tile["options"]))}
+                return "confirm_tiles", {}
+
+        elif status == "INVESTIGATION":
+            if role in ("INVESTIGATOR", "WITNESS") and meta.get("has_badge"):
+                if self.table.crime and random.random() < self.args.solve_rate:
+                    return "solve", self.table.crime
+                suspects = [p for p in others if p["metadata"].get("means_cards")]
+                suspect = random.choice(suspects)
+                return "solve", {
+                    "suspect_id": suspect["id"],
+                    "means_id": random.choice(suspect["metadata"]["means_cards"])["id"],
+                    "clue_id": random.choice(suspect["metadata"]["clue_cards"])["id"]
+                }
+
+        elif status == "WITNESS_IDENTIFICATION":
+            if role == "MURDERER":
+                targets = [p for p in others if p["metadata"].get("role") not in ("FORENSIC_SCIENTIST", "ACCOMPLICE")]
+                return "identify_witness", {"target_id": random.choice(targets)["id"]}
+        return None
+
+async def run_room(index: int, http, ws_base: str, secret: str, stats: Stats, args):
+    table = Table(players=args.players)
+    bots = [Bot(f"bot{index}_{i}", secret, table, stats, args) for i in range(args.players)]
+    host = bots[0]
+    try:
+        res = await http.post("/api/v1/game/create", json={"name": f"Load {index}", "is_public": True},
+                              headers={"Authorization": f"Bearer {host.token}"})
+        res.raise_for_status()
+        created = res.json()
+        for bot in bots[1:]:
+            res = await http.post("/api/v1/game/join", json={"room_code": created["room_code"], "name": bot.name},
+                                  headers={"Authorization": f"Bearer {bot.token}"})
+            res.raise_for_status()
+
+        tasks = [asyncio.create_task(bot.play(http, ws_base, created["game_id"])) for bot in bots]
+        try:
+            await asyncio.wait_for(table.over.wait(), args.room_timeout)
+            stats.rooms_done += 1
+        finally:
+            await asyncio.sleep(0.1)  # let the last broadcast land before hanging up
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    except Exception as e:
+        stats.rooms_failed += 1
+        stats.error(f"room:{type(e).__name__}")
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+class ProcessSampler:
+    """CPU seconds and RSS of the server process (psutil when available, else /proc)."""
+    def __init__(self, pid: int):
+        self.pid = pid
+        try:
+            import psutil
+            self._proc = psutil.Process(pid)
+        except Exception:
+            self._proc = None
+
+    def sample(self) -> Optional[tuple]:
+        try:
+            if self._proc:
+                cpu = self._proc.cpu_times()
+                return cpu.user + cpu.system, self._proc.memory_info().rss
+            with open(f"/proc/{self.pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            ticks = os.sysconf("SC_CLK_TCK")
+            with open(f"/proc/{self.pid}/statm") as f:
+                rss_pages = int(f.read().split()[1])
+            return (int(fields[11]) + int(fields[12])) / ticks, rss_pages * os.sysconf("SC_PAGE_SIZE")
+        except Exception:
+            return None
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+async def wait_healthy(http, server: subprocess.Popen, timeout: float = 20.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"server exited with code {server.returncode}")
+        try:
+            if (await http.get("/health")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not become healthy")
+
+async def drive(args) -> Dict[str, Any]:
+    import httpx
+
+    port = args.port or free_port()
+    secret = base64.b64encode(os.urandom(32)).decode()
+    env = {
+        **os.environ,
+        "SUPABASE_BACKEND": "memory",
+        "SUPABASE_LATENCY_MS": str(args.db_latency_ms),
+        "SUPABASE_JWT_SECRET": secret,
+        "RATE_LIMIT_PER_MINUTE": "0",
+    }
+    server = subprocess.Popen([sys.executable, __file__, "--serve", str(port)], env=env)
+    sampler = ProcessSampler(server.pid)
+    stats = Stats()
+    base = f"http://127.0.0.1:{port}"
+
+    try:
+        limits = httpx.Limits(max_connections=args.http_connections, max_keepalive_connections=args.http_connections)
+        async with httpx.AsyncClient(base_url=base, limits=limits, timeout=30.0) as http:
+            await wait_healthy(http, server)
+            start_cpu, start_rss = sampler.sample() or (None, None)
+            peak_rss = start_rss or 0
+
+            async def watch():
+                nonlocal peak_rss
+                while True:
+                    await asyncio.sleep(1.0)
+                    sample = sampler.sample()
+                    if sample:
+                        peak_rss = max(peak_rss, sample[1])
+
+            watcher = asyncio.create_task(watch())
+            started = time.perf_counter()
+
+            async def launch(i):
+                await asyncio.sleep(args.ramp * i / max(args.rooms, 1))
+                await run_room(i, http, f"ws://127.0.0.1:{port}", secret, stats, args)
+
+            await asyncio.gather(*(launch(i) for i in range(args.rooms)))
+            elapsed = time.perf_counter() - started
+            watcher.cancel()
+            end_cpu, end_rss = sampler.sample() or (None, None)
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    per_100 = 100 / max(args.rooms, 1)
+    cpu_used = (end_cpu - start_cpu) if start_cpu is not None and end_cpu is not None else None
+    return {
+        "rooms": args.rooms,
+        "players_per_room": args.players,
+        "redis": await redis_available(),
+        "duration_s": round(elapsed, 3),
+        "rooms_completed": stats.rooms_done,
+        "rooms_failed": stats.rooms_failed,
+        "events_sent": stats.events,
+        "latency_ms": {
+            name: round(value * 1000, 2) if value is not None else None
+            for name, value in (("p50", percentile(stats.latencies, 50)), ("p95", percentile(stats.latencies, 95)), ("p99", percentile(stats.latencies, 99)))
+        },
+        "latency_samples": len(stats.latencies),
+        "messages_received": stats.messages,
+        "messages_per_s": round(stats.messages / elapsed, 1) if elapsed else None,
+        "bytes_per_s": round(stats.bytes / elapsed, 1) if elapsed else None,
+        "server_cpu_s": round(cpu_used, 3) if cpu_used is not None else None,
+        "server_cpu_s_per_100_rooms": round(cpu_used * per_100, 3) if cpu_used is not None else None,
+        "server_rss_mb_peak": round(peak_rss / 2**20, 1) if peak_rss else None,
+        "server_rss_mb_per_100_rooms": round((end_rss - start_rss) / 2**20 * per_100, 2) if start_rss and end_rss else None,
+        "errors": stats.errors,
+    }
+
+async def redis_available() -> bool:
+    from src.app.core.redis import init_redis, get_redis, close_redis
+    await init_redis()
+    ok = get_redis() is not None
+    await close_redis()
+    return ok
+
+def print_report(report: Dict[str, Any]):
+    lat = report["latency_ms"]
+    print(f"\nrooms: {report['rooms_completed']}/{report['rooms']} completed ({report['players_per_room']} players, redis {'on' if report['redis'] else 'off'}) in {report['duration_s']}s")
+    print(f"event->broadcast latency: p50 {lat['p50']} ms, p95 {lat['p95']} ms, p99 {lat['p99']} ms ({report['latency_samples']} samples)")
+    print(f"messages: {report['messages_received']} received, {report['messages_per_s']}/s")
+    print(f"server: {report['server_cpu_s_per_100_rooms']} CPU s and {report['server_rss_mb_per_100_rooms']} MB RSS per 100 rooms (peak RSS {report['server_rss_mb_peak']} MB)")
+    if report["errors"]:
+        print(f"errors: {report['errors']}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=50, help="rooms to play (each a full game)")
+    parser.add_argument("--players", type=int, default=6, help="players per room (4-12)")
+    parser.add_argument("--ramp", type=float, default=5.0, help="seconds over which room starts are spread")
+    parser.add_argument("--think", type=float, nargs=2, default=(0.2, 1.5), metavar=("MIN", "MAX"), help="bot think time range in seconds")
+    parser.add_argument("--solve-rate", type=float, default=0.3, help="chance a badge holder makes the correct accusation")
+    parser.add_argument("--room-timeout", type=float, default=300.0, help="give up on a room after this many seconds")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0, help="injected latency per Supabase call")
+    parser.add_argument("--http-connections", type=int, default=100)
+    parser.add_argument("--port", type=int, default=None, help="server port (default: a free one)")
+    parser.add_argument("--json", type=str, default=None, help="also write the report to this file")
+    parser.add_argument("--serve", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if not 4 <= args.players <= 12:
+        parser.error("--players must be between 4 and 12")
+    return args
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.serve:
+        serve(args.serve)
+        sys.exit(0)
+
+    report = asyncio.run(drive(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
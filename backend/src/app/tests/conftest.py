@@ -0,0 +1,11 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+# Keep test runs from writing into the repo's logs/: point file outputs at a throwaway
+# directory before any test imports the settings.
+_log_dir = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ["LOG_FILE"] = os.path.join(_log_dir, "app.log")
+os.environ["TRACE_FILE"] = os.path.join(_log_dir, "traces.jsonl")
+atexit.register(shutil.rmtree, _log_dir, ignore_errors=True)
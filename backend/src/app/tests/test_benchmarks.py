@@ -0,0 +1,329 @@
+"""
+Micro-benchmarks for the Deception hot paths, at 4, 8, 12 and 16 players.
+
+Opt-in (they take a while and need a quiet machine):
+    BENCHMARK=1 python -m pytest -q src/app/tests/test_benchmarks.py
+
+Each benchmark takes per-call samples for BENCHMARK_TIME seconds and compares the
+fastest sample with tests/benchmarks/baseline.json, failing when it is more than
+BENCHMARK_TOLERANCE (default 1.0 = 2x) slower. The default is meant to catch
+algorithmic regressions on shared machines; tighten it on a dedicated runner.
+The median is recorded too, for reading trends. Memory per resident room (pydantic
+model vs compact form) is recorded in bytes and may grow by BENCHMARK_MEMORY_TOLERANCE
+(default 0.1) before failing. BENCHMARK_UPDATE=1 rewrites the
+baseline from this run and BENCHMARK_OUTPUT=<path> writes the results elsewhere;
+commit the baseline with the change that moves it so the diff shows up in review.
+
+Supabase is the in-memory backend (no injected latency) and Redis is absent, so the
+numbers are the game's own CPU cost.
+"""
+import sys
+import os
+import asyncio
+import base64
+import gc
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+if not os.environ.get("BENCHMARK"):
+    pytest.skip("benchmarks are opt-in: set BENCHMARK=1", allow_module_level=True)
+
+from src.app.api.schemas import GameStatus, Role
+from src.app.core import auth, database
+from src.app.core.memory_supabase import MemorySupabase, seed_library
+from src.app.games.deception.compact import CompactRoom
+from src.app.games.deception.logic import DeceptionGame, DeceptionPlayer
+
+PLAYER_COUNTS = [4, 8, 12, 16]
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "baseline.json")
+BENCH_TIME = float(os.environ.get("BENCHMARK_TIME", "0.3"))
+TOLERANCE = float(os.environ.get("BENCHMARK_TOLERANCE", "1.0"))
+MEMORY_TOLERANCE = float(os.environ.get("BENCHMARK_MEMORY_TOLERANCE", "0.1"))
+
+RESULTS = {}
+
+@pytest.fixture(scope="module", autouse=True)
+def environment():
+    db = MemorySupabase(seed=0)
+    seed_library(db)
+    cards = db.table("library_cards").select("id, content, image_url").execute().data
+    tiles = db.table("library_tiles").select("id, name").execute().data
+    previous = {name: DeceptionGame.__dict__.get(name) for name in ("_card_cache", "_tile_cache")}
+    DeceptionGame._card_cache = {str(c["id"]): c for c in cards}
+    DeceptionGame._tile_cache = {str(t["id"]): t for t in tiles}
+
+    with patch.object(database, "supabase", db):
+        yield
+
+    for name, value in previous.items():
+        if value is None:
+            delattr(DeceptionGame, name)
+        else:
+            setattr(DeceptionGame, name, value)
+    write_results()
+
+def write_results():
+    if not RESULTS:
+        return
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": f"{platform.system()} {platform.machine()}",
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "bench_time_s": BENCH_TIME
+        },
+        "results": dict(sorted(RESULTS.items()))
+    }
+    targets = [os.environ["BENCHMARK_OUTPUT"]] if os.environ.get("BENCHMARK_OUTPUT") else []
+    if os.environ.get("BENCHMARK_UPDATE"):
+        targets.append(BASELINE_PATH)
+    for path in targets:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+def load_baseline():
+    try:
+        with open(BASELINE_PATH) as f:
+            return json.load(f).get("results", {})
+    except FileNotFoundError:
+        return {}
+
+BASELINE = load_baseline()
+
+def record(name, samples):
+    """Store the result and check it against the baseline."""
+    best = min(samples) * 1e6
+    RESULTS[name] = {"min_us": round(best, 2), "median_us": round(statistics.median(samples) * 1e6, 2), "samples": len(samples)}
+    base = BASELINE.get(name)
+    if base and not os.environ.get("BENCHMARK_UPDATE"):
+        limit = base["min_us"] * (1 + TOLERANCE)
+        assert best <= limit, f"{name}: {best:.1f}us vs baseline {base['min_us']}us (+{TOLERANCE:.0%} allowed)"
+
+def record_memory(name, nbytes):
+    RESULTS[name] = {"bytes": nbytes}
+    base = BASELINE.get(name)
+    if base and not os.environ.get("BENCHMARK_UPDATE"):
+        limit = base["bytes"] * (1 + MEMORY_TOLERANCE)
+        assert nbytes <= limit, f"{name}: {nbytes} bytes vs baseline {base['bytes']} (+{MEMORY_TOLERANCE:.0%} allowed)"
+
+def allocated_per_object(build, count=50):
+    """Average bytes still allocated per object after building `count` of them."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        objects = [build() for _ in range(count)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return (after - before) // len(objects)
+
+def bench(name, fn, setup=None):
+    """Time fn(*setup()) per call until BENCH_TIME has been spent; setup is not timed."""
+    samples = []
+    deadline = time.perf_counter() + BENCH_TIME
+    while time.perf_counter() < deadline or len(samples) < 5:
+        args = setup() if setup else ()
+        gc.disable()  # As timeit does: collections land on random samples otherwise
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+        gc.enable()
+    record(name, samples)
+
+def abench(name, fn, setup=None):
+    """Async variant of bench(): every sample runs on the same event loop."""
+    async def run():
+        samples = []
+        deadline = time.perf_counter() + BENCH_TIME
+        while time.perf_counter() < deadline or len(samples) < 5:
+            args = setup() if setup else ()
+            gc.disable()
+            start = time.perf_counter()
+            await fn(*args)
+            samples.append(time.perf_counter() - start)
+            gc.enable()
+        return samples
+    record(name, asyncio.run(run()))
+
+# --- Fixtures: one template game per phase and table size, copied per sample ---
+
+def lobby(n):
+    game = DeceptionGame(room_id=f"bench-{n}", room_code="BENCH1", host_id="p0")
+    for i in range(n):
+        game.add_player(DeceptionPlayer(id=f"p{i}", name=f"Player {i}", is_host=(i == 0), seat_index=i))
+    game._avatar_cache.update({p.id: None for p in game.players})
+    return game
+
+def by_role(game, role):
+    return next(p for p in game.players if p.role == role)
+
+async def advance(game, status):
+    """Play a fresh lobby forward to `status` with scripted (always valid) moves."""
+    await game.start_game()
+    if status == GameStatus.CARD_DRAFTING:
+        return game
+    for p in game.players:
+        if p.role != Role.FORENSIC_SCIENTIST:
+            await game.handle_event(p.id, "confirm_draft", {"selected_means": p.draft_pool_means[:5], "selected_clues": p.draft_pool_clues[:5]})
+    if status == GameStatus.CRIME_SELECTION:
+        return game
+    murderer = by_role(game, Role.MURDERER)
+    await game.handle_event(murderer.id, "confirm_crime", {"means_id": murderer.means_cards[0], "clue_id": murderer.clue_cards[0]})
+    if status == GameStatus.FORENSIC_SETUP:
+        return game
+    await game.handle_event(by_role(game, Role.FORENSIC_SCIENTIST).id, "confirm_tiles", {})
+    if status == GameStatus.INVESTIGATION:
+        return game
+    await game.handle_event(by_role(game, Role.WITNESS).id, "solve", {"suspect_id": murderer.id, "means_id": game.means_id, "clue_id": game.clue_id})
+    assert game.status == GameStatus.WITNESS_IDENTIFICATION
+    return game
+
+TEMPLATES = {}
+
+def template(n, status):
+    key = (n, status)
+    if key not in TEMPLATES:
+        game = lobby(n)
+        if status != GameStatus.LOBBY:
+            asyncio.run(advance(game, status))
+        TEMPLATES[key] = game
+    return TEMPLATES[key]
+
+def fresh(n, status):
+    return template(n, status).model_copy(deep=True)
+
+# --- Benchmarks ---
+
+@pytest.mark.parametrize("n", PLAYER_COUNTS)
+def test_to_game_state_per_viewer(n):
+    game = template(n, GameStatus.INVESTIGATION)
+    viewer = by_role(game, Role.INVESTIGATOR if n > 4 else Role.WITNESS).id
+    bench(f"to_game_state[{n}]", lambda: game.to_game_state(viewer_id=viewer))
+
+@pytest.mark.parametrize("n", PLAYER_COUNTS)
+def test_broadcast_state(n):
+    game = template(n, GameStatus.INVESTIGATION)
+    abench(f"broadcast_state[{n}]", game.broadcast_state)
+
+    # What a broadcast costs right after a state change: the per-revision player fragments are rebuilt too
+    def changed():
+        game.mark_dirty()
+        return ()
+    abench(f"broadcast_state_after_change[{n}]", game.broadcast_state, setup=changed)
+
+@pytest.mark.parametrize("n", PLAYER_COUNTS)
+def test_redis_state_round_trip(n):
+    # What RedisStateManager does on set_state/get_state
+    game = template(n, GameStatus.INVESTIGATION)
+    payload = game.model_dump_json()
+    bench(f"model_dump_json[{n}]", game.model_dump_json)
+    bench(f"model_validate_json[{n}]", lambda: DeceptionGame.model_validate_json(payload))
+
+@pytest.mark.parametrize("n", PLAYER_COUNTS)
+def test_memory_per_room(n):
+    # A resident room as it comes back from Redis (every string freshly allocated), and its compact form
+    payload = template(n, GameStatus.INVESTIGATION).model_dump_json()
+    CompactRoom.pack(DeceptionGame.model_validate_json(payload))  # Interns the catalog ids outside the measurement
+    pydantic_bytes = allocated_per_object(lambda: DeceptionGame.model_validate_json(payload))
+    compact_bytes = allocated_per_object(lambda: CompactRoom.pack(DeceptionGame.model_validate_json(payload)))
+    record_memory(f"room_bytes[{n}]", pydantic_bytes)
+    record_memory(f"room_bytes_compact[{n}]", compact_bytes)
+    assert compact_bytes < pydantic_bytes
+
+@pytest.mark.parametrize("n", PLAYER_COUNTS)
+def test_start_game_dealing(n):
+    abench(f"start_game[{n}]", lambda game: game.start_game(), setup=lambda: (fresh(n, GameStatus.LOBBY),))
+
+def event_cases(n):
+    """(event, phase, actor, data) for every event type handle_event knows."""
+    def actor(role=None, host=False, pick=None):
+        def choose(game):
+            if host:
+                return game.players[0]
+            if pick:
+                return pick(game)
+            return by_role(game, role)
+        return choose
+
+    def suspect(game):
+        return next(p for p in game.players if p.role not in (Role.FORENSIC_SCIENTIST,))
+
+    def badge_holder(game):
+        return next(p for p in game.players if p.role in (Role.INVESTIGATOR, Role.WITNESS))
+
+    lobby_guest = lambda game: game.players[-1]
+    return [
+        ("ready", GameStatus.LOBBY, actor(pick=lobby_guest), lambda g, p: {}),
+        ("chat", GameStatus.LOBBY, actor(pick=lobby_guest), lambda g, p: {"message": "hello table"}),
+        ("join_seat", GameStatus.LOBBY, actor(pick=lobby_guest), lambda g, p: {"seat_index": 3}),
+        ("leave", GameStatus.LOBBY, actor(pick=lobby_guest), lambda g, p: {}),
+        ("start_game", GameStatus.LOBBY, actor(host=True), lambda g, p: {}),
+        ("confirm_draft", GameStatus.CARD_DRAFTING, actor(pick=suspect),
+            lambda g, p: {"selected_means": p.draft_pool_means[:5], "selected_clues": p.draft_pool_clues[:5]}),
+        ("confirm_crime", GameStatus.CRIME_SELECTION, actor(Role.MURDERER),
+            lambda g, p: {"means_id": p.means_cards[0], "clue_id": p.clue_cards[0]}),
+        ("select_tile_option", GameStatus.FORENSIC_SETUP, actor(Role.FORENSIC_SCIENTIST),
+            lambda g, p: {"tile_id": p.active_tiles[0]["id"], "option_index": 2}),
+        ("replace_tile", GameStatus.FORENSIC_SETUP, actor(Role.FORENSIC_SCIENTIST),
+            lambda g, p: {"tile_id": p.active_tiles[-1]["id"]}),
+        ("confirm_tiles", GameStatus.FORENSIC_SETUP, actor(Role.FORENSIC_SCIENTIST), lambda g, p: {}),
+        ("solve", GameStatus.INVESTIGATION, actor(pick=badge_holder),
+            lambda g, p: {"suspect_id": g.players[0].id, "means_id": "wrong", "clue_id": "wrong"}),
+        ("reset_game", GameStatus.INVESTIGATION, actor(host=True), lambda g, p: {}),
+        ("identify_witness", GameStatus.WITNESS_IDENTIFICATION, actor(Role.MURDERER),
+            lambda g, p: {"target_id": by_role(g, Role.WITNESS).id}),
+    ]
+
+EVENT_NAMES = [case[0] for case in event_cases(4)]
+
+@pytest.mark.parametrize("n", PLAYER_COUNTS)
+@pytest.mark.parametrize("event", EVENT_NAMES)
+def test_handle_event(event, n):
+    _, phase, choose, make_data = next(case for case in event_cases(n) if case[0] == event)
+    template(n, phase)  # Built outside the benchmark's event loop
+
+    def setup():
+        game = fresh(n, phase)
+        player = choose(game)
+        return game, player.id, make_data(game, player)
+
+    abench(f"handle_event:{event}[{n}]", lambda game, pid, data: game.handle_event(pid, event, data), setup=setup)
+
+def test_verify_jwt_hs256():
+    from jose import jwt
+    secret = base64.b64encode(b"benchmark-secret-benchmark-secret").decode()
+    token = jwt.encode({"sub": "user", "email": "bench@example.com", "role": "authenticated"}, base64.b64decode(secret), algorithm="HS256")
+    with patch.object(auth.settings, "SUPABASE_JWT_SECRET", secret):
+        bench("verify_supabase_jwt:HS256", lambda: auth.verify_supabase_jwt(token))
+
+def test_verify_jwt_es256():
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from jose import jwk, jwt
+
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    pem = private_key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    public = jwk.construct(private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ), algorithm="ES256").to_dict()
+    public.update(kid="bench-key", alg="ES256")
+    token = jwt.encode({"sub": "user", "role": "authenticated"}, pem, algorithm="ES256", headers={"kid": "bench-key"})
+
+    # Warm JWKS cache: no network inside the timed region (as in steady state)
+    client = auth.JWKSClient("https://example.invalid/auth/v1/.well-known/jwks.json")
+    client.keys, client.last_fetch = [public], time.time()
+    with patch.object(auth.settings, "SUPABASE_JWT_SECRET", "unused-for-es256"), patch.object(auth, "jwks_client", client):
+        bench("verify_supabase_jwt:ES256", lambda: auth.verify_supabase_jwt(token))
@@ -0,0 +1,131 @@
+import sys
+import os
+import asyncio
+from array import array
+from unittest.mock import AsyncMock, patch
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from src.app.api.schemas import GameStatus, Role
+from src.app.games.deception.compact import CompactPlayer, CompactRoom, CompactTiles
+from src.app.games.deception.logic import DeceptionGame, DeceptionPlayer
+from src.app.games.deception.manager import game_manager
+
+def make_game(room_id="room-compact"):
+    game = DeceptionGame(room_id=room_id, room_code="CMPCT1", host_id="u1", status=GameStatus.INVESTIGATION, round=2,
+                         murderer_id="u2", means_id="m1", clue_id="c1", metadata={"winner": None})
+    for i, role in enumerate([Role.FORENSIC_SCIENTIST, Role.MURDERER, Role.INVESTIGATOR], start=1):
+        game.add_player(DeceptionPlayer(id=f"u{i}", name=f"P{i}", role=role, is_host=(i == 1), seat_index=i))
+    fs, murderer, investigator = game.players
+    fs.active_tiles = [
+        {"id": "t1", "title": "Cause", "type": "CAUSE_OF_DEATH", "options": ["A", "B"], "selected_option": 1},
+        {"id": "t2", "title": "Room", "type": "LOCATION", "options": ["C"], "selected_option": None},
+    ]
+    for p in (murderer, investigator):
+        p.draft_pool_means = [f"m{i}" for i in range(10)]
+        p.draft_pool_clues = [f"c{i}" for i in range(10)]
+        p.means_cards, p.clue_cards = p.draft_pool_means[:5], p.draft_pool_clues[:5]
+        p.has_drafted = True
+    investigator.has_badge = False
+    investigator.metadata = {"note": "x"}
+    return game
+
+def test_compact_slots_cover_every_model_field():
+    assert set(CompactRoom.__slots__) == set(DeceptionGame.model_fields)
+    assert set(CompactPlayer.__slots__) == set(DeceptionPlayer.model_fields)
+
+def test_pack_and_expand_round_trip():
+    game = make_game()
+    compact = CompactRoom.pack(game)
+
+    murderer = compact.players[1]
+    assert isinstance(murderer.draft_pool_means, array) and len(murderer.draft_pool_means) == 10
+    assert isinstance(compact.players[0].active_tiles, CompactTiles)
+    assert compact.players[0].means_cards is None  # Empty hands take no array at all
+
+    expanded = compact.expand()
+    assert isinstance(expanded, DeceptionGame) and isinstance(expanded.players[0], DeceptionPlayer)
+    assert expanded.model_dump() == game.model_dump()
+    assert DeceptionGame.model_validate_json(expanded.model_dump_json()) == expanded
+    # Card ids come back as the catalog's shared strings
+    other = CompactRoom.pack(make_game("room-other")).expand()
+    assert other.players[1].means_cards[0] is expanded.players[2].means_cards[0]
+
+    # Tiles the deck didn't produce are kept as they are
+    game.players[0].active_tiles.append({"id": "t3", "name": "Odd", "selected_option": "left"})
+    assert CompactRoom.pack(game).expand().players[0].active_tiles == game.players[0].active_tiles
+
+def test_manager_compacts_idle_rooms_and_expands_them_on_access():
+    game = make_game("room-idle")
+    game_manager.games[game.room_id] = game
+    before = game.model_dump()
+    try:
+        game_manager.compact_rooms([game.room_id])
+        assert game.room_id not in game_manager.games
+        compact = game_manager.resident(game.room_id)
+        assert isinstance(compact, CompactRoom)
+
+        # Presence updates still land on the compact seats
+        compact.get_player("u3").is_online = False
+        before["players"][2]["is_online"] = False
+
+        loaded = asyncio.run(game_manager.get_game(game.room_id))
+        assert game_manager.games[game.room_id] is loaded and game.room_id not in game_manager.compacted
+        assert loaded.model_dump() == before
+
+        # Evicting a compacted room persists the full model
+        game_manager.compact_rooms([game.room_id])
+        from src.app.games.deception.logic import state_manager
+        with patch.object(state_manager, "set_many", new=AsyncMock()) as set_many:
+            asyncio.run(game_manager.expire_rooms([game.room_id]))
+        saved = set_many.await_args.args[0][game.room_id]
+        assert isinstance(saved, DeceptionGame) and saved.model_dump() == before
+        assert game_manager.resident(game.room_id) is None
+    finally:
+        game_manager.remove_game(game.room_id)
+
+def test_ids_rehydrated_from_redis_share_the_catalog_strings():
+    payload = make_game("room-redis").model_dump_json()
+    first, second = DeceptionGame.model_validate_json(payload), DeceptionGame.model_validate_json(payload)
+    assert first.players[1].draft_pool_means[3] is second.players[1].draft_pool_means[3]
+    assert first.players[0].active_tiles[0]["id"] is second.players[0].active_tiles[0]["id"]
+    assert first.means_id is second.means_id
+
+    # Ids chosen by clients are only matched against the table, never added to it
+    from src.app.games.deception.catalog import card_ids
+    size = len(card_ids)
+    game = DeceptionGame(room_id="room-client", room_code="CLIENT", means_id="made-up")
+    assert game.means_id == "made-up" and len(card_ids) == size
+    assert card_ids.canonical(["not", "hashable"]) == ["not", "hashable"]
+
+def test_rooms_with_viewers_or_long_polls_are_not_idle():
+    from src.app.core.presence import PresenceTracker
+    from src.app.core.projection import feeds
+    from src.app.core.scheduler import RoomExpiryIndex
+
+    game = make_game("room-watched")
+    game_manager.games[game.room_id] = game
+    index = RoomExpiryIndex(ttl=30)
+    index.touch(game.room_id, ts=0)
+
+    async def scenario():
+        # A spectator (or SSE stream) subscribed to the room's feed
+        queue = feeds.get_or_create(game.room_id).subscribe()
+        assert index.pop_expired(100, limit=10) == []
+        feeds.release(game.room_id, queue)
+
+        # A sync long poll parked on the room
+        poll = asyncio.create_task(game.wait_for_revision(game.revision, timeout=5))
+        await asyncio.sleep(0)
+        assert index.pop_expired(200, limit=10) == []
+        game.mark_dirty()
+        assert await poll
+
+        assert index.pop_expired(300, limit=10) == [game.room_id]
+
+    try:
+        with patch("src.app.core.presence.presence", PresenceTracker()):
+            asyncio.run(scenario())
+    finally:
+        game_manager.remove_game(game.room_id)
@@ -0,0 +1,118 @@
+import sys
+import os
+import asyncio
+from unittest.mock import AsyncMock, patch
+import pytest
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from src.app.core.lobby_index import LobbyIndex
+
+def run_with_redis(coro_fn):
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    with patch("src.app.core.lobby_index.get_redis", return_value=client):
+        return asyncio.run(coro_fn(LobbyIndex()))
+
+def room(i, is_public=True):
+    return {"id": f"g{i}", "room_code": f"CODE{i}", "name": f"Room {i}", "host_id": f"host{i}",
+            "status": "LOBBY", "is_public": is_public}
+
+def test_lobby_index_tracks_room_lifecycle():
+    async def scenario(index):
+        await index.room_created(room(1), created_at=100.0)
+        await index.room_created(room(2, is_public=False), created_at=200.0)
+        await index.player_joined("g1", "alice")
+        await index.player_joined("g2", "alice")
+
+        public, cursor = await index.list_public()
+        assert [r["id"] for r in public] == ["g1"]
+        assert public[0]["player_count"] == 2
+        assert cursor is None
+        assert [r["id"] for r in await index.list_user_rooms("alice")] == ["g2", "g1"]
+
+        await index.player_left("g1", "alice")
+        public, _ = await index.list_public()
+        assert public[0]["player_count"] == 1
+
+        # Starting the game drops it from the public listing, resetting brings it back
+        await index.set_status(["g1"], "CARD_DRAFTING")
+        assert (await index.list_public())[0] == []
+        await index.set_status(["g1"], "LOBBY")
+        assert [r["id"] for r in (await index.list_public())[0]] == ["g1"]
+
+        await index.rooms_closed(["g1", "g2"])
+        assert (await index.list_public())[0] == []
+        assert await index.list_user_rooms("alice") == []
+        assert await index.list_user_rooms("host1") == []
+
+    run_with_redis(scenario)
+
+def test_lobby_index_paginates_with_stable_cursor():
+    async def scenario(index):
+        # Several rooms share a timestamp to exercise tie handling
+        for i in range(7):
+            await index.room_created(room(i), created_at=1000.0 + i // 3)
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = await index.list_public(cursor, limit=2)
+            seen.extend(r["id"] for r in page)
+            if not cursor:
+                break
+
+        assert sorted(seen) == [f"g{i}" for i in range(7)]
+        assert len(seen) == len(set(seen))
+        created = [1000.0 + int(rid[1:]) // 3 for rid in seen]
+        assert created == sorted(created, reverse=True)
+
+    run_with_redis(scenario)
+
+def test_lobby_index_rebuilds_from_postgres_once():
+    rows = [
+        {**room(1), "game_type": "deception", "created_at": "2024-05-23T10:00:00+00:00",
+         "players": [{"user_id": "host1"}, {"user_id": "bob"}]},
+        {**room(2), "status": "INVESTIGATION", "created_at": "2024-05-23T11:00:00+00:00",
+         "players": [{"user_id": "bob"}]},
+    ]
+
+    class FakeQuery:
+        calls = 0
+        def from_(self, table):
+            return self
+        def select(self, *args):
+            return self
+        def order(self, column):
+            return self
+        def range(self, start, end):
+            self.window = (start, end + 1)
+            return self
+        def execute(self):
+            FakeQuery.calls += 1
+            return type("Res", (), {"data": rows[slice(*self.window)]})()
+
+    async def scenario(index):
+        assert await index.ensure_built()
+        assert await index.ensure_built()
+        public, _ = await index.list_public()
+        assert [r["id"] for r in public] == ["g1"]
+        assert public[0]["player_count"] == 2
+        assert {r["id"] for r in await index.list_user_rooms("bob")} == {"g1", "g2"}
+
+    with patch("src.app.core.database.get_supabase", return_value=FakeQuery()), \
+         patch("src.app.core.lobby_index._REBUILD_PAGE", 1):
+        run_with_redis(scenario)
+    assert FakeQuery.calls == 3  # Two full pages and the short one that ends the rebuild
+
+def test_list_falls_back_to_postgres_when_redis_fails_mid_request():
+    from src.app.api.v1 import game as game_routes
+
+    fallback = AsyncMock(return_value="from-db")
+    with patch.object(game_routes.lobby_index, "ensure_built", new=AsyncMock(return_value=True)), \
+         patch.object(game_routes.lobby_index, "list_public", new=AsyncMock(side_effect=ConnectionError("redis down"))), \
+         patch.object(game_routes, "list_games_from_db", new=fallback):
+        result = asyncio.run(game_routes.list_games(cursor=None, limit=10, current_user={"id": "u1"}))
+    assert result == "from-db"
+    fallback.assert_awaited_once()
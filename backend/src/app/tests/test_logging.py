@@ -0,0 +1,127 @@
+import sys
+import os
+import io
+import json
+import threading
+import time
+from unittest.mock import patch
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from src.app.core import logger as logging_setup
+from src.app.core.logger import BoundedAsyncSink, LogLimiter, logger, render_json
+from src.app.core.metrics import LOG_RECORDS_DROPPED
+from src.app.core.tracing import InMemoryExporter, tracer
+
+class BlockedOutput:
+    """Writer that stalls until released, like a wedged stdout pipe."""
+    def __init__(self):
+        self.release = threading.Event()
+        self.lines = []
+
+    def write(self, text):
+        self.release.wait(5)
+        self.lines.extend(text.splitlines())
+
+    def flush(self):
+        pass
+
+def capture():
+    records = []
+    handler = logger.add(lambda message: records.append(message.record), format="{message}", level="DEBUG",
+                         filter=lambda record: record["extra"].get("capture"))
+    return logger.bind(capture=True), records, handler
+
+def test_full_queue_drops_and_counts_without_blocking():
+    output = BlockedOutput()
+    sink = BoundedAsyncSink([output], max_size=3)
+    handler = logger.add(sink, format="{message}", filter=lambda record: record["extra"].get("bounded"))
+    log = logger.bind(bounded=True)
+    before = LOG_RECORDS_DROPPED._default.value
+    try:
+        started = time.perf_counter()
+        for i in range(20):
+            log.info("record {}", i)
+        assert time.perf_counter() - started < 1.0  # The stalled writer never holds up the caller
+    finally:
+        logger.remove(handler)
+        output.release.set()
+        sink.stop()
+
+    assert sink.dropped > 0
+    assert LOG_RECORDS_DROPPED._default.value - before == sink.dropped
+    assert len(output.lines) + sink.dropped == 20
+    assert output.lines[0].endswith("record 0")
+
+def test_json_records_carry_extra_fields_and_the_trace_id():
+    log, records, handler = capture()
+    tracer.configure(InMemoryExporter(), 1.0)
+    try:
+        with tracer.start_trace("ws.event") as span:
+            log.bind(room_id="r1").warning("Player {} timed out", "u2")
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            log.exception("boom")
+    finally:
+        tracer.configure(None, 0.0)
+        logger.remove(handler)
+
+    entry = json.loads(render_json(records[0]))
+    assert entry["message"] == "Player u2 timed out" and entry["level"] == "WARNING"
+    assert entry["room_id"] == "r1" and entry["trace_id"] == span.trace_id
+    assert entry["ts"].endswith("+00:00")
+    assert "ZeroDivisionError" in json.loads(render_json(records[1]))["exception"]
+
+def test_per_module_levels_filter_before_the_sink():
+    calls = []
+
+    class Costly:
+        def __str__(self):
+            calls.append(1)
+            return "costly"
+
+    try:
+        with patch.multiple(logging_setup.settings, LOG_LEVEL="WARNING", LOG_LEVELS={"src.app.core.presence": "ERROR"}, LOG_FILE=None):
+            logging_setup.setup_logging()
+            logger.info("dropped {}", Costly())  # Below every configured level: never formatted
+            logging_setup.sink.stop()
+
+        with patch.multiple(logging_setup.settings, LOG_LEVEL="WARNING", LOG_LEVELS={"src.app.core.auth": "DEBUG"}, LOG_FILE=None):
+            logging_setup.setup_logging()
+            out = io.StringIO()
+            logging_setup.sink.outputs = [out]
+
+            logger.info("dropped")
+            logger.warning("kept")
+            from src.app.core.auth import verify_supabase_jwt
+            with patch.object(logging_setup.settings, "SUPABASE_JWT_SECRET", "c2VjcmV0"):
+                try:
+                    verify_supabase_jwt("Bearer not-a-jwt")
+                except ValueError:
+                    pass
+            logging_setup.sink.stop()
+    finally:
+        logging_setup.setup_logging()
+
+    text = out.getvalue()
+    assert not calls and "dropped" not in text and "kept" in text
+    # auth is opted into DEBUG on its own
+    assert "Removed double 'Bearer ' prefix" in text
+
+def test_limited_caps_repeats_and_reports_the_suppressed_count():
+    log, records, handler = capture()
+    limit = LogLimiter(interval=0.05, burst=2)
+    try:
+        for i in range(6):
+            limit("redis").bind(capture=True).error("Redis down {}", i)
+        time.sleep(0.06)
+        limit("redis").bind(capture=True).error("Redis down again")
+        limit("other").bind(capture=True).error("Separate key")
+    finally:
+        logger.remove(handler)
+
+    assert [r["message"] for r in records] == ["Redis down 0", "Redis down 1", "Redis down again", "Separate key"]
+    assert records[2]["extra"]["suppressed"] == 4
+    assert "suppressed" not in records[3]["extra"]
@@ -0,0 +1,39 @@
+import sys
+import os
+import asyncio
+import time
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from src.app.core.loop_monitor import LoopMonitor
+from src.app.core.metrics import LOOP_LAG, LOOP_STALLS, LOOP_STALL_SECONDS
+
+def blocking_supabase_call_marker(seconds):
+    time.sleep(seconds)  # A sync client call made from async code
+
+async def handle_event():
+    blocking_supabase_call_marker(0.3)
+
+def test_stall_is_reported_with_the_blocking_frame_and_stack():
+    monitor = LoopMonitor(interval=0.02, threshold=0.1)
+    lag_samples = sum(LOOP_LAG._default.counts)
+    stalls = LOOP_STALLS._default.value
+
+    async def scenario():
+        monitor.start()
+        await asyncio.sleep(0.1)
+        assert monitor.stalls == 0  # An idle loop doesn't trip it
+        await asyncio.create_task(handle_event(), name="ws-room-1")
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+
+    asyncio.run(scenario())
+
+    assert monitor.stalls == 1  # One report per stall, however long it lasts
+    assert monitor.last_stall["where"].startswith("blocking_supabase_call_marker (test_loop_monitor.py:")
+    assert "handle_event" in monitor.last_stall["stack"] and "blocking_supabase_call_marker" in monitor.last_stall["stack"]
+    assert monitor.last_stall["blocked_ms"] >= 100
+    assert LOOP_STALLS._default.value == stalls + 1
+    assert sum(LOOP_LAG._default.counts) > lag_samples + 3
+    assert LOOP_STALL_SECONDS._default.sum >= 0.25
@@ -0,0 +1,125 @@
+import sys
+import os
+import asyncio
+from unittest.mock import patch, AsyncMock
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from src.app.core.maintenance import run_maintenance
+from src.app.games.deception.manager import game_manager
+
+class FakeRpc:
+    """Pretends to be the maintenance RPCs over a fixed backlog of rows."""
+    def __init__(self, games, orphans, chats):
+        self.games = list(games)
+        self.orphans = orphans
+        self.chats = chats
+        self.calls = []
+
+    def __call__(self, name, params):
+        self.calls.append(name)
+        n = params["p_batch_size"]
+        if name == "cleanup_stale_lobbies":
+            excluded = set(params["p_exclude"])
+            doomed = [g for g in self.games if g not in excluded]
+            batch = doomed[:n]
+            self.games = [g for g in self.games if g not in batch]
+            return [{"game_id": g} for g in batch]
+        if name == "cleanup_orphaned_rows":
+            removed = min(n, self.orphans)
+            self.orphans -= removed
+            return [{"players_removed": removed, "game_cards_removed": 0, "game_tiles_removed": 0}]
+        if name == "cleanup_old_chats":
+            removed = min(n, self.chats)
+            self.chats -= removed
+            return removed
+
+def test_maintenance_drains_in_bounded_batches():
+    rpc = FakeRpc(games=[f"g{i}" for i in range(5)], orphans=3, chats=12)
+    game_manager.create_game("g1", "CODE01")
+
+    with patch("src.app.core.maintenance._rpc", side_effect=rpc), \
+         patch.object(game_manager, "purge_rooms", new=AsyncMock(wraps=game_manager.purge_rooms)) as purge, \
+         patch("src.app.games.deception.logic.state_manager.delete_many", new=AsyncMock()):
+        report = asyncio.run(run_maintenance(batch_size=2, max_batches=10))
+
+    assert report.rows_removed == {"games": 5, "players": 3, "game_cards": 0, "game_tiles": 0, "game_chats": 12}
+    assert report.evicted_rooms == 1
+    assert "g1" not in game_manager.games
+    assert purge.await_count == 3
+    assert rpc.calls.count("cleanup_old_chats") == 7  # 6 full batches + the short one that stops the loop
+    assert report.batches == len(rpc.calls)
+    assert report.errors == []
+
+def test_maintenance_respects_batch_budget_and_reports_errors():
+    rpc = FakeRpc(games=[], orphans=100, chats=0)
+
+    def failing(name, params):
+        if name == "cleanup_old_chats":
+            raise RuntimeError("boom")
+        return rpc(name, params)
+
+    with patch("src.app.core.maintenance._rpc", side_effect=failing):
+        report = asyncio.run(run_maintenance(batch_size=10, max_batches=3))
+
+    assert report.rows_removed["players"] == 30
+    assert report.errors == ["chats: boom"]
+
+def test_maintenance_keeps_rooms_with_connected_players():
+    from src.app.core.presence import presence
+    rpc = FakeRpc(games=["live", "idle"], orphans=0, chats=0)
+    presence.connected("live", "u1")
+    try:
+        with patch("src.app.core.maintenance._rpc", side_effect=rpc), \
+             patch("src.app.games.deception.logic.state_manager.delete_many", new=AsyncMock()):
+            report = asyncio.run(run_maintenance(batch_size=10, max_batches=3))
+    finally:
+        presence.disconnected("live", "u1")
+
+    assert report.rows_removed["games"] == 1
+    assert rpc.games == ["live"]
+
+def test_maintenance_keeps_rooms_active_on_other_workers():
+    import time
+    import pytest
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    rpc = FakeRpc(games=["remote", "quiet"], orphans=0, chats=0)
+
+    async def scenario():
+        # Another worker flushed presence for "remote" a minute ago; "quiet" was last seen yesterday
+        await client.zadd("presence:rooms", {"remote": time.time() - 60, "quiet": time.time() - 86400})
+        return await run_maintenance(batch_size=10, max_batches=3)
+
+    with patch("src.app.core.presence.get_redis", return_value=client), \
+         patch("src.app.core.maintenance._rpc", side_effect=rpc), \
+         patch("src.app.games.deception.manager.GameManager.purge_rooms", new=AsyncMock()):
+        report = asyncio.run(scenario())
+    assert rpc.games == ["remote"]
+    assert report.rows_removed["games"] == 1
+
+def test_maintenance_skips_game_sweep_when_shared_presence_is_unreadable():
+    client = AsyncMock()
+    client.zrangebyscore.side_effect = ConnectionError("redis down")
+    rpc = FakeRpc(games=["g1"], orphans=0, chats=0)
+    with patch("src.app.core.presence.get_redis", return_value=client), \
+         patch("src.app.core.maintenance._rpc", side_effect=rpc):
+        report = asyncio.run(run_maintenance(batch_size=10, max_batches=3))
+    assert "cleanup_stale_lobbies" not in rpc.calls and rpc.games == ["g1"]
+    assert report.errors and report.errors[0].startswith("stale_games")
+    assert "cleanup_old_chats" in rpc.calls  # The other steps still run
+
+def test_cron_cleanup_is_disabled_without_a_secret():
+    from fastapi import HTTPException
+    from src.app.api.v1.cron import verify_cron_secret
+    from src.app.core.config import settings
+
+    with patch.object(settings, "CRON_SECRET", None):
+        try:
+            verify_cron_secret("anything")
+            assert False, "expected the endpoint to be disabled"
+        except HTTPException as e:
+            assert e.status_code == 403
+    with patch.object(settings, "CRON_SECRET", "s3cret"):
+        verify_cron_secret("s3cret")
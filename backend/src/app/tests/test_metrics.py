@@ -0,0 +1,138 @@
+import sys
+import os
+import asyncio
+from unittest.mock import patch
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from src.app import main
+from src.app.api.websocket import manager
+from src.app.core import metrics
+from src.app.core.memory_supabase import MemorySupabase
+from src.app.core.metrics import Registry, InstrumentedSupabase, timed
+from src.app.core.middleware import rate_limit_middleware, rate_limit_store
+from src.app.games.deception.logic import DeceptionGame, DeceptionPlayer
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+def sample(text, line):
+    """Value of one exposition line, e.g. 'x_count{a="b"}'."""
+    for row in text.splitlines():
+        if row.startswith(line + " "):
+            return float(row.rsplit(" ", 1)[1])
+    return None
+
+def test_histogram_buckets_labels_and_exposition():
+    registry = Registry()
+    hist = registry.histogram("op_seconds", "Op time", ["op"], buckets=(0.1, 1.0))
+    hits = registry.counter("hits_total", "Hits")
+    for value in (0.05, 0.5, 0.5, 3.0):
+        hist.labels("get").observe(value)
+    hits.inc()
+    hits.inc(2)
+
+    @timed(hist, lambda key: ("sync" if key else "other",))
+    def work(key):
+        return key
+
+    @timed(hist, ("async",))
+    async def awork():
+        return 1
+
+    assert work("k") == "k" and asyncio.run(awork()) == 1
+
+    text = registry.render()
+    assert "# TYPE op_seconds histogram" in text
+    assert sample(text, 'op_seconds_bucket{op="get",le="0.1"}') == 1
+    assert sample(text, 'op_seconds_bucket{op="get",le="1"}') == 3  # Cumulative
+    assert sample(text, 'op_seconds_bucket{op="get",le="+Inf"}') == 4
+    assert sample(text, 'op_seconds_count{op="get"}') == 4
+    assert sample(text, 'op_seconds_sum{op="get"}') == 4.05
+    assert sample(text, 'op_seconds_count{op="sync"}') == 1 and sample(text, 'op_seconds_count{op="async"}') == 1
+    assert sample(text, "hits_total") == 3
+
+def test_supabase_proxy_times_calls_by_table_and_operation():
+    db = InstrumentedSupabase(MemorySupabase())
+    before = metrics.SUPABASE_LATENCY.labels("games", "insert").counts[:]
+    db.table("games").insert({"room_code": "MET001", "host_id": "u1"}).execute()
+    db.table("games").update({"name": "x"}).eq("room_code", "MET001").execute()
+    rows = db.table("games").select("name").eq("room_code", "MET001").execute().data
+    assert rows == [{"name": "x"}]
+    assert sum(metrics.SUPABASE_LATENCY.labels("games", "insert").counts) == sum(before) + 1
+    assert sum(metrics.SUPABASE_LATENCY.labels("games", "update").counts) >= 1
+
+    # Anything that isn't a query passes straight through
+    assert db.storage is db.client.storage
+
+def test_game_paths_and_endpoint():
+    DeceptionGame._card_cache = {}
+    DeceptionGame._tile_cache = {}
+    game = DeceptionGame(room_id="metrics-room", room_code="METR01", host_id="u1")
+    for i in range(1, 4):
+        game.add_player(DeceptionPlayer(id=f"u{i}", name=f"P{i}", is_host=(i == 1)))
+    game._avatar_cache.update({p.id: None for p in game.players})
+    sockets = {p.id: FakeSocket() for p in game.players}
+    manager.active_connections["metrics-room"] = dict(sockets)
+
+    async def noop(*_args, **_kwargs):
+        return None
+
+    try:
+        with patch.object(DeceptionGame, "save", noop), patch.object(DeceptionGame, "sync_to_supabase", lambda self: None):
+            asyncio.run(game.handle_event("u2", "ready", {}))
+            asyncio.run(game.handle_event("u2", "made-up-event-1234", {}))
+            asyncio.run(game.broadcast_state())
+
+        with patch.object(main.settings, "METRICS_TOKEN", "s3cret"):
+            text = asyncio.run(main.metrics(authorization="Bearer s3cret")).body.decode()
+    finally:
+        manager.active_connections.pop("metrics-room", None)
+
+    assert sample(text, 'deception_event_seconds_count{event="ready"}') >= 1
+    assert sample(text, 'deception_event_seconds_count{event="other"}') >= 1
+    assert "made-up-event-1234" not in text  # Unknown events don't become labels
+    assert sample(text, "deception_state_build_seconds_count") >= 3
+    sent = sum(len(s.sent[-1]) for s in sockets.values())
+    assert sample(text, 'deception_broadcast_bytes_bucket{le="+Inf"}') >= 1 and sample(text, "deception_broadcast_bytes_sum") >= sent
+    # Per-room connections are a distribution, not a label per room
+    assert sample(text, 'ws_connections{kind="player"}') >= 3
+    assert "metrics-room" not in text
+
+    with patch.object(main.settings, "METRICS_TOKEN", "s3cret"):
+        try:
+            asyncio.run(main.metrics(authorization="Bearer wrong"))
+            assert False, "token is required"
+        except main.HTTPException as e:
+            assert e.status_code == 401
+        assert asyncio.run(main.metrics(authorization="Bearer s3cret")).status_code == 200
+    # Without a token the endpoint is closed, not public
+    with patch.object(main.settings, "METRICS_TOKEN", None):
+        try:
+            asyncio.run(main.metrics(authorization=None))
+            assert False, "metrics are disabled without a token"
+        except main.HTTPException as e:
+            assert e.status_code == 403
+
+def test_rate_limiter_rejections_are_counted():
+    class FakeRequest:
+        class client:
+            host = "10.9.9.9"
+        class url:
+            path = "/api/v1/game/list"
+
+    async def call_next(_request):
+        return "ok"
+
+    before = metrics.RATE_LIMITED._default.value
+    rate_limit_store.pop("10.9.9.9", None)
+    with patch("src.app.core.middleware.settings.RATE_LIMIT_PER_MINUTE", 2):
+        results = [asyncio.run(rate_limit_middleware(FakeRequest, call_next)) for _ in range(5)]
+    rate_limit_store.pop("10.9.9.9", None)
+    rejected = sum(1 for r in results if r != "ok")
+    assert rejected and metrics.RATE_LIMITED._default.value == before + rejected
@@ -0,0 +1,122 @@
+import sys
+import os
+import asyncio
+import json
+from unittest.mock import patch
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from src.app.core.timers import DeadlineHeap
+from src.app.core.presence import PresenceTracker
+from src.app.api.websocket import ConnectionManager
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data):
+        self.sent.append(json.loads(data))
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+def test_deadline_heap_reschedule_and_cancel():
+    heap = DeadlineHeap()
+    heap.schedule("a", 10)
+    heap.schedule("b", 5)
+    heap.schedule("c", 7)
+    heap.schedule("a", 3)  # supersedes the first entry
+    heap.cancel("c")
+
+    assert heap.next_deadline() == 3
+    assert heap.pop_due(6) == ["a", "b"]
+    assert heap.pop_due(100) == []
+    assert len(heap) == 0
+
+def test_deadline_heap_compacts_stale_entries():
+    heap = DeadlineHeap()
+    for i in range(1000):
+        heap.schedule("k", i)
+    assert len(heap._heap) < 200
+    assert heap.pop_due(10_000) == ["k"]
+
+def test_idle_connections_are_reaped():
+    tracker = PresenceTracker(heartbeat_interval=1, idle_timeout=30)
+    manager = ConnectionManager()
+    alive, idle = FakeSocket(), FakeSocket()
+
+    async def scenario():
+        with patch("src.app.api.websocket.presence", tracker), \
+             patch("src.app.api.websocket.manager", manager), \
+             patch("src.app.core.presence.time.time", return_value=1000.0):
+            await manager.connect(alive, "room", "alive")
+            await manager.connect(idle, "room", "idle")
+
+        with patch("src.app.api.websocket.presence", tracker), \
+             patch("src.app.api.websocket.manager", manager), \
+             patch("src.app.core.presence.time.time", return_value=1020.0):
+            tracker.touch("room", "alive")
+
+        with patch("src.app.api.websocket.presence", tracker), \
+             patch("src.app.api.websocket.manager", manager):
+            await tracker.reap_idle(1031.0)
+
+    asyncio.run(scenario())
+
+    assert idle.closed_with == 4008
+    assert alive.closed_with is None
+    assert tracker.is_online("room", "alive")
+    assert not tracker.is_online("room", "idle")
+    assert tracker.was_reaped("room", "idle")
+    assert not tracker.was_reaped("room", "idle")
+    assert list(manager.active_connections["room"]) == ["alive"]
+    # The survivor was re-armed for its own deadline
+    assert tracker._idle.deadline(("room", "alive")) == 1050.0
+
+def test_presence_changes_are_batched():
+    tracker = PresenceTracker()
+    manager = ConnectionManager()
+    sockets = [FakeSocket() for _ in range(3)]
+
+    async def scenario():
+        with patch("src.app.api.websocket.presence", tracker), \
+             patch("src.app.api.websocket.manager", manager):
+            for i, ws in enumerate(sockets):
+                await manager.connect(ws, "room", f"u{i}")
+            manager.disconnect(sockets[2], "room", "u2")
+            await tracker.flush()
+            await tracker.flush()
+
+    asyncio.run(scenario())
+
+    # One presence message per remaining socket, carrying all three changes
+    for ws in sockets[:2]:
+        assert len(ws.sent) == 1
+        assert ws.sent[0]["type"] == "presence"
+        assert {c["player_id"]: c["is_online"] for c in ws.sent[0]["changes"]} == {"u0": True, "u1": True, "u2": False}
+    assert sockets[2].sent == []
+
+def test_stale_socket_disconnect_keeps_the_resumed_seat():
+    tracker = PresenceTracker(heartbeat_interval=1, idle_timeout=30)
+    manager = ConnectionManager()
+    old, new = FakeSocket(), FakeSocket()
+
+    async def scenario():
+        with patch("src.app.api.websocket.presence", tracker):
+            await manager.connect(old, "room", "u1")
+            await manager.connect(new, "room", "u1")  # Resumed before the old socket noticed
+            assert manager.disconnect(old, "room", "u1") is False
+            assert manager.active_connections["room"]["u1"] is new
+            assert tracker.is_online("room", "u1")
+            assert manager.disconnect(new, "room", "u1") is True
+
+    asyncio.run(scenario())
+    assert "room" not in manager.active_connections
@@ -0,0 +1,90 @@
+import sys
+import os
+import asyncio
+import threading
+import time
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from fastapi import HTTPException
+from src.app.api.v1 import admin
+from src.app.core import profiler
+
+def spin_in_worker_marker(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+def burn_on_loop_marker(seconds):
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        sum(range(1000))
+
+def parse(collapsed):
+    stacks = {}
+    for line in collapsed.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        stacks[stack] = int(count)
+    return stacks
+
+def test_wall_profile_covers_other_threads():
+    stop = threading.Event()
+    worker = threading.Thread(target=spin_in_worker_marker, args=(stop,), name="busy-worker")
+    worker.start()
+    try:
+        result = asyncio.run(profiler.capture(0.2, mode="wall", interval=0.002))
+    finally:
+        stop.set()
+        worker.join()
+
+    stacks = parse(result.collapsed())
+    assert sum(stacks.values()) == result.samples > 0
+    busy = [s for s in stacks if "spin_in_worker_marker" in s]
+    assert busy and all(s.startswith("busy-worker;") for s in busy)
+    assert any("src/app/tests/test_profiler.py" in s for s in busy)
+
+def test_cpu_profile_samples_the_event_loop_thread():
+    async def scenario():
+        task = asyncio.create_task(profiler.capture(0.05, mode="cpu", interval=0.002))
+        await asyncio.sleep(0)
+        burn_on_loop_marker(0.2)  # Blocks the loop, like a slow handler would
+        return await task
+
+    result = asyncio.run(scenario())
+    stacks = parse(result.collapsed())
+    burning = sum(count for stack, count in stacks.items() if "burn_on_loop_marker" in stack)
+    assert burning >= 0.5 * result.samples > 0
+
+def test_endpoint_returns_collapsed_stacks_or_allocation_diff():
+    res = asyncio.run(admin.profile(seconds=0.05, mode="wall", interval_ms=2, allocations=False, top=10))
+    assert res.headers["content-disposition"].startswith('attachment; filename="profile-wall-')
+    assert int(res.headers["x-profile-samples"]) > 0 and res.body.decode().endswith("\n")
+
+    async def allocate_during_capture():
+        task = asyncio.create_task(admin.profile(seconds=0.05, mode="wall", interval_ms=5, allocations=True, top=5))
+        await asyncio.sleep(0.01)
+        kept = [bytes(1024) for _ in range(2000)]
+        report = await task
+        return report, kept
+
+    report, _kept = asyncio.run(allocate_during_capture())
+    assert report["samples"] > 0 and report["collapsed"]
+    assert report["allocations"][0]["file"].endswith("test_profiler.py")
+    assert report["allocations"][0]["size_diff"] >= 2000 * 1024
+
+    async def overlapping():
+        first = asyncio.create_task(admin.profile(seconds=0.05, mode="wall", interval_ms=5, allocations=False, top=10))
+        await asyncio.sleep(0)
+        try:
+            await admin.profile(seconds=0.05, mode="wall", interval_ms=5, allocations=False, top=10)
+            assert False, "only one capture at a time"
+        except HTTPException as e:
+            assert e.status_code == 409
+        await first
+
+    asyncio.run(overlapping())
+    try:
+        asyncio.run(admin.profile(seconds=3600, mode="wall", interval_ms=5, allocations=False, top=10))
+        assert False
+    except HTTPException as e:
+        assert e.status_code == 400
@@ -0,0 +1,276 @@
+"""
+Query-plan regression suite for the backend's hot Postgres queries.
+
+Builds a disposable database from supabase/migrations, seeds it with synthetic rows,
+and fails if EXPLAIN shows a sequential scan on the table a hot query targets.
+
+Postgres is found through, in order:
+  QUERY_PLAN_DSN  - DSN of a scratch server; a throwaway database is created and dropped
+  PG_BIN / PATH   - directory with initdb and pg_ctl; a temporary cluster is started
+Without either (or when psycopg2 is missing) the tests are skipped.
+"""
+import sys
+import os
+import glob
+import json
+import shutil
+import socket
+import subprocess
+import tempfile
+import uuid
+import pytest
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+MIGRATIONS_DIR = os.path.join(REPO_ROOT, "supabase", "migrations")
+
+# Migrations that only re-apply something an earlier one already did
+TOLERATED_FAILURES = {
+    "20240523000009_enable_realtime.sql",  # tables already in supabase_realtime since 003
+    "20240523000021_add_eldritch_storage.sql",  # storage policies already created by 002
+}
+
+# The parts of a Supabase project the migrations reference
+SUPABASE_STUB = """
+DO $$ BEGIN
+    CREATE ROLE anon NOLOGIN;
+    CREATE ROLE authenticated NOLOGIN;
+    CREATE ROLE service_role NOLOGIN;
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
+
+CREATE SCHEMA auth;
+CREATE TABLE auth.users (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    email TEXT,
+    raw_user_meta_data JSONB DEFAULT '{}'::jsonb,
+    raw_app_meta_data JSONB DEFAULT '{}'::jsonb,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+CREATE FUNCTION auth.uid() RETURNS UUID AS $$ SELECT NULL::uuid $$ LANGUAGE sql STABLE;
+CREATE FUNCTION auth.role() RETURNS TEXT AS $$ SELECT 'service_role'::text $$ LANGUAGE sql STABLE;
+CREATE FUNCTION auth.jwt() RETURNS JSONB AS $$ SELECT '{}'::jsonb $$ LANGUAGE sql STABLE;
+
+CREATE SCHEMA storage;
+CREATE TABLE storage.buckets (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    public BOOLEAN DEFAULT FALSE,
+    file_size_limit BIGINT,
+    allowed_mime_types TEXT[]
+);
+CREATE TABLE storage.objects (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    bucket_id TEXT REFERENCES storage.buckets(id),
+    name TEXT,
+    owner UUID,
+    metadata JSONB
+);
+ALTER TABLE storage.objects ENABLE ROW LEVEL SECURITY;
+
+CREATE PUBLICATION supabase_realtime;
+"""
+
+SEED = """
+INSERT INTO auth.users (id, email)
+SELECT gen_random_uuid(), 'user' || i || '@example.com' FROM generate_series(1, 2000) i;
+
+INSERT INTO public.library_cards (type, content, name, game_type)
+SELECT (ARRAY['MEANS', 'CLUE'])[1 + i % 2]::card_type, 'Card ' || i, 'Card ' || i,
+       CASE WHEN i % 5 = 0 THEN 'eldritch_horror' ELSE 'deception' END
+FROM generate_series(1, 3000) i;
+
+INSERT INTO public.library_tiles (name, type, options)
+SELECT 'Tile ' || i, (ARRAY['CAUSE_OF_DEATH', 'LOCATION', 'SCENE'])[1 + i % 3]::tile_type, '[]'::jsonb
+FROM generate_series(1, 3000) i;
+
+INSERT INTO public.games (room_code, status, is_public, name, host_id, created_at)
+SELECT 'R' || lpad(i::text, 6, '0'),
+       (ARRAY['LOBBY', 'INVESTIGATION', 'GAME_OVER', 'ABANDONED'])[1 + i % 4],
+       i % 3 = 0, 'Room ' || i, (SELECT id FROM auth.users ORDER BY id LIMIT 1),
+       NOW() - (i || ' minutes')::interval
+FROM generate_series(1, 20000) i;
+
+INSERT INTO public.players (game_id, user_id, name)
+SELECT g.id, u.id, 'Player'
+FROM (SELECT id, row_number() OVER (ORDER BY id) AS rn FROM public.games) g
+JOIN (SELECT id, row_number() OVER (ORDER BY id) AS rn FROM auth.users) u
+  ON u.rn BETWEEN (g.rn % 1990) + 1 AND (g.rn % 1990) + 4;
+
+INSERT INTO public.game_cards (game_id, player_id, card_id)
+SELECT p.game_id, p.id, (SELECT id FROM public.library_cards LIMIT 1)
+FROM public.players p, generate_series(1, 4);
+
+INSERT INTO public.game_tiles (game_id, tile_id)
+SELECT g.id, (SELECT id FROM public.library_tiles LIMIT 1)
+FROM public.games g, generate_series(1, 6);
+
+INSERT INTO public.game_chats (game_id, player_id, player_name, message, created_at)
+SELECT p.game_id, p.id, 'Player', 'hi', NOW() - (random() * 48 || ' hours')::interval
+FROM public.players p, generate_series(1, 2);
+
+ANALYZE;
+"""
+
+# (name, statement, target relation) - statements mirror the PostgREST calls in the backend
+# Statements go through str.format() with sample ids, so literal braces are doubled
+HOT_QUERIES = [
+    ("games_by_room_code",
+     "SELECT id, status, host_id FROM games WHERE room_code = 'R000042'",
+     "games"),
+    ("list_public_lobbies",
+     "SELECT id, room_code, name, host_id, game_type FROM games "
+     "WHERE status = 'LOBBY' AND is_public = true ORDER BY created_at DESC",
+     "games"),
+    ("player_in_game",
+     "SELECT * FROM players WHERE game_id = '{game_id}' AND user_id = '{user_id}'",
+     "players"),
+    ("players_count_by_game",
+     "SELECT count(*) FROM players WHERE game_id = '{game_id}'",
+     "players"),
+    ("joined_games_by_user",
+     "SELECT game_id FROM players WHERE user_id = '{user_id}'",
+     "players"),
+    ("confirm_draft_cards",
+     "DELETE FROM game_cards WHERE game_id = '{game_id}' AND player_id = '{player_id}'",
+     "game_cards"),
+    # What the ON DELETE CASCADE from players runs
+    ("cascade_cards_by_player",
+     "SELECT id FROM game_cards WHERE player_id = '{player_id}'",
+     "game_cards"),
+    ("cascade_chats_by_player",
+     "SELECT id FROM game_chats WHERE player_id = '{player_id}'",
+     "game_chats"),
+    ("reset_game_tiles",
+     "DELETE FROM game_tiles WHERE game_id = '{game_id}'",
+     "game_tiles"),
+    ("chat_history",
+     "SELECT * FROM game_chats WHERE game_id = '{game_id}' ORDER BY created_at",
+     "game_chats"),
+    ("old_chats",
+     "SELECT id FROM game_chats WHERE created_at < NOW() - INTERVAL '24 hours' ORDER BY created_at LIMIT 500",
+     "game_chats"),
+    # The doomed CTE of cleanup_stale_lobbies, predicate verbatim
+    ("stale_games",
+     "SELECT id FROM games g "
+     "WHERE ((g.status = 'LOBBY' AND g.created_at < NOW() - INTERVAL '60 minutes') "
+     "OR g.status = 'ABANDONED' "
+     "OR g.created_at < NOW() - INTERVAL '24 hours') "
+     "AND NOT (g.id = ANY('{{}}'::uuid[])) "
+     "ORDER BY g.created_at LIMIT 500",
+     "games"),
+    ("orphaned_players",
+     "SELECT id FROM players WHERE game_id IS NULL LIMIT 500",
+     "players"),
+    ("library_cards_by_type",
+     "SELECT * FROM library_cards WHERE type = 'MEANS' AND game_type = 'eldritch_horror'",
+     "library_cards"),
+    ("library_tiles_by_type",
+     "SELECT id, name, type, options FROM library_tiles WHERE type = 'SCENE'",
+     "library_tiles"),
+]
+
+def _find_pg_bin():
+    pg_bin = os.environ.get("PG_BIN")
+    initdb = os.path.join(pg_bin, "initdb") if pg_bin else shutil.which("initdb")
+    if not initdb or not os.path.exists(initdb):
+        return None
+    return os.path.dirname(initdb)
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+@pytest.fixture(scope="module")
+def pg_server():
+    """Yields an admin DSN for a scratch Postgres."""
+    dsn = os.environ.get("QUERY_PLAN_DSN")
+    if dsn:
+        yield dsn
+        return
+
+    pg_bin = _find_pg_bin()
+    if not pg_bin:
+        pytest.skip("No Postgres available: set QUERY_PLAN_DSN or PG_BIN")
+    if hasattr(os, "geteuid") and os.geteuid() == 0:
+        pytest.skip("initdb refuses to run as root: set QUERY_PLAN_DSN instead")
+
+    data_dir = tempfile.mkdtemp(prefix="qp-pg-")
+    port = _free_port()
+    subprocess.run([os.path.join(pg_bin, "initdb"), "-D", data_dir, "-U", "postgres", "-A", "trust"],
+                   check=True, capture_output=True)
+    subprocess.run([os.path.join(pg_bin, "pg_ctl"), "-D", data_dir, "-w", "-l", os.path.join(data_dir, "server.log"),
+                    "-o", f"-p {port} -k {data_dir} -c listen_addresses=''", "start"],
+                   check=True, capture_output=True)
+    try:
+        yield f"host={data_dir} port={port} user=postgres dbname=postgres"
+    finally:
+        subprocess.run([os.path.join(pg_bin, "pg_ctl"), "-D", data_dir, "-m", "immediate", "stop"], capture_output=True)
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+@pytest.fixture(scope="module")
+def plan_db(pg_server):
+    """A throwaway database with every migration applied and synthetic data loaded."""
+    db_name = f"query_plans_{uuid.uuid4().hex[:8]}"
+    admin = psycopg2.connect(pg_server)
+    admin.autocommit = True
+    admin.cursor().execute(f"CREATE DATABASE {db_name} ENCODING 'UTF8' TEMPLATE template0")
+
+    conn = psycopg2.connect(pg_server, dbname=db_name, client_encoding="UTF8")
+    conn.autocommit = True
+    try:
+        cur = conn.cursor()
+        cur.execute(SUPABASE_STUB)
+
+        for path in sorted(glob.glob(os.path.join(MIGRATIONS_DIR, "2*.sql"))):
+            name = os.path.basename(path)
+            with open(path, encoding="utf-8") as f:
+                sql = f.read()
+            try:
+                cur.execute("BEGIN")
+                cur.execute(sql)
+                cur.execute("COMMIT")
+            except psycopg2.Error as e:
+                cur.execute("ROLLBACK")
+                if name not in TOLERATED_FAILURES:
+                    pytest.fail(f"Migration {name} failed: {e}")
+
+        cur.execute(SEED)
+        yield conn
+    finally:
+        conn.close()
+        admin.cursor().execute(f"DROP DATABASE IF EXISTS {db_name}")
+        admin.close()
+
+def _sample_ids(cur):
+    cur.execute("SELECT p.game_id, p.user_id, p.id FROM players p ORDER BY p.id LIMIT 1")
+    game_id, user_id, player_id = cur.fetchone()
+    return {"game_id": game_id, "user_id": user_id, "player_id": player_id}
+
+def _walk(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk(child)
+
+@pytest.mark.parametrize("name,statement,relation", HOT_QUERIES, ids=[q[0] for q in HOT_QUERIES])
+def test_hot_query_uses_index(plan_db, name, statement, relation):
+    cur = plan_db.cursor()
+    sql = statement.format(**_sample_ids(cur))
+
+    # With seq scans priced out, any remaining Seq Scan means there is no usable index
+    cur.execute("BEGIN")
+    try:
+        cur.execute("SET LOCAL enable_seqscan = off")
+        cur.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+        raw = cur.fetchone()[0]
+    finally:
+        cur.execute("ROLLBACK")
+
+    plan = (raw if isinstance(raw, list) else json.loads(raw))[0]
+    seq_scans = [n for n in _walk(plan["Plan"]) if n.get("Node Type") == "Seq Scan" and n.get("Relation Name") == relation]
+    assert not seq_scans, f"{name} regressed to a sequential scan on {relation}"
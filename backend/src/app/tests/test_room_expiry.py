@@ -0,0 +1,78 @@
+import sys
+import os
+import asyncio
+from unittest.mock import patch, AsyncMock, MagicMock
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from src.app.core.scheduler import RoomExpiryIndex
+from src.app.core.presence import PresenceTracker
+from src.app.games.deception.manager import GameManager
+
+def test_only_idle_rooms_expire():
+    index = RoomExpiryIndex(ttl=100)
+    tracker = PresenceTracker()
+    tracker._rooms["connected"] = {"u1"}
+
+    with patch("src.app.core.presence.presence", tracker):
+        index.touch("idle", ts=0)
+        index.touch("active", ts=0)
+        index.touch("connected", ts=0)
+        index.touch("active", ts=50)  # O(1): deadline is re-checked lazily
+
+        assert index.pop_expired(120, limit=10) == ["idle"]
+        # Re-armed rooms expire once they really go idle
+        assert index.pop_expired(149, limit=10) == []
+        assert index.pop_expired(151, limit=10) == ["active"]
+        assert len(index) == 1
+
+def test_pop_expired_respects_batch_limit():
+    index = RoomExpiryIndex(ttl=10)
+    with patch("src.app.core.presence.presence", PresenceTracker()):
+        for i in range(25):
+            index.touch(f"room-{i}", ts=i)
+        first = index.pop_expired(1000, limit=10)
+        assert first == [f"room-{i}" for i in range(10)]
+        assert len(index.pop_expired(1000, limit=100)) == 15
+
+def test_expire_rooms_batches_side_effects():
+    manager = GameManager()
+    for i in range(3):
+        manager.create_game(f"room-{i}", f"CODE{i}")
+
+    supabase = MagicMock()
+    close_room = AsyncMock()
+
+    async def scenario():
+        with patch("src.app.games.deception.logic.state_manager.set_many", new=AsyncMock()) as set_many, \
+             patch("src.app.api.websocket.manager.close_room", new=close_room), \
+             patch("src.app.core.database.supabase", supabase):
+            await manager.expire_rooms(["room-0", "room-2", "unknown"])
+            return set_many
+
+    set_many = asyncio.run(scenario())
+
+    assert list(manager.games) == ["room-1"]
+    set_many.assert_awaited_once()
+    assert set(set_many.call_args.args[0]) == {"room-0", "room-2"}
+    assert close_room.await_count == 2
+    # One UPDATE for the whole batch
+    supabase.table.assert_called_once_with("games")
+    supabase.table.return_value.update.return_value.in_.assert_called_once_with("id", ["room-0", "room-2"])
+
+def test_expire_rooms_without_a_database():
+    manager = GameManager()
+    manager.create_game("room-solo", "SOLO01")
+
+    async def scenario():
+        with patch("src.app.games.deception.logic.state_manager.set_many", new=AsyncMock()), \
+             patch("src.app.api.websocket.manager.close_room", new=AsyncMock()), \
+             patch("src.app.core.database.supabase", None), \
+             patch("src.app.games.deception.manager.logger") as log:
+            await manager.expire_rooms(["room-solo"])
+            return log
+
+    log = asyncio.run(scenario())
+    assert manager.games == {}
+    log.error.assert_not_called()  # Nothing to mark abandoned, nothing failed
@@ -0,0 +1,131 @@
+import sys
+import os
+import asyncio
+from unittest.mock import patch, AsyncMock
+import pytest
+from fastapi import HTTPException
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from src.app.api.v1 import game as game_routes
+from src.app.api.schemas import GameJoinRequest, GameCreateRequest
+from src.app.core.i18n import Translator
+from src.app.games.deception.logic import DeceptionGame
+from src.app.games.deception.manager import game_manager
+
+class RpcError(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+class FakeSupabase:
+    """Only answers RPCs; any table() access fails the test."""
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.calls = []
+
+    def rpc(self, name, params):
+        self.calls.append((name, params))
+        return self
+
+    def execute(self):
+        if self.error:
+            raise self.error
+        return type("Res", (), {"data": self.result})()
+
+def join(supabase, user_id="u2", name="Alice"):
+    translator = Translator("en", {"game": {"room_full": "This room is full."}})
+    with patch.object(game_routes, "get_supabase", return_value=supabase), \
+         patch.object(game_routes.lobby_index, "player_joined", new=AsyncMock()):
+        return asyncio.run(game_routes.join_game(
+            GameJoinRequest(room_code="abc123", name=name),
+            current_user={"id": user_id, "email": "alice@example.com"},
+            t=translator
+        ))
+
+def test_join_is_one_rpc_and_warms_the_room():
+    DeceptionGame._card_cache = {}
+    DeceptionGame._tile_cache = {}
+    supabase = FakeSupabase(result={
+        "game_id": "room-join", "room_code": "ABC123", "host_id": "u1", "status": "LOBBY",
+        "player_id": "db2", "is_admin": False, "is_new": True
+    })
+
+    res = join(supabase)
+
+    assert supabase.calls == [("join_game", {
+        "p_room_code": "ABC123", "p_user_id": "u2", "p_name": "Alice",
+        "p_is_site_admin": False, "p_max_players": 12
+    })]
+    assert res.player_id == "db2" and res.game_id == "room-join" and not res.is_admin
+
+    game = game_manager.games["room-join"]
+    assert game.room_code == "ABC123" and game.host_id == "u1"
+    assert game.get_player("u2").db_id == "db2"
+
+    # Re-joining under a new name updates the resident seat in place
+    join(supabase, name="Alice2")
+    assert [p.name for p in game.players] == ["Alice2"]
+    game_manager.remove_game("room-join")
+
+def test_join_maps_rpc_errors_to_http():
+    with pytest.raises(HTTPException) as exc:
+        join(FakeSupabase(error=RpcError("room_full")))
+    assert exc.value.status_code == 403
+    assert exc.value.detail == "This room is full."
+
+    with pytest.raises(HTTPException) as exc:
+        join(FakeSupabase(error=RpcError("room_not_found")))
+    assert exc.value.status_code == 404
+
+def test_create_is_one_rpc_and_prewarms_host_seat():
+    DeceptionGame._card_cache = {}
+    DeceptionGame._tile_cache = {}
+    supabase = FakeSupabase(result={"game_id": "room-new", "room_code": "ZZZ999", "player_id": "db-host"})
+    translator = Translator("en", {})
+
+    with patch.object(game_routes, "get_supabase", return_value=supabase), \
+         patch.object(game_routes.room_codes, "allocate", new=AsyncMock(return_value="ABC234")), \
+         patch.object(game_routes.lobby_index, "room_created", new=AsyncMock()) as indexed:
+        res = asyncio.run(game_routes.create_game(
+            GameCreateRequest(name="Room", is_public=True),
+            current_user={"id": "host", "email": "host@example.com"},
+            t=translator
+        ))
+
+    name, params = supabase.calls[0]
+    assert len(supabase.calls) == 1 and name == "create_game"
+    assert params["p_room_code"] == "ABC234" and params["p_host_name"] == "host"
+    # The code the database settled on wins
+    assert res.room_code == "ZZZ999"
+    assert indexed.await_args.args[0]["room_code"] == "ZZZ999"
+
+    game = game_manager.games["room-new"]
+    host = game.get_player("host")
+    assert host.is_host and host.db_id == "db-host"
+
+    # The host's WebSocket connect is served from memory: FakeSupabase has no table()
+    asyncio.run(game_manager.handle_player_connect("room-new", "host", "Host"))
+    game_manager.remove_game("room-new")
+
+def test_backend_client_uses_the_service_role_key():
+    import base64, json
+    from src.app.core import database
+
+    def jwt(role):
+        claims = base64.urlsafe_b64encode(json.dumps({"role": role}).encode()).decode().rstrip("=")
+        return f"header.{claims}.signature"
+
+    with patch.object(database.settings, "SUPABASE_SERVICE_ROLE_KEY", jwt("service_role")), \
+         patch.object(database.settings, "SUPABASE_KEY", jwt("anon")):
+        assert database.server_key() == jwt("service_role")
+
+    # Falling back to SUPABASE_KEY is only allowed when it isn't a client key
+    with patch.object(database.settings, "SUPABASE_SERVICE_ROLE_KEY", None):
+        with patch.object(database.settings, "SUPABASE_KEY", "sb_secret_abc"):
+            assert database.server_key() == "sb_secret_abc"
+        for client_key in (jwt("anon"), jwt("authenticated"), "sb_publishable_abc"):
+            with patch.object(database.settings, "SUPABASE_KEY", client_key), pytest.raises(RuntimeError):
+                database.server_key()
@@ -0,0 +1,123 @@
+import sys
+import os
+import asyncio
+from unittest.mock import patch, AsyncMock
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from src.app.core.session import SessionTokenManager
+from src.app.core.delta import diff_state, apply_delta
+from src.app.games.deception.logic import DeceptionGame, DeceptionPlayer
+from src.app.games.deception.manager import GameManager
+
+def make_game():
+    # Skip the Supabase-backed catalog lookups
+    DeceptionGame._card_cache = {}
+    DeceptionGame._tile_cache = {}
+    game = DeceptionGame(room_id="room-1", room_code="ABC123", host_id="u1")
+    for i in range(1, 5):
+        game.add_player(DeceptionPlayer(id=f"u{i}", name=f"P{i}", db_id=f"db{i}", is_host=(i == 1)))
+    return game
+
+def test_resume_token_roundtrip():
+    tokens = SessionTokenManager("test-secret", ttl=60)
+    token = tokens.issue("room-1", "u1", db_id="db1")
+
+    claims = tokens.verify(token, "room-1", "u1")
+    assert claims["db_id"] == "db1"
+
+    # Bound to the room and the user
+    assert tokens.verify(token, "room-2", "u1") is None
+    assert tokens.verify(token, "room-1", "u2") is None
+    # Signed
+    assert SessionTokenManager("other-secret").verify(token, "room-1", "u1") is None
+
+def test_resume_token_expiry():
+    tokens = SessionTokenManager("test-secret", ttl=-10)
+    token = tokens.issue("room-1", "u1")
+    assert tokens.verify(token, "room-1", "u1") is None
+
+def test_state_delta_roundtrip():
+    old = {"status": "LOBBY", "data": {"round": 0}, "players": [{"id": "a", "is_ready": False}, {"id": "b", "is_ready": False}]}
+    new = {"status": "LOBBY", "data": {"round": 0}, "players": [{"id": "b", "is_ready": True}, {"id": "c", "is_ready": False}]}
+
+    changes = diff_state(old, new)
+    assert "status" not in changes
+    assert changes["players"]["remove"] == ["a"]
+    assert [p["id"] for p in changes["players"]["upsert"]] == ["b", "c"]
+    assert apply_delta(old, changes) == new
+    assert diff_state(new, new) == {}
+
+def test_resume_sends_only_own_delta():
+    game = make_game()
+    manager = GameManager()
+    manager.games[game.room_id] = game
+    sent = []
+
+    async def capture(message, room_id, user_id):
+        sent.append((user_id, message))
+
+    async def scenario():
+        with patch("src.app.games.deception.logic.get_supabase", return_value=None), \
+             patch("src.app.api.websocket.manager.send_to_user", side_effect=capture), \
+             patch("src.app.games.deception.logic.state_manager.set_state", new=AsyncMock()) as set_state:
+            await game.broadcast_state()
+            base_seq = game.revision
+            sent.clear()
+
+            # u2 toggles ready while u3 is disconnected
+            game.get_player("u2").is_ready = True
+            game.mark_dirty()
+
+            resumed = await manager.handle_player_resume(game.room_id, "u3", db_id="db3")
+            assert resumed is game
+            await game.send_state_to("u3", last_seq=base_seq)
+            set_state.assert_not_called()
+
+    asyncio.run(scenario())
+
+    assert [user_id for user_id, _ in sent] == ["u3"]
+    message = sent[0][1]
+    assert message["type"] == "game_delta"
+    assert message["base_seq"] == game.revision - 1
+    assert [p["id"] for p in message["changes"]["players"]["upsert"]] == ["u2"]
+
+def test_resume_unknown_player_falls_back():
+    game = make_game()
+    manager = GameManager()
+    manager.games[game.room_id] = game
+
+    assert asyncio.run(manager.handle_player_resume(game.room_id, "stranger")) is None
+    with patch("src.app.games.deception.logic.state_manager.get_state", new=AsyncMock(return_value=None)):
+        assert asyncio.run(manager.handle_player_resume("missing-room", "u1")) is None
+
+def test_events_bump_the_revision_before_awaiting_and_finish_once():
+    from unittest.mock import MagicMock
+    game = make_game()
+    game.status = "GAME_OVER"
+    seen = []
+
+    async def player_left(room_id, user_id):
+        seen.append((game.revision, len(game.players)))
+
+    async def scenario():
+        with patch("src.app.games.deception.logic.get_supabase", return_value=MagicMock()), \
+             patch.object(DeceptionGame, "save", new=AsyncMock()) as save, \
+             patch.object(DeceptionGame, "broadcast_state", new=AsyncMock()) as broadcast, \
+             patch.object(DeceptionGame, "sync_to_supabase"), \
+             patch("src.app.core.lobby_index.lobby_index.set_status", new=AsyncMock()), \
+             patch("src.app.core.lobby_index.lobby_index.player_left", side_effect=player_left):
+            before = game.revision
+            await game.handle_event("u1", "reset_game", {})
+            # One revision, one Redis write and one state frame per reset
+            assert game.revision == before + 1
+            assert save.await_count == 1 and broadcast.await_count == 1
+
+            before = game.revision
+            await game.handle_event("u2", "leave", {})
+            assert game.revision == before + 1
+
+    asyncio.run(scenario())
+    # The lobby index was updated only after the revision moved with the departure
+    assert seen == [(game.revision, 3)]
@@ -0,0 +1,238 @@
+import sys
+import os
+import asyncio
+import json
+from unittest.mock import patch
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from src.app.api.v1 import game as game_routes
+from src.app.api.schemas import GameState, GameStatus, Role
+from src.app.core.i18n import Translator
+from src.app.games.deception.logic import DeceptionGame, DeceptionPlayer
+from src.app.games.deception.manager import game_manager
+
+def make_game(room_id="room-sync"):
+    # Skip the Supabase-backed catalog lookups
+    DeceptionGame._card_cache = {}
+    DeceptionGame._tile_cache = {}
+    game = DeceptionGame(room_id=room_id, room_code="SYNC01", host_id="u1")
+    for i, role in enumerate([Role.FORENSIC_SCIENTIST, Role.MURDERER, Role.INVESTIGATOR], start=1):
+        game.add_player(DeceptionPlayer(id=f"u{i}", name=f"P{i}", role=role, is_host=(i == 1)))
+    game._avatar_cache.update({p.id: None for p in game.players})
+    return game
+
+def test_projection_is_built_once_per_revision_and_class():
+    game = make_game()
+    with patch.object(DeceptionGame, "to_game_state", autospec=True, side_effect=DeceptionGame.to_game_state) as build:
+        public = game.projection_for(None)
+        assert game.projection_for("stranger") is public
+        mine = game.projection_for("u3")
+        assert game.projection_for("u3") is mine
+        assert build.call_count == 2
+
+        game.mark_dirty()
+        assert game.projection_for(None) is not public
+        assert build.call_count == 3
+
+    roles = {p["id"]: p["metadata"]["role"] for p in public["players"]}
+    assert roles["u2"] == "UNKNOWN"  # Spectators never see the murderer
+    assert {p["id"]: p["metadata"]["role"] for p in mine["players"]}["u3"] == "INVESTIGATOR"
+
+def test_metadata_only_changes_show_up_in_the_delta():
+    from src.app.core.delta import diff_state
+    game = make_game("room-meta")
+    before = game.projection_for("u1")
+    game.metadata["winner"] = "GOOD"
+    game.mark_dirty()
+    after = game.projection_for("u1")
+
+    assert before["data"]["metadata"].get("winner") is None
+    assert diff_state(before, after)["data"]["metadata"]["winner"] == "GOOD"
+
+def test_dict_projection_matches_the_schema_and_visibility_rules():
+    game = make_game("room-dict")
+    DeceptionGame._card_cache = {"m1": {"id": "m1", "content": "Rope", "image_url": "rope.png"}}
+    game.add_player(DeceptionPlayer(id="u4", name="P4", role=Role.WITNESS))
+    game.add_player(DeceptionPlayer(id="u5", name="P5", role=Role.ACCOMPLICE))
+    game._avatar_cache.update({"u4": "a4.png", "u5": None})
+    for p in game.players:
+        p.means_cards, p.clue_cards = ["m1"], ["gone"]
+        p.draft_pool_means = ["m1"]
+    game.players[0].active_tiles = [{"id": "t1", "name": "Cause", "selected_option": None}]
+    game.status, game.means_id, game.clue_id, game.murderer_id = GameStatus.INVESTIGATION, "m1", "gone", "u2"
+    game.mark_dirty()
+
+    seen = {}
+    for viewer in [None, "u1", "u2", "u3", "u4", "u5"]:
+        state = game.to_game_state(viewer)
+        # Plain dicts, but exactly what the pydantic schema would have produced
+        assert GameState.model_validate(state).model_dump() == state
+        seen[viewer] = {p["id"]: p["metadata"]["role"] for p in state["players"]}
+        for p in state["players"]:
+            assert bool(p["metadata"]["draft_means"]) == (p["id"] == viewer)
+        assert (state["data"]["means_card"] is not None) == (viewer in ("u1", "u2", "u5"))
+
+    assert "UNKNOWN" not in seen["u1"].values()  # The FS sees everyone
+    assert seen["u3"] == {"u1": "FORENSIC_SCIENTIST", "u2": "UNKNOWN", "u3": "INVESTIGATOR", "u4": "UNKNOWN", "u5": "UNKNOWN"}
+    assert seen["u4"]["u2"] == "MURDERER" and seen["u4"]["u5"] == "UNKNOWN"
+    assert seen["u2"]["u5"] == "ACCOMPLICE" and seen["u5"]["u2"] == "MURDERER" and seen["u2"]["u4"] == "UNKNOWN"
+
+    fs = game.to_game_state("u1")
+    player = fs["players"][3]["metadata"]
+    assert player["avatar_url"] == "a4.png"
+    assert player["means_cards"] == [{"id": "m1", "name": "Rope", "content": "Rope", "image_url": "rope.png"}]
+    assert player["clue_cards"] == [{"id": "gone", "name": "Unknown", "content": "Unknown", "image_url": None}]
+    assert fs["data"]["clue_card"]["name"] == "gone"
+    assert fs["players"][0]["metadata"]["active_tiles"] == [{"id": "t1", "name": "Cause", "selected_option": None, "image_url": None}]
+
+    # Card fragments are shared across viewers within a revision, rebuilt after a change
+    assert game.to_game_state("u3")["players"][3]["metadata"]["means_cards"] is player["means_cards"]
+    game.players[3].means_cards = []
+    game.mark_dirty()
+    assert game.to_game_state("u1")["players"][3]["metadata"]["means_cards"] == []
+
+def test_card_views_are_shared_until_the_library_is_edited():
+    from src.app.api.schemas import LibraryCardUpdateRequest
+    from src.app.api.v1 import admin
+    from src.app.core import database
+    from src.app.core.memory_supabase import MemorySupabase, seed_library
+    from src.app.games.deception.logic import invalidate_catalog
+
+    db = MemorySupabase(seed=0)
+    seed_library(db)
+    previous = {name: DeceptionGame.__dict__.get(name) for name in ("_card_cache", "_tile_cache")}
+    try:
+        with patch.object(database, "supabase", db):
+            invalidate_catalog()
+            first, second = make_game("room-cards-1"), make_game("room-cards-2")
+            del DeceptionGame._card_cache, DeceptionGame._tile_cache  # make_game stubs the catalog; load it from db
+            for game in (first, second):
+                game.players[2].means_cards = ["means-1", "means-2"]
+                game.mark_dirty()
+
+            hand = first.to_game_state("u3")["players"][2]["metadata"]["means_cards"]
+            assert hand[0] == {"id": "means-1", "name": "Means 1", "content": "Means 1", "image_url": None}
+            # One view per card, whichever room or viewer it is projected for
+            assert second.to_game_state("u1")["players"][2]["metadata"]["means_cards"][1] is hand[1]
+
+            asyncio.run(admin.update_card("means-1", LibraryCardUpdateRequest(content="Rope")))
+            # No room change needed: the catalog version is part of the fragment cache key
+            assert first.to_game_state("u3")["players"][2]["metadata"]["means_cards"][0]["content"] == "Rope"
+    finally:
+        invalidate_catalog()
+        for name, value in previous.items():
+            if value is not None:
+                setattr(DeceptionGame, name, value)
+
+def test_catalog_bundle_and_card_ref_states():
+    from unittest.mock import AsyncMock
+    from src.app.api.schemas import LibraryCardUpdateRequest
+    from src.app.api.v1 import admin
+    from src.app.api.websocket import manager
+    from src.app.core import database
+    from src.app.core.memory_supabase import MemorySupabase, seed_library
+    from src.app.core.projection import encode_message
+    from src.app.games.deception.logic import invalidate_catalog
+
+    db = MemorySupabase(seed=0)
+    seed_library(db)
+    previous = {name: DeceptionGame.__dict__.get(name) for name in ("_card_cache", "_tile_cache")}
+    user = {"id": "u3"}
+    try:
+        with patch.object(database, "supabase", db):
+            invalidate_catalog()
+            res = asyncio.run(game_routes.game_catalog("deception", None, user))
+            bundle, etag = json.loads(res.body), res.headers["ETag"]
+            assert len(bundle["cards"]) == 120 and etag == f'"{bundle["version"]}"'
+            assert bundle["cards"][0] == {"id": "clue-0", "type": "CLUE", "content": "Clue 0", "image_url": None}
+            assert asyncio.run(game_routes.game_catalog("deception", f'W/{etag}', user)).status_code == 304
+            asyncio.run(admin.update_card("clue-0", LibraryCardUpdateRequest(content="Rope")))
+            assert asyncio.run(game_routes.game_catalog("deception", etag, user)).headers["ETag"] != etag
+
+            game = make_game("room-refs")
+            del DeceptionGame._card_cache, DeceptionGame._tile_cache
+            for p in game.players:
+                p.means_cards, p.clue_cards = [f"means-{i}" for i in range(5)], [f"clue-{i}" for i in range(5)]
+                p.draft_pool_means = [f"means-{i}" for i in range(10)]
+            game.status, game.means_id, game.clue_id, game.murderer_id = GameStatus.INVESTIGATION, "means-0", "clue-0", "u2"
+            game.mark_dirty()
+
+            manager.card_refs["room-refs"] = {"u2"}
+            with patch.object(manager, "send_to_user", new=AsyncMock(return_value=0)) as send:
+                asyncio.run(game.broadcast_state())
+            sent = {call.args[2]: call.args[0]["state"] for call in send.await_args_list}
+    finally:
+        manager.card_refs.pop("room-refs", None)
+        invalidate_catalog()
+        for name, value in previous.items():
+            if value is not None:
+                setattr(DeceptionGame, name, value)
+
+    refs, full = sent["u2"], sent["u3"]
+    assert GameState.model_validate(refs).model_dump() == refs
+    murderer = refs["players"][1]["metadata"]
+    assert murderer["means_cards"] == [f"means-{i}" for i in range(5)] and len(murderer["draft_means"]) == 10
+    assert refs["players"][2]["metadata"]["draft_means"] == []
+    assert refs["data"]["means_card"] == "means-0"
+    assert full["players"][1]["metadata"]["means_cards"][0]["content"] == "Means 0"
+    assert len(encode_message(refs)) * 2 < len(encode_message(full))
+    # Resumes diff against the snapshot of the mode the socket asked for
+    assert game._ref_snapshots["u2"][1] is refs and "u2" not in game._viewer_snapshots
+
+def sync(game_id, if_none_match=None, since=None, wait=0.0):
+    return game_routes.sync_response(game_id, "u3", if_none_match, since=since, wait=wait, t=Translator("en", {}))
+
+def test_sync_etag_and_long_poll():
+    game = make_game()
+    game_manager.games[game.room_id] = game
+
+    async def scenario():
+        res = await sync(game.room_id)
+        etag = res.headers["etag"]
+        assert json.loads(res.body)["seq"] == game.revision
+
+        # Unchanged -> 304 with no body
+        res = await sync(game.room_id, if_none_match=etag)
+        assert res.status_code == 304
+
+        # Long poll wakes up as soon as the room moves on
+        async def later():
+            await asyncio.sleep(0.05)
+            game.mark_dirty()
+        asyncio.create_task(later())
+        res = await sync(game.room_id, if_none_match=etag, wait=5)
+        assert res.status_code == 200
+        assert json.loads(res.body)["seq"] == game.revision
+
+        # ...and gives up after `wait` seconds with a 304
+        res = await sync(game.room_id, since=game.revision, if_none_match=res.headers["etag"], wait=0.05)
+        assert res.status_code == 304
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        game_manager.remove_game(game.room_id)
+
+def test_sync_post_validates_since_and_wait():
+    from fastapi.testclient import TestClient
+    from src.app import main
+    from src.app.core.auth import get_current_user
+
+    game = make_game("room-sync-post")
+    game_manager.games[game.room_id] = game
+    main.app.dependency_overrides[get_current_user] = lambda: {"id": "u3"}
+    try:
+        client = TestClient(main.app)
+        post = lambda data: client.post("/api/v1/game/sync", json={"gameId": game.room_id, "playerId": "u3", "data": data})
+        assert post({"wait": "soon"}).status_code == 422
+        assert post({"wait": -1}).status_code == 422
+        assert post({"since": "abc"}).status_code == 422
+
+        res = post({"since": game.revision - 1, "wait": 1e9})
+        assert res.status_code == 200 and res.json()["seq"] == game.revision
+        assert post(None).status_code == 200
+    finally:
+        main.app.dependency_overrides.pop(get_current_user, None)
+        game_manager.remove_game(game.room_id)
@@ -0,0 +1,174 @@
+import sys
+import os
+import asyncio
+import json
+import tempfile
+import threading
+from unittest.mock import patch
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from fastapi.testclient import TestClient
+from src.app import main
+from src.app.api.websocket import manager
+from src.app.core.memory_supabase import MemorySupabase
+from src.app.core.metrics import InstrumentedSupabase
+from src.app.core.tracing import InMemoryExporter, JsonlExporter, parse_traceparent, tracer
+from src.app.games.deception.logic import DeceptionGame, DeceptionPlayer
+
+PARENT = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+class FakeSocket:
+    async def send_text(self, text):
+        pass
+
+def traced_with(exporter, rate=1.0):
+    tracer.configure(exporter, rate)
+    return exporter
+
+def test_traceparent_parsing_and_head_sampling():
+    assert parse_traceparent(PARENT) == ("0af7651916cd43dd8448eb211c80319c", "b7ad6b7169203331", True)
+    assert parse_traceparent(PARENT[:-1] + "0")[2] is False
+    assert parse_traceparent("00-" + "0" * 32 + "-b7ad6b7169203331-01") is None
+    assert parse_traceparent("garbage") is None
+
+    exporter = traced_with(InMemoryExporter())
+    try:
+        # Joins the caller's trace; children nest under the current span
+        with tracer.start_trace("root", traceparent=PARENT) as root:
+            with tracer.span("child") as child:
+                assert child.parent_id == root.span_id
+        assert root.trace_id == "0af7651916cd43dd8448eb211c80319c" and root.parent_id == "b7ad6b7169203331"
+        assert [s.name for s in exporter.spans] == ["child", "root"]
+
+        # An unsampled caller keeps the whole trace off, regardless of the local rate
+        exporter.clear()
+        with tracer.start_trace("root", traceparent=PARENT[:-1] + "0"):
+            with tracer.span("child"):
+                pass
+        # No trace at all: span() records nothing
+        with tracer.span("orphan"):
+            pass
+        assert not exporter.spans
+
+        tracer.configure(exporter, 0.0)
+        with tracer.start_trace("root"):
+            pass
+        assert not exporter.spans
+
+        # Clients can't force tracing: a sampled traceparent still goes through the local rate...
+        tracer.configure(exporter, 0.001)
+        with patch("src.app.core.tracing.random.random", return_value=0.5):
+            with tracer.start_trace("root", traceparent=PARENT):
+                pass
+        assert not exporter.spans
+        # ...unless the callers are trusted upstreams
+        tracer.configure(exporter, 0.001, trust_parent=True)
+        with patch("src.app.core.tracing.random.random", return_value=0.5):
+            with tracer.start_trace("root", traceparent=PARENT):
+                pass
+        assert [s.name for s in exporter.spans] == ["root"]
+    finally:
+        tracer.configure(None, 0.0)
+
+def test_ws_frame_trace_covers_event_state_builds_sends_and_supabase():
+    DeceptionGame._card_cache = {}
+    DeceptionGame._tile_cache = {}
+    game = DeceptionGame(room_id="trace-room", room_code="TRAC01", host_id="u1")
+    for i in range(1, 4):
+        game.add_player(DeceptionPlayer(id=f"u{i}", name=f"P{i}", is_host=(i == 1)))
+    game._avatar_cache.update({p.id: None for p in game.players})
+    manager.active_connections["trace-room"] = {p.id: FakeSocket() for p in game.players}
+    db = InstrumentedSupabase(MemorySupabase())
+
+    async def save(self):
+        # Supabase calls run in worker threads; the span context must follow them
+        await asyncio.to_thread(lambda: db.table("games").select("id").execute())
+
+    exporter = traced_with(InMemoryExporter())
+    try:
+        with patch.object(DeceptionGame, "save", save), patch.object(DeceptionGame, "sync_to_supabase", lambda self: None):
+            async def frame():
+                with tracer.start_trace("ws.event", traceparent=PARENT, event="ready"):
+                    await game.handle_event("u2", "ready", {})
+            asyncio.run(frame())
+    finally:
+        tracer.configure(None, 0.0)
+        manager.active_connections.pop("trace-room", None)
+
+    spans = list(exporter.spans)
+    by_id = {s.span_id: s for s in spans}
+    names = [s.name for s in spans]
+    assert {s.trace_id for s in spans} == {"0af7651916cd43dd8448eb211c80319c"}
+    assert names.count("deception.to_game_state") == 3 and names.count("ws.send") == 3
+    assert {"ws.event", "deception.handle_event", "deception.broadcast_state", "supabase"} <= set(names)
+    supabase = next(s for s in spans if s.name == "supabase")
+    assert supabase.attributes == {"table": "games", "op": "select"}
+    assert by_id[supabase.parent_id].name == "deception.handle_event"
+    send = next(s for s in spans if s.name == "ws.send")
+    assert by_id[send.parent_id].name == "deception.broadcast_state" and send.attributes["bytes"] > 0
+
+def test_http_requests_join_the_callers_trace_and_export_to_jsonl():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "traces.jsonl")
+        traced_with(JsonlExporter(path))
+        try:
+            res = TestClient(main.app).get("/health", headers={"traceparent": PARENT})
+            tracer.exporter.flush()
+        finally:
+            tracer.configure(None, 0.0)
+
+        assert res.status_code == 200
+        assert res.headers["traceparent"].startswith("00-0af7651916cd43dd8448eb211c80319c-")
+        with open(path) as f:
+            records = [json.loads(line) for line in f]
+    http = next(r for r in records if r["name"] == "http")
+    assert http["parentSpanId"] == "b7ad6b7169203331"
+    assert http["attributes"]["route"] == "/health" and http["attributes"]["status_code"] == 200
+    assert http["endTimeUnixNano"] >= http["startTimeUnixNano"] and http["status"] == {"code": "OK"}
+
+def test_jsonl_exporter_writes_full_batches_off_the_calling_thread():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "traces.jsonl")
+        exporter = JsonlExporter(path, batch_size=4)
+        writers, written = [], threading.Event()
+        real_flush = exporter.flush
+        def flush():
+            writers.append(threading.current_thread().name)
+            real_flush()
+            written.set()
+
+        with patch.object(exporter, "flush", side_effect=flush):
+            traced_with(exporter)
+            try:
+                for i in range(4):
+                    with tracer.start_trace("op", i=i):
+                        pass
+                assert written.wait(timeout=5)
+            finally:
+                tracer.configure(None, 0.0)
+
+        assert writers and writers[0] == "trace-writer"
+        with open(path) as f:
+            assert sorted(json.loads(line)["attributes"]["i"] for line in f) == [0, 1, 2, 3]
+
+def test_jsonl_exporter_starts_one_writer_under_concurrent_exports():
+    with tempfile.TemporaryDirectory() as tmp:
+        exporter = JsonlExporter(os.path.join(tmp, "traces.jsonl"), batch_size=1)
+        writers = lambda: sum(1 for t in threading.enumerate() if t.name == "trace-writer")
+        before = writers()
+        span = object()  # Never serialized: flush() is patched out
+        start = threading.Barrier(8)
+
+        def export():
+            start.wait()
+            exporter.export(span)
+
+        with patch.object(exporter, "flush"):
+            threads = [threading.Thread(target=export) for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            assert writers() - before == 1
@@ -0,0 +1,186 @@
+import sys
+import os
+import asyncio
+import json
+from unittest.mock import patch
+
+# Add backend root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from src.app.api.v1 import game as game_routes
+from src.app.core.i18n import Translator
+from src.app.core.projection import ProjectionFeed, feeds
+from src.app.games.deception.logic import DeceptionGame, DeceptionPlayer
+from src.app.games.deception.manager import game_manager
+
+def make_game(room_id):
+    # Skip the Supabase-backed catalog lookups
+    DeceptionGame._card_cache = {}
+    DeceptionGame._tile_cache = {}
+    game = DeceptionGame(room_id=room_id, room_code="VIEW01", host_id="u1")
+    for i in range(1, 4):
+        game.add_player(DeceptionPlayer(id=f"u{i}", name=f"P{i}", is_host=(i == 1)))
+    game._avatar_cache.update({p.id: None for p in game.players})
+    return game
+
+def test_feed_shares_frames_and_resyncs_slow_viewers():
+    async def scenario():
+        feed = ProjectionFeed("room", queue_size=2)
+        feed.publish(1, {"status": "LOBBY", "players": []}, 0.0)
+        a, b = feed.subscribe(), feed.subscribe()
+
+        feed.publish(2, {"status": "SETUP", "players": []}, 0.0)
+        assert (await a.get()).event == "game_update"
+        delta = await a.get()
+        assert delta is (await b.get(), await b.get())[1]  # Encoded once, shared by every viewer
+        assert json.loads(delta.data)["changes"] == {"status": "SETUP"}
+
+        # b stops reading; when its queue overflows it gets the latest snapshot instead
+        for rev in range(3, 7):
+            feed.publish(rev, {"status": f"S{rev}", "players": []}, 0.0)
+        frames = [b.get_nowait() for _ in range(b.qsize())]
+        assert [f.event for f in frames] == ["game_update", "game_delta"]
+        assert frames[-1].seq == 6
+
+        # Closing the room ends every subscription, even one with a full backlog
+        feed.close()
+        assert b.get_nowait() is None
+        assert a.get_nowait() is None
+        assert not feed.subscribers
+
+    asyncio.run(scenario())
+
+class FakeRequest:
+    async def is_disconnected(self):
+        return False
+
+def test_sse_stream_sends_snapshot_then_deltas_without_seating_viewer():
+    game = make_game("room-sse")
+    game_manager.games[game.room_id] = game
+
+    async def scenario():
+        with patch("src.app.core.auth.verify_supabase_jwt", return_value={"id": "viewer"}):
+            res = await game_routes.game_stream(game.room_id, FakeRequest(), token="t", t=Translator("en", {}))
+        stream = res.body_iterator
+
+        assert await anext(stream) == "retry: 3000\n\n"
+        first = await anext(stream)
+        assert first.startswith(f"id: {game.revision}\nevent: game_update\n")
+
+        await game.handle_event("u2", "ready", {})
+        update = await anext(stream)
+        assert update.startswith(f"id: {game.revision}\nevent: game_delta\n")
+        payload = json.loads(update.split("data: ", 1)[1])
+        assert payload["changes"]["players"]["upsert"][0]["is_ready"] is True
+
+        assert game.get_player("viewer") is None
+        assert len(feeds.get(game.room_id).subscribers) == 1
+
+        game_manager.remove_game(game.room_id)
+        assert (await anext(stream)).startswith("event: closed")
+        await stream.aclose()
+
+    with patch("src.app.games.deception.logic.get_supabase", return_value=None):
+        asyncio.run(scenario())
+    assert feeds.get(game.room_id) is None
+
+def test_delayed_feed_holds_frames_back():
+    async def scenario():
+        feed = ProjectionFeed("room", delay=0.05)
+        feed.publish(1, {"status": "LOBBY"}, 0.0)
+        queue = feed.subscribe()
+        assert queue.empty()  # Nothing delivered yet, not even the snapshot
+
+        await asyncio.sleep(0.1)
+        assert queue.get_nowait().seq == 1
+        feed.publish(2, {"status": "SETUP"}, 0.0)
+        assert queue.empty()
+
+        # Lifting the delay releases whatever was held back, in order
+        feed.set_delay(0)
+        assert queue.get_nowait().seq == 2
+
+    asyncio.run(scenario())
+
+class FakeSpectatorSocket:
+    def __init__(self):
+        self.sent = []
+        self.inbox = asyncio.Queue()
+        self.closed = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data):
+        self.sent.append(data)
+
+    async def send_json(self, data):
+        self.sent.append(json.dumps(data))
+
+    async def receive_text(self):
+        message = await self.inbox.get()
+        if message is None:
+            from fastapi import WebSocketDisconnect
+            raise WebSocketDisconnect()
+        return message
+
+    async def close(self, code=1000):
+        self.closed = code
+        self.inbox.put_nowait(None)
+
+def test_spectators_share_one_projection_per_revision():
+    from src.app import main
+    from src.app.api.websocket import manager
+
+    game = make_game("room-spectate")
+    game_manager.games[game.room_id] = game
+
+    async def scenario():
+        sockets = [FakeSpectatorSocket() for _ in range(200)]
+        with patch("src.app.core.auth.verify_supabase_jwt", return_value={"id": "viewer"}):
+            tasks = [asyncio.create_task(main.spectator_endpoint(ws, game.room_id, token="t")) for ws in sockets]
+            await asyncio.sleep(0.01)
+        assert manager.spectator_count(game.room_id) == 200
+        assert game.get_player("viewer") is None
+
+        with patch.object(DeceptionGame, "to_game_state", autospec=True, side_effect=DeceptionGame.to_game_state) as build:
+            await game.handle_event("u2", "ready", {})
+            await asyncio.sleep(0.01)
+        # One build per seated player plus one shared public projection
+        assert build.call_count == len(game.players) + 1
+        assert all(len(ws.sent) == 2 for ws in sockets)
+        assert len({id(ws.sent[1]) for ws in sockets}) == 1
+        assert json.loads(sockets[0].sent[1])["type"] == "game_delta"
+
+        game_manager.remove_game(game.room_id)
+        await asyncio.gather(*tasks)
+        assert all(ws.closed == 1000 for ws in sockets)
+        assert manager.spectator_count(game.room_id) == 0
+
+    with patch("src.app.games.deception.logic.get_supabase", return_value=None):
+        asyncio.run(scenario())
+
+def test_spectator_delay_is_host_only_and_blocks_live_sync():
+    from fastapi import HTTPException
+    game = make_game("room-delay")
+    game_manager.games[game.room_id] = game
+
+    async def scenario():
+        await game.handle_event("u2", "set_spectator_delay", {"seconds": 30})
+        assert game.spectator_delay == 0
+        await game.handle_event("u1", "set_spectator_delay", {"seconds": 30})
+        assert game.spectator_delay == 30
+
+        res = await game_routes.sync_response(game.room_id, "u2", None, since=None, wait=0, t=Translator("en", {}))
+        assert res.status_code == 200
+        try:
+            await game_routes.sync_response(game.room_id, "viewer", None, since=None, wait=0, t=Translator("en", {}))
+            assert False, "live sync must not bypass the spectator delay"
+        except HTTPException as e:
+            assert e.status_code == 403
+
+    try:
+        with patch("src.app.games.deception.logic.get_supabase", return_value=None):
+            asyncio.run(scenario())
+    finally:
+        game_manager.remove_game(game.room_id)
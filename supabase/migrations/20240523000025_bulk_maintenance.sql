@@ -0,0 +1,109 @@
+-- Bounded maintenance functions, invoked by the backend maintenance engine
+-- (/api/v1/cron/cleanup and the scheduler) through RPC.
+-- Each call deletes at most p_batch_size rows so a sweep never holds long locks;
+-- the caller keeps calling until a batch comes back short.
+
+-- Replace the unbounded versions from 20240523000010 / 20240523000013
+DROP FUNCTION IF EXISTS cleanup_stale_lobbies();
+DROP FUNCTION IF EXISTS public.cleanup_old_chats();
+
+-- 1. Stale games (players, game_cards, game_tiles and game_chats go with them via ON DELETE CASCADE)
+--    Returns the deleted ids so the backend can evict matching Redis keys and in-memory rooms.
+--    p_exclude: rooms the backend still has players connected to; never deleted.
+CREATE OR REPLACE FUNCTION public.cleanup_stale_lobbies(
+    p_batch_size INT DEFAULT 500,
+    p_lobby_max_age INTERVAL DEFAULT INTERVAL '60 minutes',
+    p_game_max_age INTERVAL DEFAULT INTERVAL '24 hours',
+    p_exclude UUID[] DEFAULT '{}'
+)
+RETURNS TABLE(game_id UUID) AS $$
+BEGIN
+    RETURN QUERY
+    WITH doomed AS (
+        SELECT g.id
+        FROM public.games g
+        WHERE ((g.status = 'LOBBY' AND g.created_at < NOW() - p_lobby_max_age)
+           OR g.status = 'ABANDONED'
+           OR g.created_at < NOW() - p_game_max_age)
+          AND NOT (g.id = ANY(p_exclude))
+        ORDER BY g.created_at
+        LIMIT p_batch_size
+        FOR UPDATE SKIP LOCKED
+    ), deleted AS (
+        DELETE FROM public.games g
+        USING doomed
+        WHERE g.id = doomed.id
+        RETURNING g.id
+    )
+    SELECT deleted.id FROM deleted;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+COMMENT ON FUNCTION public.cleanup_stale_lobbies IS 'Deletes up to p_batch_size stale lobbies, abandoned rooms and expired games; returns their ids';
+
+-- 2. Orphaned rows (game_id is nullable, so cascades alone do not catch these)
+CREATE OR REPLACE FUNCTION public.cleanup_orphaned_rows(p_batch_size INT DEFAULT 5000)
+RETURNS TABLE(players_removed INT, game_cards_removed INT, game_tiles_removed INT) AS $$
+DECLARE
+    v_players INT;
+    v_cards INT;
+    v_tiles INT;
+BEGIN
+    WITH doomed AS (
+        SELECT id FROM public.players WHERE game_id IS NULL
+        LIMIT p_batch_size FOR UPDATE SKIP LOCKED
+    )
+    DELETE FROM public.players p USING doomed WHERE p.id = doomed.id;
+    GET DIAGNOSTICS v_players = ROW_COUNT;
+
+    WITH doomed AS (
+        SELECT id FROM public.game_cards WHERE game_id IS NULL OR player_id IS NULL
+        LIMIT p_batch_size FOR UPDATE SKIP LOCKED
+    )
+    DELETE FROM public.game_cards c USING doomed WHERE c.id = doomed.id;
+    GET DIAGNOSTICS v_cards = ROW_COUNT;
+
+    WITH doomed AS (
+        SELECT id FROM public.game_tiles WHERE game_id IS NULL
+        LIMIT p_batch_size FOR UPDATE SKIP LOCKED
+    )
+    DELETE FROM public.game_tiles t USING doomed WHERE t.id = doomed.id;
+    GET DIAGNOSTICS v_tiles = ROW_COUNT;
+
+    RETURN QUERY SELECT v_players, v_cards, v_tiles;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+COMMENT ON FUNCTION public.cleanup_orphaned_rows IS 'Deletes up to p_batch_size orphaned players, game_cards and game_tiles each';
+
+-- 3. Old chats
+CREATE OR REPLACE FUNCTION public.cleanup_old_chats(
+    p_batch_size INT DEFAULT 5000,
+    p_max_age INTERVAL DEFAULT INTERVAL '1 day'
+)
+RETURNS INT AS $$
+DECLARE
+    v_removed INT;
+BEGIN
+    WITH doomed AS (
+        SELECT id FROM public.game_chats
+        WHERE created_at < NOW() - p_max_age
+        ORDER BY created_at
+        LIMIT p_batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    DELETE FROM public.game_chats c USING doomed WHERE c.id = doomed.id;
+    GET DIAGNOSTICS v_removed = ROW_COUNT;
+    RETURN v_removed;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+COMMENT ON FUNCTION public.cleanup_old_chats IS 'Deletes up to p_batch_size game chats older than p_max_age';
+
+-- Ages and batch sizes are caller-controlled, so only the backend (service_role) may run these
+REVOKE EXECUTE ON FUNCTION public.cleanup_stale_lobbies(INT, INTERVAL, INTERVAL, UUID[]) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.cleanup_orphaned_rows(INT) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.cleanup_old_chats(INT, INTERVAL) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.cleanup_stale_lobbies(INT, INTERVAL, INTERVAL, UUID[]) TO service_role;
+GRANT EXECUTE ON FUNCTION public.cleanup_orphaned_rows(INT) TO service_role;
+GRANT EXECUTE ON FUNCTION public.cleanup_old_chats(INT, INTERVAL) TO service_role;
@@ -0,0 +1,52 @@
+-- Indexes for the backend's hot queries.
+-- Checked by backend/src/app/tests/test_query_plans.py, which fails if any of them
+-- falls back to a sequential scan.
+--
+-- Already covered by earlier migrations:
+--   games(room_code)            -> UNIQUE constraint in the initial schema (create_game / join_game)
+--   players(game_id, user_id)   -> unique_player_in_game (handle_player_connect / join_game)
+--   players(user_id)            -> idx_players_user_id (list_games "my games")
+
+-- list_games: public lobbies, newest first
+CREATE INDEX IF NOT EXISTS idx_games_public_lobbies
+    ON public.games (created_at DESC)
+    WHERE status = 'LOBBY' AND is_public;
+
+-- Status sweeps (admin views)
+CREATE INDEX IF NOT EXISTS idx_games_status_created_at
+    ON public.games (status, created_at);
+
+-- cleanup_stale_lobbies: its OR across status and age is walked in created_at order up to the batch size
+CREATE INDEX IF NOT EXISTS idx_games_created_at
+    ON public.games (created_at);
+
+-- confirm_draft / start_game / reset_game
+CREATE INDEX IF NOT EXISTS idx_game_cards_game_player
+    ON public.game_cards (game_id, player_id);
+
+-- ON DELETE CASCADE from players; also serves the player_id IS NULL orphan sweep
+CREATE INDEX IF NOT EXISTS idx_game_cards_player_id
+    ON public.game_cards (player_id);
+
+-- reset_game and ON DELETE CASCADE from games
+CREATE INDEX IF NOT EXISTS idx_game_tiles_game_id
+    ON public.game_tiles (game_id);
+
+-- Chat history per room, newest last
+CREATE INDEX IF NOT EXISTS idx_game_chats_game_created
+    ON public.game_chats (game_id, created_at);
+
+-- cleanup_old_chats
+CREATE INDEX IF NOT EXISTS idx_game_chats_created_at
+    ON public.game_chats (created_at);
+
+-- ON DELETE CASCADE from players
+CREATE INDEX IF NOT EXISTS idx_game_chats_player_id
+    ON public.game_chats (player_id);
+
+-- Deck building and admin filters
+CREATE INDEX IF NOT EXISTS idx_library_cards_type
+    ON public.library_cards (type, game_type);
+
+CREATE INDEX IF NOT EXISTS idx_library_tiles_type
+    ON public.library_tiles (type);
@@ -0,0 +1,72 @@
+-- Atomic join, called by POST /api/v1/game/join in a single round trip.
+-- The game row is locked for the duration of the call, so two joins racing for
+-- the last seat are serialized and the loser gets 'room_full'.
+--
+-- Errors are raised with the i18n key as the message:
+--   room_not_found, in_progress, room_full
+
+CREATE OR REPLACE FUNCTION public.join_game(
+    p_room_code TEXT,
+    p_user_id UUID,
+    p_name TEXT,
+    p_is_site_admin BOOLEAN DEFAULT FALSE,
+    p_max_players INT DEFAULT 12
+)
+RETURNS JSONB AS $$
+DECLARE
+    v_game RECORD;
+    v_player_id UUID;
+    v_is_admin BOOLEAN;
+    v_is_new BOOLEAN := FALSE;
+BEGIN
+    SELECT id, room_code, status, host_id
+    INTO v_game
+    FROM public.games
+    WHERE room_code = upper(p_room_code)
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'room_not_found' USING ERRCODE = 'P0002';
+    END IF;
+
+    v_is_admin := (v_game.host_id = p_user_id) OR p_is_site_admin;
+
+    UPDATE public.profiles SET display_name = p_name WHERE id = p_user_id;
+
+    UPDATE public.players
+    SET name = p_name, is_admin = v_is_admin
+    WHERE game_id = v_game.id AND user_id = p_user_id
+    RETURNING id INTO v_player_id;
+
+    IF v_player_id IS NULL THEN
+        IF v_game.status <> 'LOBBY' THEN
+            RAISE EXCEPTION 'in_progress' USING ERRCODE = 'P0001';
+        END IF;
+
+        IF (SELECT count(*) FROM public.players WHERE game_id = v_game.id) >= p_max_players THEN
+            RAISE EXCEPTION 'room_full' USING ERRCODE = 'P0001';
+        END IF;
+
+        INSERT INTO public.players (game_id, user_id, name, is_admin, metadata)
+        VALUES (v_game.id, p_user_id, p_name, v_is_admin, jsonb_build_object('seat_index', floor(random() * 1001)::int))
+        RETURNING id INTO v_player_id;
+        v_is_new := TRUE;
+    END IF;
+
+    RETURN jsonb_build_object(
+        'game_id', v_game.id,
+        'room_code', v_game.room_code,
+        'host_id', v_game.host_id,
+        'status', v_game.status,
+        'player_id', v_player_id,
+        'is_admin', v_is_admin,
+        'is_new', v_is_new
+    );
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+COMMENT ON FUNCTION public.join_game IS 'Joins (or re-joins) a room by code under a row lock on the game; returns the ids the backend needs';
+
+-- The caller's identity and admin flag are parameters, so only the backend (service_role) may call this
+REVOKE EXECUTE ON FUNCTION public.join_game(TEXT, UUID, TEXT, BOOLEAN, INT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.join_game(TEXT, UUID, TEXT, BOOLEAN, INT) TO service_role;
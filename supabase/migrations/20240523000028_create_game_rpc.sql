@@ -0,0 +1,63 @@
+-- Atomic room creation, called by POST /api/v1/game/create in a single round trip.
+-- Inserts the game and its host player together, so a failure can no longer
+-- leave a room without a host.
+--
+-- The backend passes the code from its allocator; if that code is already taken
+-- (or none is given) a random one is drawn here from the same alphabet.
+
+CREATE OR REPLACE FUNCTION public.create_game(
+    p_host_id UUID,
+    p_host_name TEXT,
+    p_name TEXT,
+    p_is_public BOOLEAN DEFAULT TRUE,
+    p_room_code TEXT DEFAULT NULL,
+    p_game_type TEXT DEFAULT 'deception'
+)
+RETURNS JSONB AS $$
+DECLARE
+    v_alphabet CONSTANT TEXT := 'ABCDEFGHJKLMNPQRSTUVWXYZ23456789';
+    v_code TEXT := upper(p_room_code);
+    v_game_id UUID;
+    v_player_id UUID;
+    v_attempts INT := 0;
+BEGIN
+    LOOP
+        IF v_code IS NULL THEN
+            SELECT string_agg(substr(v_alphabet, 1 + floor(random() * length(v_alphabet))::int, 1), '')
+            INTO v_code
+            FROM generate_series(1, 6);
+        END IF;
+
+        BEGIN
+            INSERT INTO public.games (room_code, status, host_id, name, is_public, game_type)
+            VALUES (v_code, 'LOBBY', p_host_id, p_name, p_is_public, p_game_type)
+            RETURNING id INTO v_game_id;
+            EXIT;
+        EXCEPTION WHEN unique_violation THEN
+            v_attempts := v_attempts + 1;
+            IF v_attempts >= 10 THEN
+                RAISE EXCEPTION 'code_gen_failed' USING ERRCODE = 'P0001';
+            END IF;
+            v_code := NULL;
+        END;
+    END LOOP;
+
+    INSERT INTO public.players (game_id, user_id, name, is_admin, metadata)
+    VALUES (v_game_id, p_host_id, p_host_name, TRUE, jsonb_build_object('seat_index', 0))
+    RETURNING id INTO v_player_id;
+
+    RETURN jsonb_build_object(
+        'game_id', v_game_id,
+        'room_code', v_code,
+        'player_id', v_player_id
+    );
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+COMMENT ON FUNCTION public.create_game IS 'Creates a room and its host player in one transaction; returns game_id, room_code and player_id';
+
+-- The host is a parameter, so only the backend (service_role) may call this.
+-- Its client is built from SUPABASE_SERVICE_ROLE_KEY and refuses to start with an anon key
+-- (database.server_key), so room creation can't silently hit a permission error.
+REVOKE EXECUTE ON FUNCTION public.create_game(UUID, TEXT, TEXT, BOOLEAN, TEXT, TEXT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.create_game(UUID, TEXT, TEXT, BOOLEAN, TEXT, TEXT) TO service_role;